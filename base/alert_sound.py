@@ -0,0 +1,152 @@
+"""
+报警提示音服务
+
+报警音频只加载一次，并按当前默认输出设备的通道能力预先混音为 (帧数, 输出通道数) 的 float32 连续数组；
+随后保持一个常开的输出流（空闲时输出静音），play() 只把播放位置归零，
+回调中按块 np.copyto 到输出缓冲区。连续 NG 报警不再反复创建线程、查询设备和打开输出流。
+
+输出流打开失败（如无输出设备、设备被占用）时退化为 sd.play 播放预混音后的数组。
+
+使用示例：
+    alert = AlertSoundService(DEFAULT_DIR + "alert.wav")
+    alert.play()        # 正在播放时忽略，返回 False
+    ...
+    alert.close()
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+from base.log_manager import LogManager
+from base.player_audio import AudioPlayer
+from base.sound_device_manager import sd
+from base.wav_reader import MappedWavReader
+
+logger = LogManager.set_log_handler("core")
+
+
+class AlertSoundService:
+    def __init__(self, audio_path: str, blocksize: int = 256, keep_stream: bool = True):
+        """
+        参数:
+            audio_path (str): 报警音频文件路径
+            blocksize (int): 常开输出流的块大小（帧），越小触发延迟越低
+            keep_stream (bool): False 时不保持常开输出流，每次使用 sd.play
+        """
+        self.audio_path = audio_path
+        self.blocksize = int(blocksize)
+        self.keep_stream = keep_stream
+        self.sample_rate = 44100
+        self._source: Optional[np.ndarray] = None
+        self._buffer: Optional[np.ndarray] = None
+        self._total_frames = 0
+        # 播放位置 >= _total_frames 表示空闲；由 play() 归零、由回调推进
+        self._position = 0
+        self._stream = None
+        self._lock = threading.Lock()
+
+        self._load()
+        self.prepare()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._buffer is not None
+
+    @property
+    def is_playing(self) -> bool:
+        return self._position < self._total_frames
+
+    def _load(self):
+        try:
+            with MappedWavReader(self.audio_path) as reader:
+                self._source = reader.to_array().copy()
+                self.sample_rate = reader.sample_rate
+        except ValueError:
+            import librosa
+
+            audio_data, self.sample_rate = librosa.load(self.audio_path, sr=None, mono=False)
+            self._source = np.asarray(audio_data.T if audio_data.ndim == 2 else audio_data.reshape(-1, 1),
+                                      dtype=np.float32)
+
+    def prepare(self):
+        """按当前默认输出设备预混音，并（重新）打开常开输出流"""
+        with self._lock:
+            self._close_stream()
+            try:
+                dev_info = sd.query_devices(sd.default.device[1])
+                max_out = max(1, int(dev_info.get("max_output_channels", 2)))
+            except Exception:
+                max_out = 2
+            mix_matrix = AudioPlayer.build_mix_matrix(self._source.shape[1], max_out)
+            rendered = self._source if mix_matrix is None else self._source @ mix_matrix
+            self._buffer = np.ascontiguousarray(rendered, dtype=np.float32)
+            self._total_frames = int(self._buffer.shape[0])
+            self._position = self._total_frames
+
+            if not self.keep_stream:
+                return
+            try:
+                self._stream = sd.OutputStream(
+                    samplerate=self.sample_rate,
+                    channels=int(self._buffer.shape[1]),
+                    dtype="float32",
+                    blocksize=self.blocksize,
+                    latency="low",
+                    callback=self._callback,
+                )
+                self._stream.start()
+            except Exception as e:
+                self._stream = None
+                logger.warning(f"报警音频输出流打开失败，改用 sd.play: {e}")
+
+    def _callback(self, outdata, frames, time_info, status):
+        position = self._position
+        remaining = self._total_frames - position
+        if remaining <= 0:
+            outdata.fill(0)
+            return
+        n = min(frames, remaining)
+        np.copyto(outdata[:n], self._buffer[position:position + n])
+        if n < frames:
+            outdata[n:].fill(0)
+        self._position = position + n
+
+    def play(self) -> bool:
+        """触发一次报警音，正在播放时忽略；返回是否触发"""
+        if self._buffer is None:
+            return False
+        stream = self._stream
+        if stream is not None and not stream.active:
+            # 输出流已失效（设备断开等）时回调不再推进播放位置，is_playing 会一直为真，需先重新打开
+            logger.warning("报警音频输出流已停止，重新打开")
+            self.prepare()
+            if self._stream is not None:
+                self._position = 0
+                return True
+        elif self.is_playing:
+            return False
+        elif stream is not None:
+            self._position = 0
+            return True
+        try:
+            sd.play(self._buffer, self.sample_rate, blocking=False)
+            return True
+        except Exception as e:
+            logger.error(f"播放报警音频失败: {e}")
+            return False
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception as e:
+                logger.warning(f"关闭报警音频输出流失败: {e}")
+            self._stream = None
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+            self._position = self._total_frames
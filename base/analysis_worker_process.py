@@ -1,14 +1,16 @@
 import os
 
 
-def analysis_worker(job_queue, result_queue):
+def analysis_worker(job_queue, result_queue, model_cache_size=2, max_batch_size=8, max_wait_ms=0.0):
     """
     独立进程中的分析工作循环：
-    - 从 job_queue 获取任务（包含 npy 路径、采样率、模型与配置路径）
-    - 加载切片 numpy 文件；首次或模型路径变更时常驻加载模型
-    - 逐通道执行预测（复用已加载模型）
-    - 将结果通过 result_queue 回传
-    - 接收到 None 时退出
+    - 从 job_queue 获取任务（包含 npy 路径、采样率、模型名、模型与配置路径）
+    - MicroBatcher 收集任务：取出已积压的任务（最多 max_batch_size 个）为一批；默认不额外等待（max_wait_ms=0），
+      分析跟得上投递时每批只有一个任务，不增加延迟
+    - 加载切片 numpy 文件；模型经 ModelCache 常驻（首次使用或模型/配置文件更新时加载，LRU 保留最近使用的）
+    - 同一模型、采样率与片段形状的任务堆叠为 (batch, channels, samples)，一次预测完成，结果按 job_id 分发
+    - 将结果与加载/预测耗时（timing，predict_ms 为整批耗时，batch_size 为批内任务数）通过 result_queue 回传
+    - 接收到 None 时处理完已收集的任务后退出
     """
     # 子进程内限制底层线程数，避免过度并行
     try:
@@ -19,12 +21,15 @@ def analysis_worker(job_queue, result_queue):
         os.environ.setdefault("VECLIB_MAXIMUM_THREADS", "1")
     except Exception:
         pass
-    from base.peak_detection_runner import run_peak_detection
     try:
         import numpy as _np
         import os as _os
-        import json as _json
-        
+        import time as _time
+        from base.micro_batcher import MicroBatcher, group_jobs
+        from base.model_registry import ModelCache
+
+        model_cache = ModelCache(capacity=model_cache_size)
+        batcher = MicroBatcher(job_queue, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
     except Exception as e:
         # 若初始化即失败，尝试将错误回传并退出
         try:
@@ -32,40 +37,62 @@ def analysis_worker(job_queue, result_queue):
         finally:
             return
 
+    def _put(job_id, results, timing):
+        try:
+            result_queue.put({"job_id": job_id, "results": results, "timing": timing})
+        except Exception:
+            # 主进程可能已退出
+            pass
 
     while True:
-        job = job_queue.get()
-        if job is None:
+        jobs = batcher.next_batch()
+        if jobs is None:
             break
-        job_id = job.get("job_id")
-        npy_path = job.get("npy_path")
-        sampling_rate = job.get("sampling_rate")
-        model_name = job.get("model_name") or ""
-        config_path = job.get("config_path")
-        results = []
-        try:
-            segments = _np.load(npy_path)
+
+        loaded = []
+        for job in jobs:
+            job_id = job.get("job_id")
+            model_name = job.get("model_name") or "knock_peak_detector"
+            timing = {"model_name": model_name, "load_ms": 0.0, "predict_ms": 0.0, "batch_size": 1}
+            try:
+                npy_path = job.get("npy_path")
+                segments = _np.load(npy_path)
+                try:
+                    # 及时删除临时文件，避免堆积
+                    _os.remove(npy_path)
+                except Exception:
+                    pass
+            except Exception as e:
+                _put(job_id, [{"ret_code": -1, "ret_msg": f"worker error: {e}", "result": []}], timing)
+                continue
+            key = (
+                model_name,
+                job.get("model_path") or "",
+                job.get("config_path"),
+                job.get("sampling_rate"),
+                segments.shape,
+            )
+            loaded.append((key, job_id, segments, timing))
+
+        for (model_name, model_path, config_path, sampling_rate, _), group in group_jobs(loaded, lambda item: item[0]).items():
+            job_ids = [job_id for _, job_id, _, _ in group]
+            timings = [timing for _, _, _, timing in group]
             try:
-                # 及时删除临时文件，避免堆积
-                _os.remove(npy_path)
-            except Exception:
-                pass
+                runner, load_sec = model_cache.get(model_name, model_path, config_path)
+            except Exception as e:
+                print(e)
+                for job_id, timing in zip(job_ids, timings):
+                    _put(job_id, [{"ret_code": -1, "ret_msg": f"load model error: {e}", "result": [["ERR", "0.0"]]}], timing)
+                continue
+            start = _time.perf_counter()
             try:
-                ret_str = run_peak_detection(
-                    signals=[segments],
-                    file_names=["current"],
-                    fs=[sampling_rate],
-                    config_path=config_path,
-                )
-                ret = _json.loads(ret_str)
+                batch = _np.stack([segments for _, _, segments, _ in group])
+                rets = runner.predict_batch(batch, sampling_rate, ["current"] * len(group))
             except Exception as e:
                 print(e)
-                ret = {"ret_code": -1, "ret_msg": f"predict error: {e}", "result": [[ "ERR", "0.0"]]}
-            results.append(ret)
-        except Exception as e:
-            results = [{"ret_code": -1, "ret_msg": f"worker error: {e}", "result": []}]
-        try:
-            result_queue.put({"job_id": job_id, "results": results})
-        except Exception:
-            # 主进程可能已退出
-            pass
\ No newline at end of file
+                rets = [{"ret_code": -1, "ret_msg": f"predict error: {e}", "result": [["ERR", "0.0"]]}] * len(group)
+            predict_ms = (_time.perf_counter() - start) * 1e3
+            for idx, (job_id, timing, ret) in enumerate(zip(job_ids, timings, rets)):
+                # 加载耗时只计入本批第一个任务
+                timing.update({"load_ms": load_sec * 1e3 if idx == 0 else 0.0, "predict_ms": predict_ms, "batch_size": len(group)})
+                _put(job_id, [ret], timing)
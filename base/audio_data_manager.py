@@ -4,7 +4,9 @@ import time
 
 from scipy.io import wavfile
 
+from base.audio_thumbnail import save_thumbnail_from_array
 from base.database.db_manager import DataManage
+from base.database.fixed_time_ng_total import ensure_warning_epoch_schema
 from base.get_mac_address import get_mac_address
 from base.log_manager import LogManager
 from consts import db_consts
@@ -28,15 +30,22 @@ def save_audio_data(record_audio_data:np.float16, sameple_rate, file_name, targe
         wavfile.write(file_name, sameple_rate, deta)
     except Exception as e:
         logger.error(f"save_audio_data failed: {e}")
+        return
+    # 同时生成预览缩略图，详情弹窗/历史表格无需解码整个文件
+    save_thumbnail_from_array(file_name, record_audio_data.T, sameple_rate)
 
 
 def add_record_audio_data_to_db(
     record_id: str, file_path: str, record_time: str, stop_time: str, operator: str = None, description: str = None
 ):
-    columns = db_consts.DB_AUDIO_COLUMNS.copy()
+    columns = db_consts.DB_AUDIO_COLUMNS + list(db_consts.RECORD_EPOCH_COLUMNS.values())
     data = [record_id, file_path, record_time, stop_time, operator, description]
+    data.extend(
+        DataManage.parse_time_to_epoch(time_str, db_consts.CN_TIME_FORMAT) for time_str in (record_time, stop_time)
+    )
 
     with DataManage(db_consts.DATABASE_PATH) as db:
+        _ensure_record_schema(db)
         code, msg = db.insert_data_into_db("record_audio_data_table", columns, [data])
         if code == 0:
             logger.info("add_record_audio_data_to_db success")
@@ -66,6 +75,68 @@ def get_warning_audio_data_from_db():
             return None
 
 
+def _ensure_record_schema(db: DataManage):
+    db.ensure_epoch_columns("record_audio_data_table", db_consts.RECORD_EPOCH_COLUMNS, db_consts.CN_TIME_FORMAT)
+    db.ensure_fts_index("record_audio_data_table", db_consts.RECORD_SEARCH_COLUMNS)
+
+
+def _ensure_warning_schema(db: DataManage):
+    ensure_warning_epoch_schema(db)
+    db.ensure_fts_index("warning_audio_data_table", db_consts.WARNING_SEARCH_COLUMNS)
+
+
+def get_record_audio_data_page(limit: int, before_rowid=None, filters: dict = None):
+    """
+    按最新在前分页查询 record_audio_data_table，每行为 (rowid, *AUDIO_COLUMNS)。
+    filters 支持：start_epoch / end_epoch（按录制时间）、keyword（全文检索备注与文件路径）。
+    """
+    filters = filters or {}
+    with DataManage(db_consts.DATABASE_PATH) as db:
+        _ensure_record_schema(db)
+        code, result = db.query_filtered_page(
+            "record_audio_data_table",
+            db_consts.AUDIO_COLUMNS,
+            limit,
+            before_rowid,
+            ranges={"record_epoch": (filters.get("start_epoch"), filters.get("end_epoch"))},
+            search=(db_consts.RECORD_SEARCH_COLUMNS, filters.get("keyword")),
+        )
+        if code == 0:
+            return result
+        logger.error("get_record_audio_data_page failed")
+        return None
+
+
+def get_warning_audio_data_page(limit: int, before_rowid=None, filters: dict = None):
+    """
+    按最新在前分页查询 warning_audio_data_table，每行为 (rowid, *WARNING_COLUMNS)。
+    filters 支持：start_epoch / end_epoch（按警告时间）、channel、deal_status、warning_level、
+    keyword（全文检索备注与文件名称）。
+    """
+    filters = filters or {}
+    equals = {key: filters[key] for key in ("deal_status", "warning_level") if filters.get(key)}
+    likes = {}
+    if filters.get("channel") not in (None, ""):
+        # 告警文件名格式：YYYYMMDDHHMMSS-通道.wav
+        likes["file_name"] = f"%-{filters['channel']}.wav"
+    with DataManage(db_consts.DATABASE_PATH) as db:
+        _ensure_warning_schema(db)
+        code, result = db.query_filtered_page(
+            "warning_audio_data_table",
+            db_consts.WARNING_COLUMNS,
+            limit,
+            before_rowid,
+            equals=equals,
+            ranges={"warning_epoch": (filters.get("start_epoch"), filters.get("end_epoch"))},
+            likes=likes,
+            search=(db_consts.WARNING_SEARCH_COLUMNS, filters.get("keyword")),
+        )
+        if code == 0:
+            return result
+        logger.error("get_warning_audio_data_page failed")
+        return None
+
+
 def update_warning_audio_data(update_data: dict, condition_field: dict):
     """
     更新 warning_audio_data_table 中的数据。
@@ -0,0 +1,525 @@
+"""
+采集/分析流水线模块（纯 Python，不依赖 Qt）
+
+将原先分散在 MainWindowMode / MainWindowController 中的流水线串联起来：
+- 采集：AudioDataManager 在声卡回调中写入各通道环形缓冲；每次 start() 时加载麦克风校准结果，各通道按增益校正
+- 历史：调度线程定时 flush()，把环形缓冲的新数据追加到历史数组（audio_data）
+- 提取：AudioSegmentExtractor 每隔 analysis_interval 秒截取最近 segment_duration 秒
+- 分析：片段写入临时 npy 后投递给独立的分析进程（analysis_worker），结果由监听线程收回
+
+界面或无界面控制器只需：
+    pipeline = AudioPipeline()
+    pipeline.set_device(device_name, channels, selected_channels)
+    pipeline.configure_analysis(True, config_path, extract_interval=3.5, segment_duration=4.0)
+    pipeline.add_listener("results", on_results)
+    pipeline.start()
+    ...
+    pipeline.stop()
+    pipeline.shutdown()
+
+回调在流水线内部线程中触发，界面需自行切换到主线程（如通过 Qt 信号）：
+- "flushed"(pipeline)           每次历史数组刷新后
+- "job_submitted"(job_id)       片段投递到分析进程后
+- "results"(job_id, results)    收到分析结果时
+- "started"() / "stopped"()     录音开始/停止后
+"""
+
+import os
+import tempfile
+import threading
+import time
+import multiprocessing as mp
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from base.analysis_worker_process import analysis_worker
+from base.data_struct.audio_segment_extractor import AudioSegmentExtractor
+from base.data_struct.data_deal_struct import DataDealStruct
+from base.log_manager import LogManager
+from base.mic_calibration import load_channel_gains
+from base.record_audio import AudioDataManager
+from base.sound_device_manager import sd
+from consts import error_code
+
+
+class AudioPipeline:
+    EVENTS = ("flushed", "job_submitted", "results", "started", "stopped")
+
+    # 保留最近分析结果的条数，供状态查询
+    RECENT_RESULTS_SIZE = 500
+
+    def __init__(
+        self,
+        sampling_rate: int = 44100,
+        history_sec: int = 600,
+        ring_buffer_sec: int = 30,
+        flush_interval_sec: float = 0.1,
+        temp_dir: Optional[str] = None,
+    ):
+        self.logger = LogManager.set_log_handler("core")
+        self.data_struct = DataDealStruct()
+
+        self.sampling_rate = int(sampling_rate)
+        self.max_points = int(history_sec * self.sampling_rate)
+        self.buffer_len = int(ring_buffer_sec * self.sampling_rate)
+        self.flush_interval_sec = float(flush_interval_sec)
+
+        self.select_device_name = None
+        self.channels = None
+        self.selected_channels: List[int] = list()
+        self.channel_index: List[int] = []
+        self.storage_filled_len: List[int] = []
+
+        self.ctx = sd._CallbackContext()
+        self.audio_manager = AudioDataManager()
+        self.segment_extractor: Optional[AudioSegmentExtractor] = None
+        self.config_path = None
+
+        self._listeners: Dict[str, List[Callable]] = {event: [] for event in self.EVENTS}
+        self._state_lock = threading.RLock()
+
+        # 调度线程：按各任务的间隔执行周期任务（默认仅 flush）
+        self._periodic_tasks: List[list] = []
+        self._scheduler_stop = threading.Event()
+        self._scheduler_thread: Optional[threading.Thread] = None
+        self.add_periodic_task(self.flush_interval_sec, self._flush_and_notify)
+
+        # 分析进程（独立的锁：提取器线程投递任务时不与录音启停互相等待）
+        self._analysis_lock = threading.RLock()
+        self._analysis_ctx = None
+        self._analysis_job_q = None
+        self._analysis_res_q = None
+        self._analysis_proc = None
+        self._analysis_running = False
+        self._analysis_listener_thread = None
+        self._temp_dir = temp_dir or os.path.join(tempfile.gettempdir(), "audio_segments_tmp")
+        os.makedirs(self._temp_dir, exist_ok=True)
+
+        self._results_lock = threading.Lock()
+        self._recent_results = deque(maxlen=self.RECENT_RESULTS_SIZE)
+        self.jobs_submitted = 0
+        self.jobs_completed = 0
+        self.model_name = "knock_peak_detector"
+        self.model_path = ""
+        # 分析进程回传的最近一次耗时与累计统计（加载与预测分开）
+        self.last_analysis_timing: Dict[str, float] = {}
+        self.analysis_timing_totals = {"load_ms": 0.0, "predict_ms": 0.0, "loads": 0}
+
+    # ---------------- 回调 ---------------- #
+
+    def add_listener(self, event: str, callback: Callable):
+        if event not in self._listeners:
+            raise ValueError(f"未知事件: {event}")
+        self._listeners[event].append(callback)
+
+    def remove_listener(self, event: str, callback: Callable):
+        if callback in self._listeners.get(event, []):
+            self._listeners[event].remove(callback)
+
+    def _notify(self, event: str, *args):
+        for callback in list(self._listeners[event]):
+            try:
+                callback(*args)
+            except Exception as exc:
+                self.logger.error(f"流水线回调 {event} 执行失败: {exc}")
+
+    # ---------------- 配置 ---------------- #
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.data_struct.record_flag)
+
+    def set_device(self, device_name, channels: int, selected_channels: List[int]):
+        """切换采集设备与通道，录音中不可切换。"""
+        with self._state_lock:
+            if self.is_running:
+                raise RuntimeError("录音中不能切换采集设备")
+            self.select_device_name = device_name
+            self.channels = channels
+            self.selected_channels = list(selected_channels)
+            self.reset_buffers()
+
+    def reset_buffers(self):
+        num_channels = len(self.selected_channels)
+        self.data_struct.audio_data = np.zeros((num_channels, self.max_points), dtype=np.float16)
+        self.data_struct.audio_data_arr = [np.zeros(self.buffer_len, dtype=np.float16) for _ in range(num_channels)]
+        self.data_struct.write_index = [0] * num_channels
+        self.channel_index = [0] * num_channels
+        self.storage_filled_len = [0] * num_channels
+
+    def configure_analysis(
+        self,
+        use_ai: bool,
+        config_path: Optional[str] = None,
+        extract_interval: float = 3.5,
+        segment_duration: float = 4.0,
+        model_name: str = "knock_peak_detector",
+        model_path: str = "",
+    ):
+        """
+        重建片段提取器并启动/停止分析进程；录音中调用时新提取器会立即接管。
+        model_name / model_path 随任务投递，分析进程按 base.model_registry 常驻加载对应模型。
+        """
+        with self._state_lock:
+            self.model_name = model_name or "knock_peak_detector"
+            self.model_path = model_path or ""
+            old_extractor = self.segment_extractor
+            if old_extractor is not None and old_extractor.is_running:
+                old_extractor.stop()
+            if use_ai and config_path:
+                self.config_path = config_path
+                self.segment_extractor = AudioSegmentExtractor(
+                    extract_interval=extract_interval,
+                    segment_duration=segment_duration,
+                    sampling_rate=self.sampling_rate,
+                )
+                self.segment_extractor.set_audio_source(
+                    self.data_struct.audio_data, write_index_ref=self.storage_filled_len
+                )
+                self.segment_extractor.set_on_extracted_callback(self._submit_segments)
+                self.data_struct.segment_extractor = self.segment_extractor
+                self.start_analysis()
+                if self.is_running:
+                    self.segment_extractor.start()
+            else:
+                self.config_path = None
+                self.segment_extractor = None
+                self.data_struct.segment_extractor = None
+                self.stop_analysis()
+
+    def add_periodic_task(self, interval_sec: float, func: Callable):
+        """注册周期任务，由调度线程在录音期间按间隔调用。"""
+        self._periodic_tasks.append([max(0.001, float(interval_sec)), func, 0.0])
+
+    # ---------------- 生命周期 ---------------- #
+
+    def start(self) -> Tuple[int, str]:
+        with self._state_lock:
+            if self.is_running:
+                return error_code.INVALID_RECORD, "已在录音中"
+            if not self.selected_channels:
+                return error_code.INVALID_RECORD, "未配置采集通道"
+            self.data_struct.record_flag = True
+            if self.segment_extractor:
+                # reset_buffers() 会创建新的数组，需重新设置提取器的音频源引用
+                self.segment_extractor.set_audio_source(
+                    self.data_struct.audio_data, write_index_ref=self.storage_filled_len
+                )
+                if not self.segment_extractor.is_running:
+                    self.segment_extractor.start()
+
+            gains = load_channel_gains(self.selected_channels)
+            self.audio_manager.set_channel_gains(gains)
+            if self.audio_manager.channel_gains is not None:
+                self.logger.info(f"采集通道 {self.selected_channels} 校准增益: {np.round(gains, 4).tolist()}")
+            self.audio_manager.start_recording(self.ctx, self.selected_channels, self.sampling_rate, self.channels)
+            stream = getattr(self.ctx, "stream", None)
+            if stream is None or not stream.active:
+                self._stop_locked()
+                return error_code.INVALID_RECORD, "启动音频采集失败"
+
+            self._start_scheduler()
+        self._notify("started")
+        return error_code.OK, "录音已开始"
+
+    def stop(self) -> Tuple[int, str]:
+        with self._state_lock:
+            if not self.is_running:
+                return error_code.INVALID_RECORD, "当前未在录音"
+            self._stop_locked()
+        self._notify("stopped")
+        return error_code.OK, "录音已停止"
+
+    def _stop_locked(self):
+        self.data_struct.record_flag = False
+        self._stop_scheduler()
+        if self.segment_extractor and self.segment_extractor.is_running:
+            self.segment_extractor.stop()
+        try:
+            self.audio_manager.stop_recording()
+        except Exception as exc:
+            # 采集流未成功创建时 ctx 上没有 stream
+            self.logger.error(f"停止音频采集失败: {exc}")
+        self.reset_buffers()
+
+    def shutdown(self):
+        if self.is_running:
+            self.stop()
+        self.stop_analysis()
+
+    def _start_scheduler(self):
+        if self._scheduler_thread is not None:
+            return
+        self._scheduler_stop.clear()
+        for task in self._periodic_tasks:
+            task[2] = 0.0
+        self._scheduler_thread = threading.Thread(target=self._scheduler_loop, name="pipeline-scheduler", daemon=True)
+        self._scheduler_thread.start()
+
+    def _stop_scheduler(self):
+        self._scheduler_stop.set()
+        if self._scheduler_thread is not None and self._scheduler_thread is not threading.current_thread():
+            self._scheduler_thread.join(timeout=2)
+        self._scheduler_thread = None
+
+    def _scheduler_loop(self):
+        while not self._scheduler_stop.is_set():
+            now = time.monotonic()
+            next_due = now + 1.0
+            for task in self._periodic_tasks:
+                interval, func, due = task
+                if due <= now:
+                    try:
+                        func()
+                    except Exception as exc:
+                        self.logger.error(f"流水线周期任务执行失败: {exc}")
+                    task[2] = now + interval
+                next_due = min(next_due, task[2])
+            self._scheduler_stop.wait(max(0.0, next_due - time.monotonic()))
+
+    # ---------------- 历史数组 ---------------- #
+
+    def _flush_and_notify(self):
+        self.flush()
+        self._notify("flushed", self)
+
+    def flush(self):
+        """把环形缓冲中自上次以来的新数据追加到历史数组（满后整体左移）。"""
+        num_channels = len(self.selected_channels)
+        if num_channels == 0:
+            return
+        while True:
+            e1 = getattr(self.data_struct, "epoch", 0)
+            if e1 % 2 == 1:
+                continue
+            new_write_indices = [None] * num_channels
+            restart_needed = False
+            for i in range(num_channels):
+                if e1 != getattr(self.data_struct, "epoch", 0):
+                    restart_needed = True
+                    break
+                write_idx_snapshot = int(self.data_struct.write_index[i])
+                new_write_indices[i] = write_idx_snapshot
+            if restart_needed:
+                continue
+            staged_segments = [None] * num_channels
+            staged_write_indices = [None] * num_channels
+            for i in range(num_channels):
+                ring_buffer = self.data_struct.audio_data_arr[i]
+                rb_len = int(len(ring_buffer))
+                if rb_len <= 0:
+                    staged_segments[i] = None
+                    staged_write_indices[i] = new_write_indices[i]
+                    continue
+                write_idx_norm = int(new_write_indices[i]) % rb_len
+                prev_idx = int(self.channel_index[i])
+                prev_idx_norm = prev_idx % rb_len
+                if write_idx_norm == prev_idx_norm:
+                    seg = np.array([], dtype=ring_buffer.dtype)
+                elif write_idx_norm > prev_idx_norm:
+                    seg = ring_buffer[prev_idx_norm:write_idx_norm]
+                else:
+                    seg = np.concatenate([
+                        ring_buffer[prev_idx_norm:],
+                        ring_buffer[:write_idx_norm]
+                    ])
+                staged_segments[i] = seg
+                staged_write_indices[i] = new_write_indices[i]
+            e2 = getattr(self.data_struct, "epoch", 0)
+            if e1 != e2 or (e2 % 2 == 1):
+                continue
+            for i in range(num_channels):
+                seg = staged_segments[i]
+                if seg is None or seg.size == 0:
+                    if staged_write_indices[i] is not None:
+                        self.channel_index[i] = int(staged_write_indices[i])
+                    continue
+                storage_array = self.data_struct.audio_data[i]
+                store_len = int(len(storage_array))
+                if store_len <= 0:
+                    if staged_write_indices[i] is not None:
+                        self.channel_index[i] = int(staged_write_indices[i])
+                    continue
+                filled = int(self.storage_filled_len[i])
+                free = max(0, store_len - filled)
+                if free > 0:
+                    take = min(free, seg.size)
+                    storage_array[filled:filled + take] = seg[:take]
+                    filled += take
+                    remaining = seg[take:]
+                else:
+                    remaining = seg
+                if remaining.size > 0:
+                    m = int(remaining.size)
+                    if m >= store_len:
+                        storage_array[:] = remaining[-store_len:]
+                        filled = store_len
+                    else:
+                        storage_array[:-m] = storage_array[m:]
+                        storage_array[-m:] = remaining
+                        filled = store_len
+                self.storage_filled_len[i] = min(store_len, filled)
+                if staged_write_indices[i] is not None:
+                    self.channel_index[i] = int(staged_write_indices[i])
+            break
+
+    # ---------------- 分析进程 ---------------- #
+
+    def start_analysis(self):
+        with self._analysis_lock:
+            if self._analysis_proc is not None and self._analysis_proc.is_alive():
+                self._analysis_running = True
+                if self._analysis_listener_thread is None:
+                    self._start_analysis_listener()
+                return
+            try:
+                self._analysis_ctx = mp.get_context("spawn")
+                self._analysis_job_q = self._analysis_ctx.Queue()
+                self._analysis_res_q = self._analysis_ctx.Queue()
+                self._analysis_proc = self._analysis_ctx.Process(
+                    target=analysis_worker,
+                    args=(self._analysis_job_q, self._analysis_res_q),
+                    daemon=True,
+                )
+                self._analysis_proc.start()
+                self._analysis_running = True
+                self._start_analysis_listener()
+            except Exception as exc:
+                self.logger.error(f"启动分析进程失败: {exc}")
+
+    def stop_analysis(self):
+        with self._analysis_lock:
+            self._analysis_running = False
+            try:
+                if self._analysis_job_q is not None:
+                    try:
+                        self._analysis_job_q.put(None)
+                    except Exception:
+                        pass
+                if self._analysis_proc is not None:
+                    self._analysis_proc.join(timeout=5)
+                    if self._analysis_proc.is_alive():
+                        self._analysis_proc.terminate()
+            except Exception:
+                pass
+            finally:
+                for q in (self._analysis_job_q, self._analysis_res_q):
+                    try:
+                        if q is not None:
+                            q.close()
+                            q.join_thread()
+                    except Exception:
+                        pass
+                if self._analysis_listener_thread is not None:
+                    self._analysis_listener_thread.join(timeout=1)
+                self._analysis_proc = None
+                self._analysis_job_q = None
+                self._analysis_res_q = None
+                self._analysis_listener_thread = None
+
+    @property
+    def is_analysis_alive(self) -> bool:
+        return self._analysis_proc is not None and self._analysis_proc.is_alive()
+
+    def _submit_segments(self, segments: np.ndarray, sampling_rate: int):
+        """片段提取器回调：写入临时 npy 并投递给分析进程。"""
+        if segments is None or not self.config_path:
+            return
+        self.start_analysis()
+        job_q = self._analysis_job_q
+        if job_q is None:
+            return
+        job_id = time.strftime("%Y-%m-%d-%H-%M-%S", time.localtime())
+        npy_path = os.path.join(self._temp_dir, f"{job_id}.npy")
+        try:
+            np.save(npy_path, segments)
+            job_q.put(
+                {
+                    "job_id": job_id,
+                    "npy_path": npy_path,
+                    "sampling_rate": sampling_rate,
+                    "model_name": self.model_name,
+                    "model_path": self.model_path,
+                    "config_path": self.config_path,
+                }
+            )
+            self.jobs_submitted += 1
+        except Exception as exc:
+            self.logger.error(f"enqueue analysis job failed: {exc}")
+            return
+        self._notify("job_submitted", job_id)
+
+    def _start_analysis_listener(self):
+        if self._analysis_listener_thread is not None:
+            return
+        res_q = self._analysis_res_q
+
+        def _listen():
+            while self._analysis_running:
+                try:
+                    msg = res_q.get(timeout=0.5)
+                except Exception:
+                    continue
+                if not msg:
+                    continue
+                self.jobs_completed += 1
+                timing = msg.get("timing") or {}
+                if timing:
+                    self._record_analysis_timing(timing)
+                results = msg.get("results", [])
+                if results:
+                    with self._results_lock:
+                        self._recent_results.append(
+                            {"job_id": msg.get("job_id"), "timestamp": time.time(), "results": results, "timing": timing}
+                        )
+                    self._notify("results", msg.get("job_id"), results)
+
+        self._analysis_listener_thread = threading.Thread(target=_listen, name="pipeline-analysis-listener", daemon=True)
+        self._analysis_listener_thread.start()
+
+    def _record_analysis_timing(self, timing: Dict):
+        with self._results_lock:
+            self.last_analysis_timing = dict(timing)
+            # 微批处理时 predict_ms 为整批耗时，每个任务只计入其均摊部分
+            batch_size = max(1, int(timing.get("batch_size", 1)))
+            self.analysis_timing_totals["predict_ms"] += float(timing.get("predict_ms", 0.0)) / batch_size
+            load_ms = float(timing.get("load_ms", 0.0))
+            if load_ms > 0:
+                self.analysis_timing_totals["load_ms"] += load_ms
+                self.analysis_timing_totals["loads"] += 1
+                self.logger.info(f"分析模型 {timing.get('model_name')} 加载耗时 {load_ms:.1f} ms")
+
+    # ---------------- 状态 ---------------- #
+
+    def get_recent_results(self, n: int = 20) -> list:
+        with self._results_lock:
+            if n <= 0:
+                return []
+            return list(self._recent_results)[-n:]
+
+    def analysis_timing(self) -> Dict:
+        """最近一次与累计的模型加载/预测耗时（毫秒）"""
+        with self._results_lock:
+            totals = dict(self.analysis_timing_totals)
+            completed = max(1, self.jobs_completed)
+            return {
+                "last": dict(self.last_analysis_timing),
+                "loads": totals["loads"],
+                "load_ms_total": totals["load_ms"],
+                "predict_ms_avg": totals["predict_ms"] / completed,
+            }
+
+    def queue_depths(self) -> Dict[str, Optional[int]]:
+        depths = {"analysis_jobs": 0, "analysis_results": 0}
+        for name, q in (("analysis_jobs", self._analysis_job_q), ("analysis_results", self._analysis_res_q)):
+            if q is None:
+                continue
+            try:
+                depths[name] = q.qsize()
+            except NotImplementedError:
+                # macOS 下 multiprocessing.Queue 不支持 qsize
+                depths[name] = None
+        depths["analysis_pending"] = max(0, self.jobs_submitted - self.jobs_completed)
+        return depths
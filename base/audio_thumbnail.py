@@ -0,0 +1,176 @@
+"""
+录音缩略图（波形包络 + 频谱图）缓存模块
+
+为每个录音生成低分辨率预览并保存为旁路文件 "<录音路径>.thumb.npz"：
+- envelope:     (通道数, 2, 列数) float16，每列对应一段采样的最小值/最大值
+- spectrogram:  (频带数, 时间列数) uint8，各通道平均后的幅度谱（相对最大值 80 dB 动态范围）
+- 以及采样率、帧数、通道数与源文件 mtime/大小，源文件变化后缓存自动失效
+
+录音保存时（save_audio_data）直接由内存数据生成；没有缓存的旧文件在首次预览时通过内存映射分块生成。
+详情弹窗与历史表格只读取缓存即可立即显示，完整音频延迟到播放时才打开。
+
+使用示例：
+    thumb = load_thumbnail(path)              # 缺失或过期时自动生成，失败返回 None
+    thumb["envelope"], thumb["duration"]
+"""
+
+import os
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from base.log_manager import LogManager
+from base.wav_reader import MappedWavReader
+
+logger = LogManager.set_log_handler("core")
+
+THUMBNAIL_SUFFIX = ".thumb.npz"
+THUMBNAIL_VERSION = 1
+ENVELOPE_COLUMNS = 512
+SPECTROGRAM_COLUMNS = 256
+SPECTROGRAM_BANDS = 64
+SPECTROGRAM_NFFT = 1024
+SPECTROGRAM_RANGE_DB = 80.0
+# 分块计算包络时每块读取的最大采样点数
+_CHUNK_SAMPLES = 1 << 21
+
+
+def thumbnail_path(audio_path: str) -> str:
+    return audio_path + THUMBNAIL_SUFFIX
+
+
+def compute_thumbnail(read: Callable[[int, int], np.ndarray], n_frames: int, channels: int,
+                      sample_rate: int) -> Dict[str, np.ndarray]:
+    """
+    由按区间读取函数 read(start, frames) -> (n, channels) float32 计算缩略图数据。
+    """
+    n_frames = int(n_frames)
+    frames_per_column = max(1, -(-n_frames // ENVELOPE_COLUMNS))
+    columns = -(-n_frames // frames_per_column) if n_frames else 0
+    envelope = np.zeros((channels, 2, columns), dtype=np.float16)
+
+    # 包络：每次读取若干整列，转为通道优先的连续内存后按最内轴求 min/max（跨步归约慢数倍）
+    group = max(1, _CHUNK_SAMPLES // (frames_per_column * max(1, channels)))
+    for first in range(0, columns, group):
+        last = min(columns, first + group)
+        block = read(first * frames_per_column, (last - first) * frames_per_column)
+        full = block.shape[0] // frames_per_column
+        if full:
+            cols = np.ascontiguousarray(block[: full * frames_per_column].T).reshape(channels, full, frames_per_column)
+            envelope[:, 0, first:first + full] = cols.min(axis=2)
+            envelope[:, 1, first:first + full] = cols.max(axis=2)
+        if first + full < last and block.shape[0] > full * frames_per_column:
+            tail = block[full * frames_per_column:]
+            envelope[:, 0, first + full] = tail.min(axis=0)
+            envelope[:, 1, first + full] = tail.max(axis=0)
+
+    # 频谱：在均匀分布的时间点各取一帧做 FFT，再把频点合并为频带
+    spectrogram = np.zeros((SPECTROGRAM_BANDS, 0), dtype=np.uint8)
+    if n_frames:
+        starts = np.linspace(0, max(0, n_frames - SPECTROGRAM_NFFT), SPECTROGRAM_COLUMNS).astype(np.int64)
+        frames = np.zeros((SPECTROGRAM_COLUMNS, SPECTROGRAM_NFFT), dtype=np.float32)
+        for i, start in enumerate(starts):
+            block = read(int(start), SPECTROGRAM_NFFT)
+            frames[i, : block.shape[0]] = block.mean(axis=1)
+        magnitude = np.abs(np.fft.rfft(frames * np.hanning(SPECTROGRAM_NFFT).astype(np.float32), axis=1))
+        edges = np.linspace(0, magnitude.shape[1], SPECTROGRAM_BANDS + 1).astype(np.int64)[:-1]
+        bands = np.add.reduceat(magnitude, edges, axis=1) / np.diff(np.append(edges, magnitude.shape[1]))
+        db = 20.0 * np.log10(bands + 1e-12)
+        db = np.clip(db - db.max() + SPECTROGRAM_RANGE_DB, 0.0, SPECTROGRAM_RANGE_DB)
+        # 低频在下：频带方向翻转，图像行 0 为最高频
+        spectrogram = (db.T[::-1] * (255.0 / SPECTROGRAM_RANGE_DB)).astype(np.uint8)
+
+    return {
+        "envelope": envelope,
+        "spectrogram": spectrogram,
+        "sample_rate": np.asarray(int(sample_rate), dtype=np.int64),
+        "n_frames": np.asarray(n_frames, dtype=np.int64),
+        "channels": np.asarray(int(channels), dtype=np.int64),
+    }
+
+
+def save_thumbnail(audio_path: str, thumbnail: Dict[str, np.ndarray]) -> Optional[str]:
+    """写入旁路缓存文件，记录源文件 mtime/大小用于失效判断；失败返回 None"""
+    try:
+        stat = os.stat(audio_path)
+        path = thumbnail_path(audio_path)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.asarray(THUMBNAIL_VERSION, dtype=np.int64),
+            source_mtime_ns=np.asarray(stat.st_mtime_ns, dtype=np.int64),
+            source_size=np.asarray(stat.st_size, dtype=np.int64),
+            **thumbnail,
+        )
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        logger.error(f"保存缩略图失败 {audio_path}: {e}")
+        return None
+
+
+def save_thumbnail_from_array(audio_path: str, audio_data: np.ndarray, sample_rate: int) -> Optional[str]:
+    """
+    录音保存后由内存数据直接生成缓存。
+    audio_data: (frames, channels) 或 (frames,) 的浮点数组，幅度范围 [-1, 1)
+    """
+    data = np.asarray(audio_data)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+
+    def read(start, frames):
+        return np.asarray(data[start:start + frames], dtype=np.float32)
+
+    return save_thumbnail(audio_path, compute_thumbnail(read, data.shape[0], data.shape[1], sample_rate))
+
+
+def build_thumbnail(audio_path: str) -> Optional[str]:
+    """通过内存映射分块读取已有 WAV 文件生成缓存"""
+    try:
+        with MappedWavReader(audio_path) as reader:
+            thumbnail = compute_thumbnail(reader.read, reader.n_frames, reader.channels, reader.sample_rate)
+    except Exception as e:
+        logger.error(f"生成缩略图失败 {audio_path}: {e}")
+        return None
+    return save_thumbnail(audio_path, thumbnail)
+
+
+def load_thumbnail(audio_path: str, create: bool = True) -> Optional[Dict]:
+    """
+    读取缩略图缓存，返回 {"envelope", "spectrogram", "sample_rate", "n_frames", "channels", "duration"}。
+    缓存缺失或与源文件不一致时，create=True 则重新生成，否则返回 None。
+    """
+    if not audio_path or not os.path.exists(audio_path):
+        return None
+    path = thumbnail_path(audio_path)
+    thumbnail = _read_thumbnail(audio_path, path)
+    if thumbnail is None and create and build_thumbnail(audio_path):
+        thumbnail = _read_thumbnail(audio_path, path)
+    return thumbnail
+
+
+def _read_thumbnail(audio_path: str, path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        stat = os.stat(audio_path)
+        with np.load(path) as npz:
+            if (
+                int(npz["version"]) != THUMBNAIL_VERSION
+                or int(npz["source_mtime_ns"]) != stat.st_mtime_ns
+                or int(npz["source_size"]) != stat.st_size
+            ):
+                return None
+            sample_rate = int(npz["sample_rate"])
+            n_frames = int(npz["n_frames"])
+            return {
+                "envelope": npz["envelope"],
+                "spectrogram": npz["spectrogram"],
+                "sample_rate": sample_rate,
+                "n_frames": n_frames,
+                "channels": int(npz["channels"]),
+                "duration": n_frames / sample_rate if sample_rate else 0.0,
+            }
+    except Exception as e:
+        logger.warning(f"读取缩略图失败 {path}: {e}")
+        return None
@@ -0,0 +1,443 @@
+"""
+离线批量重分析模块
+
+用新的检测阈值/配置对历史录音（默认 STORED_RECORDED_PATH 下的 *.wav）重新执行 run_peak_detection：
+- 每个 WAV 以内存映射方式读取（scipy.io.wavfile mmap），不整体解码进内存
+- 分窗方式与 AudioSegmentExtractor 一致：第 k 次提取（k >= 1）截取 [k*interval - duration, k*interval) 秒，
+  录音开头不足 duration 的部分前置补零，数据按 float16 送入检测（与实时分析相同）
+- 文件分发到进程池并行分析，每个文件的结果写入独立的 NPZ 分片（列式），全部完成后合并为 results.npz
+  （--format parquet 时合并为 results.parquet，需安装 pyarrow）
+- 断点续跑：分片中记录源文件 mtime/大小与配置哈希，三者一致的文件直接跳过
+- 可选 --db：把结果写入 batch_analysis_result_table（按 配置哈希+文件+窗口+通道 幂等覆盖）
+
+用法：
+    python -m base.batch_reanalysis --output D:/reanalysis/run1 --zscore-threshold 5.0 --workers 8
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy.io import wavfile
+
+from base.log_manager import LogManager
+from consts import db_consts, error_code
+from consts.running_consts import PEAK_DETECTION_CONFIG_JSON
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except Exception:
+    pyarrow = None
+
+logger = LogManager.set_log_handler("core")
+
+# 每行 = 一个窗口的一个通道
+RESULT_COLUMNS = [
+    "file_path",
+    "window_index",
+    "start_sec",
+    "end_sec",
+    "channel",
+    "motor_state",
+    "is_running",
+    "is_knocked",
+    "energy_level",
+    "max_flux",
+    "max_zscore",
+    "health_score",
+    "zscore_threshold",
+    "energy_threshold",
+]
+FLOAT_COLUMNS = ("start_sec", "end_sec", "energy_level", "max_flux", "max_zscore", "zscore_threshold", "energy_threshold")
+SEPARATED_SUFFIXES = ("_source1", "_source2")
+
+
+def iter_window_bounds(n_frames: int, sampling_rate: int, extract_interval: float,
+                       segment_duration: float) -> Iterator[Tuple[int, int, int]]:
+    """
+    按 AudioSegmentExtractor 的节奏生成 (窗口序号, 起始帧, 结束帧)；起始帧可能为负，表示需前置补零。
+    录音开始时的第 0 次提取为全零片段，不产生窗口。
+    """
+    segment_samples = int(segment_duration * sampling_rate)
+    k = 1
+    while True:
+        end = int(round(k * extract_interval * sampling_rate))
+        if end > n_frames or end <= 0:
+            break
+        yield k, end - segment_samples, end
+        k += 1
+
+
+def _to_float(block: np.ndarray) -> np.ndarray:
+    # 与 save_audio_data 的写入比例对应
+    if block.dtype == np.int16:
+        return block.astype(np.float32) / 32768.0
+    if block.dtype == np.int32:
+        return block.astype(np.float32) / 2147483648.0
+    if block.dtype == np.uint8:
+        return (block.astype(np.float32) - 128.0) / 128.0
+    return block.astype(np.float32, copy=False)
+
+
+def _read_wav(path: str) -> Tuple[int, np.ndarray]:
+    """返回 (采样率, 形状为 (帧数, 通道数) 的数组)，尽量使用内存映射。"""
+    try:
+        sampling_rate, data = wavfile.read(path, mmap=True)
+    except ValueError:
+        # 24 bit 等格式不支持 mmap
+        sampling_rate, data = wavfile.read(path)
+    if data.ndim == 1:
+        data = data[:, None]
+    return int(sampling_rate), data
+
+
+def analyze_wav_file(path: str, config_path: str, extract_interval: float, segment_duration: float) -> Dict:
+    """
+    在工作进程中分析单个 WAV 文件，返回 {"columns": {列名: 列表}, "windows": n, "audio_sec": s, "errors": [...]}。
+    """
+    from base.peak_detection_runner import run_peak_detection
+
+    sampling_rate, data = _read_wav(path)
+    n_frames, n_channels = data.shape
+    segment_samples = int(segment_duration * sampling_rate)
+    segment = np.zeros((n_channels, segment_samples), dtype=np.float16)
+    file_name = os.path.basename(path)
+
+    columns = {name: [] for name in RESULT_COLUMNS}
+    errors = []
+    windows = 0
+    for window_index, start, end in iter_window_bounds(n_frames, sampling_rate, extract_interval, segment_duration):
+        lo = max(0, start)
+        segment[:] = 0
+        segment[:, segment_samples - (end - lo):] = _to_float(np.asarray(data[lo:end])).T
+        ret = json.loads(run_peak_detection(signals=[segment], file_names=[file_name], fs=[sampling_rate],
+                                            config_path=config_path))
+        if ret.get("ret_code") != error_code.OK:
+            errors.append(f"窗口 {window_index}: {ret.get('ret_msg')}")
+            continue
+        windows += 1
+        health_scores = ret.get("health_scores") or {}
+        for row in ret.get("result") or []:
+            detail = json.loads(row[1])
+            channel = str(detail.get("channel"))
+            health_score = health_scores.get(channel)
+            columns["file_path"].append(path)
+            columns["window_index"].append(window_index)
+            columns["start_sec"].append(start / sampling_rate)
+            columns["end_sec"].append(end / sampling_rate)
+            columns["channel"].append(channel)
+            columns["motor_state"].append(str(detail.get("motor_state")))
+            columns["is_running"].append(bool(detail.get("is_running")))
+            columns["is_knocked"].append(bool(detail.get("is_knocked")))
+            columns["energy_level"].append(float(detail.get("energy_level") or 0.0))
+            columns["max_flux"].append(float(detail.get("max_flux") or 0.0))
+            columns["max_zscore"].append(float(detail.get("max_zscore") or 0.0))
+            columns["health_score"].append(
+                float(health_score) if isinstance(health_score, (int, float)) else np.nan
+            )
+            columns["zscore_threshold"].append(float(detail.get("zscore_threshold") or np.nan))
+            columns["energy_threshold"].append(float(detail.get("energy_threshold") or np.nan))
+    del data
+    return {"columns": columns, "windows": windows, "audio_sec": n_frames / sampling_rate, "errors": errors}
+
+
+def _columns_to_arrays(columns: Dict[str, list]) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for name in RESULT_COLUMNS:
+        values = columns.get(name, [])
+        if name in ("file_path", "channel", "motor_state"):
+            arrays[name] = np.asarray(values, dtype=str)
+        elif name == "window_index":
+            arrays[name] = np.asarray(values, dtype=np.int32)
+        elif name in ("is_running", "is_knocked"):
+            arrays[name] = np.asarray(values, dtype=bool)
+        elif name == "health_score":
+            arrays[name] = np.asarray(values, dtype=np.float32)
+        else:
+            arrays[name] = np.asarray(values, dtype=np.float64)
+    return arrays
+
+
+class BatchReanalyzer:
+    def __init__(
+        self,
+        input_paths: List[str],
+        output_dir: str,
+        *,
+        config_path: Optional[str] = None,
+        config_overrides: Optional[Dict] = None,
+        extract_interval: float = 3.5,
+        segment_duration: float = 4.0,
+        workers: Optional[int] = None,
+        include_separated: bool = False,
+        write_db: bool = False,
+        output_format: str = "npz",
+    ):
+        self.input_paths = list(input_paths)
+        self.output_dir = os.path.abspath(output_dir)
+        self.shard_dir = os.path.join(self.output_dir, "shards")
+        self.extract_interval = float(extract_interval)
+        self.segment_duration = float(segment_duration)
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.include_separated = include_separated
+        self.write_db = write_db
+        self.output_format = output_format
+        if output_format not in ("npz", "parquet"):
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        if output_format == "parquet" and pyarrow is None:
+            raise ValueError("parquet 输出需要安装 pyarrow")
+
+        with open(config_path or os.path.normpath(PEAK_DETECTION_CONFIG_JSON), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self._apply_overrides(config_overrides or {})
+        # 实际使用的配置落盘到输出目录，工作进程按路径加载，也便于事后追溯
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.config_path = os.path.join(self.output_dir, "config.json")
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            json.dump(self.config, f, ensure_ascii=False, indent=2)
+        self.config_hash = hashlib.sha1(
+            json.dumps(
+                {"config": self.config, "interval": self.extract_interval, "duration": self.segment_duration},
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _apply_overrides(self, overrides: Dict):
+        # 覆盖默认阈值与各通道阈值
+        defaults = self.config.setdefault("defaults", {})
+        for key in ("zscore_threshold", "energy_threshold"):
+            if overrides.get(key) is None:
+                continue
+            defaults[key] = float(overrides[key])
+            for item in self.config.get("channels") or []:
+                if isinstance(item, dict):
+                    item[key] = float(overrides[key])
+
+    def discover_files(self) -> List[str]:
+        files = []
+        for path in self.input_paths:
+            if os.path.isdir(path):
+                files.extend(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True))
+            elif os.path.isfile(path):
+                files.append(path)
+        files = sorted({os.path.abspath(p) for p in files})
+        if not self.include_separated:
+            files = [p for p in files if not os.path.splitext(p)[0].endswith(SEPARATED_SUFFIXES)]
+        return files
+
+    def shard_path(self, path: str) -> str:
+        digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.shard_dir, f"{stem}_{digest}.npz")
+
+    def _is_done(self, path: str) -> bool:
+        shard = self.shard_path(path)
+        if not os.path.exists(shard):
+            return False
+        try:
+            stat = os.stat(path)
+            with np.load(shard) as npz:
+                return (
+                    str(npz["config_hash"]) == self.config_hash
+                    and int(npz["source_mtime_ns"]) == stat.st_mtime_ns
+                    and int(npz["source_size"]) == stat.st_size
+                )
+        except Exception:
+            return False
+
+    def _write_shard(self, path: str, result: Dict):
+        stat = os.stat(path)
+        shard = self.shard_path(path)
+        tmp_path = shard + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            config_hash=np.asarray(self.config_hash),
+            source_mtime_ns=np.asarray(stat.st_mtime_ns, dtype=np.int64),
+            source_size=np.asarray(stat.st_size, dtype=np.int64),
+            audio_sec=np.asarray(result["audio_sec"], dtype=np.float64),
+            **_columns_to_arrays(result["columns"]),
+        )
+        # 写完再改名，中断时不会留下半个分片
+        os.replace(tmp_path, shard)
+
+    def _insert_db(self, result: Dict):
+        from base.database.db_manager import DataManage
+
+        columns = result["columns"]
+        rows = []
+        now = int(time.time())
+        for i in range(len(columns["file_path"])):
+            health_score = columns["health_score"][i]
+            rows.append(
+                (
+                    self.config_hash,
+                    columns["file_path"][i],
+                    columns["window_index"][i],
+                    columns["start_sec"][i],
+                    columns["end_sec"][i],
+                    columns["channel"][i],
+                    columns["motor_state"][i],
+                    int(columns["is_running"][i]),
+                    int(columns["is_knocked"][i]),
+                    columns["energy_level"][i],
+                    columns["max_flux"][i],
+                    columns["max_zscore"][i],
+                    None if np.isnan(health_score) else health_score,
+                    now,
+                )
+            )
+        with DataManage(db_consts.DATABASE_PATH) as db:
+            code, msg = db.ensure_table(
+                db_consts.BATCH_RESULT_TABLE, db_consts.BATCH_RESULT_COLUMNS, db_consts.BATCH_RESULT_KEY_COLUMNS
+            )
+            if code != error_code.OK:
+                return code, msg
+            return db.insert_data_into_db(
+                db_consts.BATCH_RESULT_TABLE, list(db_consts.BATCH_RESULT_COLUMNS), rows, or_replace=True
+            )
+
+    def run(self, progress=print) -> Tuple[int, Dict]:
+        files = self.discover_files()
+        pending = [p for p in files if not self._is_done(p)]
+        skipped = len(files) - len(pending)
+        progress(f"共 {len(files)} 个文件，已完成 {skipped} 个，待分析 {len(pending)} 个，进程数 {self.workers}")
+
+        stats = {"files": 0, "failed": 0, "windows": 0, "audio_sec": 0.0, "skipped": skipped}
+        start = time.perf_counter()
+        if pending:
+            # 与实时分析进程相同，使用 spawn 启动工作进程
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                     initializer=_init_worker) as pool:
+                futures = {
+                    pool.submit(analyze_wav_file, path, self.config_path, self.extract_interval,
+                                self.segment_duration): path
+                    for path in pending
+                }
+                try:
+                    for future in as_completed(futures):
+                        path = futures[future]
+                        try:
+                            result = future.result()
+                            self._write_shard(path, result)
+                            if self.write_db:
+                                code, msg = self._insert_db(result)
+                                if code != error_code.OK:
+                                    logger.error(f"批量结果写库失败 {path}: {msg}")
+                            for err in result["errors"]:
+                                logger.warning(f"{path} {err}")
+                            stats["files"] += 1
+                            stats["windows"] += result["windows"]
+                            stats["audio_sec"] += result["audio_sec"]
+                        except Exception as e:
+                            stats["failed"] += 1
+                            logger.error(f"分析失败 {path}: {e}")
+                            progress(f"分析失败 {path}: {e}")
+                            continue
+                        elapsed = max(1e-9, time.perf_counter() - start)
+                        done = stats["files"] + stats["failed"]
+                        progress(
+                            f"[{done}/{len(pending)}] {os.path.basename(path)} {result['windows']} 窗口 | "
+                            f"{stats['windows'] / elapsed:.1f} 窗口/s，{stats['audio_sec'] / elapsed:.1f}x 实时，"
+                            f"预计剩余 {elapsed / done * (len(pending) - done):.0f} s"
+                        )
+                except KeyboardInterrupt:
+                    progress("已中断，已完成的文件下次运行时会跳过")
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        stats["elapsed_sec"] = time.perf_counter() - start
+        merged_path = self.merge(files)
+        stats["output"] = merged_path
+        progress(
+            f"完成：分析 {stats['files']} 个文件（失败 {stats['failed']}，跳过 {skipped}），"
+            f"{stats['windows']} 个窗口，音频 {stats['audio_sec'] / 3600:.2f} h，耗时 {stats['elapsed_sec']:.1f} s，"
+            f"结果 {merged_path}"
+        )
+        code = error_code.OK if stats["failed"] == 0 else error_code.INVALID_PROCESS
+        return code, stats
+
+    def merge(self, files: List[str]) -> str:
+        """把本次输入对应的全部分片合并为一个列式结果文件。"""
+        merged = {name: [] for name in RESULT_COLUMNS}
+        for path in files:
+            shard = self.shard_path(path)
+            if not self._is_done(path):
+                continue
+            with np.load(shard) as npz:
+                for name in RESULT_COLUMNS:
+                    merged[name].append(npz[name])
+        arrays = {
+            name: np.concatenate(parts) if parts else _columns_to_arrays({})[name]
+            for name, parts in merged.items()
+        }
+        if self.output_format == "parquet":
+            output_path = os.path.join(self.output_dir, "results.parquet")
+            table = pyarrow.table({name: arrays[name] for name in RESULT_COLUMNS})
+            pyarrow.parquet.write_table(table, output_path)
+        else:
+            output_path = os.path.join(self.output_dir, "results.npz")
+            np.savez(output_path, config_hash=np.asarray(self.config_hash), **arrays)
+        return output_path
+
+
+def _init_worker():
+    # 工作进程内限制底层线程数，由进程池提供并行度
+    for key in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(key, "1")
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="用新的检测配置批量重分析历史录音")
+    p.add_argument("inputs", nargs="*", default=[db_consts.STORED_RECORDED_PATH],
+                   help="WAV 文件或目录（递归查找 *.wav），默认 STORED_RECORDED_PATH")
+    p.add_argument("--output", required=True, help="输出目录（分片、合并结果与实际使用的配置）")
+    p.add_argument("--config", default=None, help="检测配置 JSON，默认 peak_detection_config.json")
+    p.add_argument("--zscore-threshold", type=float, default=None, help="覆盖所有通道的 zscore 阈值")
+    p.add_argument("--energy-threshold", type=float, default=None, help="覆盖所有通道的能量阈值")
+    p.add_argument("--interval", type=float, default=3.5, help="提取间隔（秒），与实时分析的 analysis_interval 一致")
+    p.add_argument("--duration", type=float, default=4.0, help="片段时长（秒），与实时分析的 time 一致")
+    p.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    p.add_argument("--format", choices=("npz", "parquet"), default="npz", help="合并结果的格式")
+    p.add_argument("--db", action="store_true", help="同时写入 batch_analysis_result_table")
+    p.add_argument("--include-separated", action="store_true", help="同时分析 *_source1/_source2 分离文件")
+    return p
+
+
+def main(argv=None) -> int:
+    args = _build_arg_parser().parse_args(argv)
+    try:
+        reanalyzer = BatchReanalyzer(
+            args.inputs,
+            args.output,
+            config_path=args.config,
+            config_overrides={"zscore_threshold": args.zscore_threshold, "energy_threshold": args.energy_threshold},
+            extract_interval=args.interval,
+            segment_duration=args.duration,
+            workers=args.workers,
+            include_separated=args.include_separated,
+            write_db=args.db,
+            output_format=args.format,
+        )
+        code, _ = reanalyzer.run()
+        return 0 if code == error_code.OK else 1
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        logger.error(f"批量重分析失败: {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import os
 import sqlite3
+import time
 import uuid
 import wave
 
@@ -9,6 +10,11 @@ from consts import db_consts, error_code
 
 
 class DataManage(object):
+    # 已完成 epoch 列迁移的 (数据库路径, 表名)，避免每次连接重复检查
+    _migrated_tables = set()
+    # 建立 FTS 索引失败（如 SQLite 不支持 FTS5 / trigram）的 (数据库路径, FTS 表名)，之后直接使用 LIKE 检索
+    _fts_unavailable = set()
+
     def __init__(self, db_name):
         self.db_name = db_name
         self.connection = None
@@ -76,6 +82,40 @@ class DataManage(object):
                 result.extend(row for row in fet_result)
         return result
 
+    def query_matching_data_batched(
+        self, data_list, table_name, check_column, select_column, logical_operator="AND"
+    ):
+        """
+        query_matching_data 的批量版本：将全部查询键写入临时表，通过一次 JOIN 取回结果。
+        结果顺序与逐条查询一致（按 data_list 顺序，重复的键重复返回，同一键的多行按 rowid 排列）。
+        """
+        if logical_operator not in ["AND", "OR"]:
+            raise ValueError("logical_operator must be 'AND' or 'OR'.")
+        if not data_list:
+            return []
+        key_columns = [f"_match_key_{i}" for i in range(len(check_column))]
+        join_sql = f" {logical_operator} ".join(
+            [f"{table_name}.{column} = _match_keys.{key}" for column, key in zip(check_column, key_columns)]
+        )
+        try:
+            self.cursor.execute("DROP TABLE IF EXISTS temp._match_keys")
+            self.cursor.execute(f"CREATE TEMP TABLE _match_keys (_match_seq INTEGER, {', '.join(key_columns)})")
+            placeholders = ", ".join(["?"] * (len(key_columns) + 1))
+            self.cursor.executemany(
+                f"INSERT INTO _match_keys VALUES ({placeholders})",
+                ((seq,) + tuple(data_item) for seq, data_item in enumerate(data_list)),
+            )
+            sql_select = (
+                f"SELECT {', '.join(select_column)} FROM _match_keys "
+                f"JOIN {table_name} ON {join_sql} ORDER BY _match_keys._match_seq, {table_name}.rowid"
+            )
+            self.cursor.execute(sql_select)
+            return self.cursor.fetchall()
+        finally:
+            self.cursor.execute("DROP TABLE IF EXISTS temp._match_keys")
+            # 结束写入临时表时隐式开启的事务，避免占用连接上的事务
+            self.connection.commit()
+
     def get_audio_data_stimulus_info(self, file_path):
         audio_stimulus_data = ()
         if file_path:
@@ -126,14 +166,15 @@ class DataManage(object):
             duration = frames / float(rate)
         return int(duration)
 
-    def insert_data_into_db(self, table_name, columns: list, data):
+    def insert_data_into_db(self, table_name, columns: list, data, or_replace=False):
         try:
             if len(data) == 0:
                 self.logger.info("data empty.")
                 return error_code.OK, "data empty."
             values_num = ",".join(["?"] * len(data[0]))
             columns = ", ".join(columns)
-            sql = f"INSERT INTO {table_name} ({columns}) VALUES ({values_num});"
+            insert_sql = "INSERT OR REPLACE" if or_replace else "INSERT"
+            sql = f"{insert_sql} INTO {table_name} ({columns}) VALUES ({values_num});"
             self.cursor.executemany(sql, data)
             self.connection.commit()
             self.logger.info("Insert data successfully.")
@@ -206,6 +247,211 @@ class DataManage(object):
             self.logger.error(err_msg)
             return error_code.INVALID_QUERY, err_msg
 
+    def query_page(self, table_name, query_column, limit, before_rowid=None):
+        """
+        按 rowid 倒序（最新在前）分页查询，基于 rowid 的键集分页，不使用 OFFSET。
+        返回的每行首列为 rowid，作为下一页的 before_rowid。
+        """
+        return self.query_filtered_page(table_name, query_column, limit, before_rowid)
+
+    def query_filtered_page(
+        self,
+        table_name,
+        query_column,
+        limit,
+        before_rowid=None,
+        equals: dict = None,
+        ranges: dict = None,
+        likes: dict = None,
+        search=None,
+    ):
+        """
+        带服务端过滤的键集分页查询（最新在前），每行首列为 rowid。
+        equals: {列: 值}，列 = ?
+        ranges: {列: (起, 止)}，任一端为 None 表示不限
+        likes:  {列: LIKE 模式}
+        search: (列列表, 关键字)，已建立 FTS5 索引且关键字不少于 3 个字符时走全文索引，否则退化为 LIKE
+        """
+        try:
+            where_clause_parts = []
+            sql_data = []
+            for key, value in (equals or {}).items():
+                where_clause_parts.append(f"{key} = ?")
+                sql_data.append(value)
+            for key, (start_value, end_value) in (ranges or {}).items():
+                if start_value is not None:
+                    where_clause_parts.append(f"{key} >= ?")
+                    sql_data.append(start_value)
+                if end_value is not None:
+                    where_clause_parts.append(f"{key} <= ?")
+                    sql_data.append(end_value)
+            for key, pattern in (likes or {}).items():
+                where_clause_parts.append(f"{key} LIKE ?")
+                sql_data.append(pattern)
+            if search:
+                search_columns, keyword = search
+                search_clause, search_data = self._build_search_clause(table_name, search_columns, keyword)
+                if search_clause:
+                    where_clause_parts.append(search_clause)
+                    sql_data.extend(search_data)
+            if before_rowid is not None:
+                where_clause_parts.append("rowid < ?")
+                sql_data.append(int(before_rowid))
+
+            sql_query = f"SELECT rowid, {', '.join(query_column)} FROM {table_name}"
+            if where_clause_parts:
+                sql_query += " WHERE " + " AND ".join(where_clause_parts)
+            sql_query += " ORDER BY rowid DESC LIMIT ?"
+            sql_data.append(int(limit))
+            self.cursor.execute(sql_query, sql_data)
+            return error_code.OK, self.cursor.fetchall()
+        except Exception as e:
+            err_msg = "Failed to query page from the table. %s" % (str(e)[:40])
+            self.logger.error(err_msg)
+            return error_code.INVALID_QUERY, err_msg
+
+    def _build_search_clause(self, table_name, search_columns, keyword):
+        keyword = (keyword or "").strip()
+        if not keyword:
+            return "", []
+        fts_table = f"{table_name}_fts"
+        if (os.path.abspath(self.db_name), fts_table) in DataManage._migrated_tables and len(keyword) >= 3:
+            # trigram 分词支持任意位置子串匹配；整体作为短语，双引号需转义
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            return f"rowid IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)", [phrase]
+        like_clause = " OR ".join([f"{column} LIKE ?" for column in search_columns])
+        return f"({like_clause})", [f"%{keyword}%"] * len(search_columns)
+
+    def ensure_table(self, table_name, column_defs: dict, unique_columns: list = None):
+        """
+        按 {列名: 列定义} 创建表（已存在时跳过），unique_columns 用于建立唯一索引，
+        配合 insert_data_into_db(..., or_replace=True) 实现幂等写入。
+        """
+        try:
+            column_sql = ", ".join([f"{col} {col_def}" for col, col_def in column_defs.items()])
+            self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({column_sql})")
+            if unique_columns:
+                self.cursor.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_unique ON {table_name} "
+                    f"({', '.join(unique_columns)})"
+                )
+            self.connection.commit()
+            return error_code.OK, "Table ensured."
+        except Exception as e:
+            err_msg = "Failed to ensure table. %s" % (str(e)[:40])
+            self.logger.error(err_msg)
+            return error_code.INVALID_CREATE_TABLE, err_msg
+
+    def ensure_fts_index(self, table_name, columns: list):
+        """
+        为 table_name 的文本列建立外部内容 FTS5 索引（{table_name}_fts，trigram 分词），
+        并用触发器保持同步；首次创建时对历史数据执行 rebuild。
+        同一进程内每个 (数据库, 表) 只执行一次；失败时记录下来，之后不再重试，检索回退为 LIKE。
+        """
+        fts_table = f"{table_name}_fts"
+        migrate_key = (os.path.abspath(self.db_name), fts_table)
+        if migrate_key in DataManage._migrated_tables:
+            return error_code.OK, "FTS index already ensured."
+        if migrate_key in DataManage._fts_unavailable:
+            return error_code.INVALID_CREATE_TABLE, "FTS index unavailable, using LIKE search."
+        try:
+            self.cursor.execute("SELECT name FROM sqlite_master WHERE name = ?", (fts_table,))
+            if self.cursor.fetchone() is None:
+                column_sql = ", ".join(columns)
+                new_values = ", ".join([f"new.{col}" for col in columns])
+                old_values = ", ".join([f"old.{col}" for col in columns])
+                self.cursor.execute(
+                    f"CREATE VIRTUAL TABLE {fts_table} USING fts5({column_sql}, "
+                    f"content='{table_name}', tokenize='trigram')"
+                )
+                self.cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table_name} BEGIN "
+                    f"INSERT INTO {fts_table}(rowid, {column_sql}) VALUES (new.rowid, {new_values}); END"
+                )
+                self.cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table_name} BEGIN "
+                    f"INSERT INTO {fts_table}({fts_table}, rowid, {column_sql}) "
+                    f"VALUES ('delete', old.rowid, {old_values}); END"
+                )
+                self.cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_sql} ON {table_name} BEGIN "
+                    f"INSERT INTO {fts_table}({fts_table}, rowid, {column_sql}) "
+                    f"VALUES ('delete', old.rowid, {old_values}); "
+                    f"INSERT INTO {fts_table}(rowid, {column_sql}) VALUES (new.rowid, {new_values}); END"
+                )
+                self.cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+                self.connection.commit()
+                self.logger.info(f"FTS index {fts_table} created.")
+            DataManage._migrated_tables.add(migrate_key)
+            return error_code.OK, "FTS index ensured."
+        except Exception as e:
+            self.connection.rollback()
+            DataManage._fts_unavailable.add(migrate_key)
+            err_msg = "Failed to ensure FTS index, fall back to LIKE search. %s" % (str(e)[:40])
+            self.logger.error(err_msg)
+            return error_code.INVALID_CREATE_TABLE, err_msg
+
+    def ensure_epoch_columns(self, table_name, epoch_columns: dict, time_format):
+        """
+        为文本时间列补充整数 epoch 列及索引，并回填历史数据。
+        epoch_columns: {文本时间列: epoch 列}，例如 {"warning_time": "warning_epoch"}
+        同一进程内每个 (数据库, 表) 只执行一次。
+        """
+        migrate_key = (os.path.abspath(self.db_name), table_name)
+        if migrate_key in DataManage._migrated_tables:
+            return error_code.OK, "Epoch columns already ensured."
+        try:
+            self.cursor.execute(f"PRAGMA table_info({table_name})")
+            existing_columns = {row[1] for row in self.cursor.fetchall()}
+            if not existing_columns:
+                return error_code.INVALID_QUERY, f"Table {table_name} does not exist."
+            for epoch_column in epoch_columns.values():
+                if epoch_column not in existing_columns:
+                    self.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {epoch_column} INTEGER")
+                self.cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{epoch_column} ON {table_name} ({epoch_column})"
+                )
+
+            text_columns = list(epoch_columns.keys())
+            null_clause = " OR ".join([f"{epoch_columns[col]} IS NULL" for col in text_columns])
+            self.cursor.execute(f"SELECT rowid, {', '.join(text_columns)} FROM {table_name} WHERE {null_clause}")
+            backfill_data = []
+            for row in self.cursor.fetchall():
+                epochs = [self.parse_time_to_epoch(value, time_format) for value in row[1:]]
+                backfill_data.append(tuple(epochs) + (row[0],))
+            if backfill_data:
+                set_clause = ", ".join([f"{epoch_columns[col]} = ?" for col in text_columns])
+                self.cursor.executemany(f"UPDATE {table_name} SET {set_clause} WHERE rowid = ?", backfill_data)
+            self.connection.commit()
+            DataManage._migrated_tables.add(migrate_key)
+            self.logger.info(f"Epoch columns ensured for {table_name}, backfilled {len(backfill_data)} rows.")
+            return error_code.OK, "Epoch columns ensured."
+        except Exception as e:
+            err_msg = "Failed to ensure epoch columns. %s" % (str(e)[:40])
+            self.logger.error(err_msg)
+            return error_code.INVALID_UPDATE, err_msg
+
+    @staticmethod
+    def parse_time_to_epoch(time_str, time_format):
+        try:
+            return int(time.mktime(time.strptime(time_str, time_format)))
+        except (TypeError, ValueError):
+            return None
+
+    def query_between(self, table_name, query_column, range_column, start_value, end_value, order_by=None):
+        try:
+            sql_query = (
+                f"SELECT {', '.join(query_column)} FROM {table_name} WHERE {range_column} BETWEEN ? AND ?"
+            )
+            if order_by:
+                sql_query += f" ORDER BY {order_by}"
+            self.cursor.execute(sql_query, (start_value, end_value))
+            return error_code.OK, self.cursor.fetchall()
+        except Exception as e:
+            err_msg = "Failed to query data in range. %s" % (str(e)[:40])
+            self.logger.error(err_msg)
+            return error_code.INVALID_QUERY, err_msg
+
     def delete_all(self, table_name):
         try:
             sql_delete = f"DELETE FROM {table_name}"
@@ -1,11 +1,12 @@
 import time
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from base.database.db_manager import DataManage
 from consts import db_consts, error_code
 
 
-CN_TIME_FMT = "%Y年%m月%d日 %H时%M分%S秒"
+CN_TIME_FMT = db_consts.CN_TIME_FORMAT
+WARNING_TABLE = "warning_audio_data_table"
 
 
 def _parse_cn_time_to_epoch(time_str: str) -> int:
@@ -15,6 +16,52 @@ def _parse_cn_time_to_epoch(time_str: str) -> int:
     return int(time.mktime(time.strptime(time_str, CN_TIME_FMT)))
 
 
+def ensure_warning_epoch_schema(db: DataManage) -> Tuple[int, str]:
+    """
+    确保 warning_audio_data_table 具备 warning_epoch/record_epoch/stop_epoch 整数列及索引，
+    旧数据库首次调用时自动迁移并回填。
+    """
+    return db.ensure_epoch_columns(WARNING_TABLE, db_consts.WARNING_EPOCH_COLUMNS, CN_TIME_FMT)
+
+
+def warning_epoch_values(row: Dict[str, Any]) -> List[Optional[int]]:
+    """
+    按 WARNING_EPOCH_COLUMNS 的顺序计算一条告警记录对应的 epoch 列取值，解析失败为 None。
+    """
+    return [
+        DataManage.parse_time_to_epoch(row.get(time_field), CN_TIME_FMT)
+        for time_field in db_consts.WARNING_EPOCH_COLUMNS
+    ]
+
+
+def query_warning_epochs_between(
+    start_epoch: int,
+    end_epoch: int,
+    time_field: str = "warning_time",
+) -> Tuple[int, Any]:
+    """
+    查询 time_field 介于两个 epoch 秒之间的告警时间戳列表（升序），仅读取索引列。
+
+    返回:
+        (code, [epoch, ...]) 或 (错误码, 错误信息字符串)
+    """
+    epoch_field = db_consts.WARNING_EPOCH_COLUMNS.get(time_field)
+    if epoch_field is None:
+        return error_code.INVALID_TYPE_DATA, f"不支持的时间字段: {time_field}"
+    if start_epoch > end_epoch:
+        start_epoch, end_epoch = end_epoch, start_epoch
+    with DataManage(db_consts.DATABASE_PATH) as db:
+        code, msg = ensure_warning_epoch_schema(db)
+        if code != error_code.OK:
+            return code, msg
+        code, rows = db.query_between(
+            WARNING_TABLE, [epoch_field], epoch_field, int(start_epoch), int(end_epoch), order_by=epoch_field
+        )
+        if code != error_code.OK:
+            return code, rows
+    return error_code.OK, [row[0] for row in rows]
+
+
 def query_warning_between(
     start_time_cn: str,
     end_time_cn: str,
@@ -30,7 +77,7 @@ def query_warning_between(
 
     返回:
         (code, result)
-        - code == 0 表示成功，result 为记录字典列表
+        - code == 0 表示成功，result 为按时间升序排列的记录字典列表
         - 否则返回 (错误码, 错误信息字符串)
     """
     try:
@@ -40,34 +87,23 @@ def query_warning_between(
             start_epoch, end_epoch = end_epoch, start_epoch
     except Exception as e:
         return error_code.INVALID_TYPE_DATA, f"时间解析失败: {e}"
+    epoch_field = db_consts.WARNING_EPOCH_COLUMNS.get(time_field)
+    if epoch_field is None:
+        return error_code.INVALID_TYPE_DATA, f"不支持的时间字段: {time_field}"
+
+    columns = db_consts.WARNING_COLUMNS
     with DataManage(db_consts.DATABASE_PATH) as db:
-        code, rows = db.query("warning_audio_data_table", db_consts.WARNING_COLUMNS)
+        code, msg = ensure_warning_epoch_schema(db)
+        if code != error_code.OK:
+            return code, msg
+        # 范围过滤与排序均由 epoch 列索引完成
+        code, rows = db.query_between(
+            WARNING_TABLE, columns, epoch_field, start_epoch, end_epoch, order_by=epoch_field
+        )
         if code != error_code.OK:
             return code, rows  # rows 为错误信息
-    columns = db_consts.WARNING_COLUMNS
-    col_index_map = {name: idx for idx, name in enumerate(columns)}
-    if time_field not in col_index_map:
-        return error_code.INVALID_TYPE_DATA, f"不支持的时间字段: {time_field}"
 
-    tf_idx = col_index_map[time_field]
-
-    def _row_to_dict(row_tuple) -> Dict[str, Any]:
-        return {col: row_tuple[i] for i, col in enumerate(columns)}
-
-    filtered: List[Dict[str, Any]] = []
-    for row in rows:
-        try:
-            time_str = row[tf_idx]
-            ts = _parse_cn_time_to_epoch(time_str)
-            if start_epoch <= ts <= end_epoch:
-                filtered.append(_row_to_dict(row))
-        except Exception:
-            # 跳过无法解析时间的记录
-            continue
-
-    # 按时间升序排序
-    filtered.sort(key=lambda r: r.get(time_field, ""))
-    return error_code.OK, filtered
+    return error_code.OK, [{col: row[i] for i, col in enumerate(columns)} for row in rows]
 
 
 if __name__ == "__main__":
@@ -109,6 +109,8 @@ class KnockDetector:
         self.frame_size = int(stft_cfg.get("frame_size") or 1024)
         self.hop_size = int(stft_cfg.get("hop_size") or self.frame_size // 2)
         self.window = get_window(self.window_name, self.frame_size, fftbins=True)
+        # 采样率 -> 带内 DFT 基矩阵（见 _band_dft_basis）
+        self._band_basis_cache: Dict[int, np.ndarray] = {}
 
         band = self.config.get("bandpass_hz") or [0, self.sampling_rate / 2]
         self.band_low = float(band[0]) if len(band) > 0 else 0.0
@@ -124,17 +126,67 @@ class KnockDetector:
     # ------------------------------------------------------------------ #
 
     def run(self, signals: np.ndarray, sampling_rate: Optional[int] = None) -> KnockDetectionResult:
-        sr = int(sampling_rate or self.sampling_rate)
         data = np.asarray(signals)
         if data.ndim == 1:
             data = data[None, :]
-        results: List[Dict[str, Any]] = []
-        for idx in range(data.shape[0]):
-            channel_name = self._resolve_channel_name(idx)
-            ch_signal = np.array(data[idx], copy=False)
-            ch_result = self._analyze_channel(ch_signal, sr, channel_name)
-            results.append(ch_result)
-        return KnockDetectionResult(channels=results)
+        return self.run_batch(data[None], sampling_rate)[0]
+
+    def run_batch(self, signals: np.ndarray, sampling_rate: Optional[int] = None) -> List[KnockDetectionResult]:
+        """
+        批量检测 (batch, channels, samples)：带内能量、flux、zscore 沿最后一维对整批向量化计算，
+        第 b 个结果与 run(signals[b]) 相同。
+        """
+        sr = int(sampling_rate or self.sampling_rate)
+        data = np.asarray(signals)
+        if data.ndim == 2:
+            data = data[None]
+        n_batch, n_channels, _ = data.shape
+        names = [self._resolve_channel_name(idx) for idx in range(n_channels)]
+        zscore_thresholds = [self._get_zscore_threshold(name) for name in names]
+        energy_thresholds = [self._get_energy_threshold(name) for name in names]
+        active = np.any(data, axis=-1)
+
+        band_energy = self._batch_band_energy(data, sr)
+        energy_levels = band_energy.mean(axis=-1)
+        flux = self._compute_flux(band_energy)
+        max_fluxes = flux.max(axis=-1)
+        max_zscores = self._max_zscore(flux)
+
+        batch_results = []
+        for b in range(n_batch):
+            results: List[Dict[str, Any]] = []
+            for idx, channel_name in enumerate(names):
+                zscore_threshold = zscore_thresholds[idx]
+                energy_threshold = energy_thresholds[idx]
+                if not active[b, idx]:
+                    energy_level = max_flux = max_zscore = 0.0
+                    is_running = is_knocked = False
+                    motor_state = MotorState.SLEEPING
+                else:
+                    energy_level = float(energy_levels[b, idx])
+                    max_flux = float(max_fluxes[b, idx])
+                    max_zscore = float(max_zscores[b, idx])
+                    is_running = energy_level >= energy_threshold
+                    is_knocked = max_zscore >= zscore_threshold
+                    if is_knocked:
+                        motor_state = MotorState.KNOCKED
+                    elif not is_running:
+                        motor_state = MotorState.SLEEPING
+                    else:
+                        motor_state = MotorState.RUNNING
+                results.append({
+                    "channel": channel_name,
+                    "energy_level": energy_level,
+                    "is_running": is_running,
+                    "max_flux": max_flux,
+                    "max_zscore": max_zscore,
+                    "is_knocked": is_knocked,
+                    "motor_state": motor_state,
+                    "zscore_threshold": zscore_threshold,
+                    "energy_threshold": energy_threshold,
+                })
+            batch_results.append(KnockDetectionResult(channels=results))
+        return batch_results
 
     # ------------------------------------------------------------------ #
 
@@ -149,94 +201,106 @@ class KnockDetector:
     def _get_energy_threshold(self, channel: str) -> float:
         return self.channel_energy_thresholds.get(channel, self.default_energy_threshold)
 
-    def _analyze_channel(self, signal: np.ndarray, sr: int, channel: str) -> Dict[str, Any]:
-        zscore_threshold = self._get_zscore_threshold(channel)
-        energy_threshold = self._get_energy_threshold(channel)
-        
-        if not np.any(signal):
-            return {
-                "channel": channel,
-                "energy_level": 0.0,
-                "is_running": False,
-                "max_flux": 0.0,
-                "max_zscore": 0.0,
-                "is_knocked": False,
-                "motor_state": MotorState.SLEEPING,
-                "zscore_threshold": zscore_threshold,
-                "energy_threshold": energy_threshold,
-            }
-        
-        freqs, _, Zxx = stft(
-            signal,
-            fs=sr,
-            window=self.window,
-            nperseg=self.frame_size,
-            noverlap=self.frame_size - self.hop_size,
-            boundary=None,
-        )
-        
-        band_energy = self._compute_band_energy(freqs, Zxx)
-        
-        # 计算平均能量级别（用于判断是否运行）
-        energy_level = float(np.mean(band_energy)) if band_energy.size else 0.0
-        is_running = energy_level >= energy_threshold
-        
-        # 计算 flux 和 zscore（用于判断是否被敲击）
-        flux = self._compute_flux(band_energy)
-        max_flux = float(flux.max()) if flux.size else 0.0
-        max_zscore = self._max_zscore(flux)
-        is_knocked = max_zscore >= zscore_threshold
-        
-        # 判断最终电机状态
-        if is_knocked:
-            motor_state = MotorState.KNOCKED
-        elif not is_running:
-            motor_state = MotorState.SLEEPING
-        else:
-            motor_state = MotorState.RUNNING
-        
-        return {
-            "channel": channel,
-            "energy_level": energy_level,
-            "is_running": is_running,
-            "max_flux": max_flux,
-            "max_zscore": max_zscore,
-            "is_knocked": is_knocked,
-            "motor_state": motor_state,
-            "zscore_threshold": zscore_threshold,
-            "energy_threshold": energy_threshold,
-        }
-
     # ------------------------------------------------------------------ #
 
+    def _batch_band_energy(self, data: np.ndarray, sr: int) -> np.ndarray:
+        """
+        (..., samples) -> (..., 帧数) 的带内能量，与 scipy.signal.stft(boundary=None, padded=True) 后
+        _compute_band_energy 的结果一致（float32 舍入内）。
+
+        只需要 bandpass_hz 内的少数频点，不做整帧 FFT：frame_size 为 hop_size 整数倍时，
+        把信号按 hop 切块，与“窗函数 x 带内 DFT 基”矩阵做一次矩阵乘法，再把相邻 frame_size / hop_size 块的
+        部分和错位相加得到每帧的带内复数谱。其他情况回退到 scipy.signal.stft。
+        """
+        n_samples = data.shape[-1]
+        if self.frame_size % self.hop_size or n_samples < self.frame_size:
+            freqs, _, Zxx = stft(
+                data,
+                fs=sr,
+                window=self.window,
+                nperseg=self.frame_size,
+                noverlap=self.frame_size - self.hop_size,
+                boundary=None,
+            )
+            return self._compute_band_energy(freqs, Zxx)
+
+        basis = self._band_dft_basis(sr)
+        hop, ratio = self.hop_size, self.frame_size // self.hop_size
+        width = basis.shape[1] // ratio
+        # 与 stft(padded=True) 一致：末尾补零到整数帧
+        n_frames = -(-(n_samples - self.frame_size) // hop) + 1
+        n_blocks = n_frames - 1 + ratio
+
+        rows = data.reshape(-1, n_samples)
+        energy = np.empty((rows.shape[0], n_frames), dtype=np.float32)
+        buf = np.zeros((n_blocks * hop,), dtype=np.float32)
+        # 逐行计算，部分和矩阵 (块数, ratio x 带内频点) 留在缓存内
+        for i, row in enumerate(rows):
+            buf[:n_samples] = row
+            partial = (buf.reshape(n_blocks, hop) @ basis).reshape(n_blocks, ratio, width)
+            spec = partial[0:n_frames, 0].copy()
+            for q in range(1, ratio):
+                spec += partial[q:q + n_frames, q]
+            energy[i] = np.einsum("ij,ij->i", spec, spec)
+        return energy.reshape(*data.shape[:-1], n_frames)
+
+    def _band_dft_basis(self, sr: int) -> np.ndarray:
+        """(hop_size, ratio x 2 x 带内频点数) 的 float32 矩阵：窗函数与带内 DFT 实部/虚部基，按 hop 分段排列"""
+        basis = self._band_basis_cache.get(sr)
+        if basis is None:
+            freqs = np.fft.rfftfreq(self.frame_size, d=1.0 / sr)
+            mask = (freqs >= self.band_low) & (freqs <= self.band_high)
+            if not np.any(mask):
+                mask = np.ones_like(freqs, dtype=bool)
+            bins = np.flatnonzero(mask)
+            angle = 2.0 * np.pi * np.outer(np.arange(self.frame_size), bins) / self.frame_size
+            # stft 默认 scaling='spectrum'：除以窗函数之和
+            weights = (self.window / self.window.sum())[:, None]
+            full = np.concatenate([np.cos(angle), -np.sin(angle)], axis=1) * weights
+            ratio = self.frame_size // self.hop_size
+            basis = (
+                full.reshape(ratio, self.hop_size, -1).transpose(1, 0, 2).reshape(self.hop_size, -1).astype(np.float32)
+            )
+            self._band_basis_cache[sr] = basis
+        return basis
+
+    # 以下辅助函数沿最后一维（时间帧）计算，前面的维度可以是 (batch, channels)
+
     def _compute_band_energy(self, freqs: np.ndarray, Zxx: np.ndarray) -> np.ndarray:
         if freqs.size == 0 or Zxx.size == 0:
-            return np.zeros(1, dtype=np.float32)
+            return np.zeros((*Zxx.shape[:-2], 1), dtype=np.float32)
         mask = (freqs >= self.band_low) & (freqs <= self.band_high)
         if not np.any(mask):
             mask = np.ones_like(freqs, dtype=bool)
-        band = Zxx[mask, :]
+        band = Zxx[..., mask, :]
         energy = np.abs(band) ** 2  # power
-        return energy.sum(axis=0)
+        return energy.sum(axis=-2)
 
     def _compute_flux(self, energy: np.ndarray) -> np.ndarray:
         if energy.size == 0:
-            return np.zeros(1, dtype=np.float32)
-        diff = np.diff(energy, prepend=energy[0])
+            return np.zeros((*energy.shape[:-1], 1), dtype=np.float32)
+        diff = np.diff(energy, axis=-1, prepend=energy[..., :1])
         if self.flux_method == "positive_diff":
             diff = np.maximum(diff, 0.0)
         elif self.flux_method == "abs_diff":
             diff = np.abs(diff)
         if self.flux_smooth > 1:
-            diff = uniform_filter1d(diff, size=self.flux_smooth, mode="nearest")
+            diff = uniform_filter1d(diff, size=self.flux_smooth, axis=-1, mode="nearest")
         return diff.astype(np.float32, copy=False)
 
-    def _max_zscore(self, flux: np.ndarray) -> float:
-        if flux.size == 0:
-            return 0.0
-        mean = float(np.mean(flux))
-        std = float(np.std(flux))
-        if std < self.std_min_threshold:
-            return 0.0
-        z = (flux - mean) / std
-        return float(np.max(z))
+    def _max_zscore(self, flux: np.ndarray):
+        """一维输入返回 float；多维输入返回沿最后一维的最大 zscore 数组"""
+        if flux.ndim == 1:
+            if flux.size == 0:
+                return 0.0
+            mean = float(np.mean(flux))
+            std = float(np.std(flux))
+            if std < self.std_min_threshold:
+                return 0.0
+            z = (flux - mean) / std
+            return float(np.max(z))
+        mean = flux.mean(axis=-1, keepdims=True)
+        std = flux.std(axis=-1, keepdims=True)
+        valid = std >= self.std_min_threshold
+        z = (flux - mean) / np.where(valid, std, 1.0)
+        return np.where(valid[..., 0], z.max(axis=-1), 0.0)
@@ -0,0 +1,93 @@
+"""
+麦克风通道校准结果的保存与加载
+
+校准结果沿用 mic_check_data.json 的格式（通道号为界面上的 1 基编号）：
+    {"channel-1_deviation_value": 0.936, "channel-3_deviation_value": -0.412, "Datetime": "2024-05-01"}
+偏差 = 标准声压 - 实测声压（dB）。采集时各通道乘以增益 10 ** (偏差 / 20)，使实测声压与标准声压一致；
+未校准或校准失败（偏差为 None / inf）的通道增益为 1。
+保存时合并到已有文件：只更新本次得到有效偏差的通道，其余通道保留原有结果，
+避免只校准部分通道或中途取消时把其他通道的增益重置为 1。
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from base.log_manager import LogManager
+from consts import error_code
+from consts.running_consts import MIC_CHECK_DATA_JSON
+
+logger = LogManager.set_log_handler("core")
+
+
+def deviation_key(channel_number: int) -> str:
+    return "channel-%s_deviation_value" % str(channel_number)
+
+
+def _is_valid_deviation(value) -> bool:
+    try:
+        return value is not None and math.isfinite(float(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def save_channel_deviations(deviations: Dict[int, Optional[float]], path: str = MIC_CHECK_DATA_JSON) -> Tuple[int, str]:
+    """
+    一次写入本次所有通道的偏差（{1 基通道号: 偏差 dB}），合并到已有文件；None / 非有限值的通道不写入。
+    没有任何有效偏差（如校准被取消）时不写文件。先写临时文件再替换，避免写到一半的文件。
+    """
+    valid = {int(channel): float(value) for channel, value in deviations.items() if _is_valid_deviation(value)}
+    if not valid:
+        return error_code.INVALID_CALIBRATION, "no valid deviation to save"
+    check_mic_result = _load_check_data(path)
+    check_mic_result.update({deviation_key(channel): value for channel, value in sorted(valid.items())})
+    check_mic_result["Datetime"] = datetime.now().strftime("%Y-%m-%d")
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "w") as file:
+            json.dump(check_mic_result, file)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"保存麦克风校准结果失败: {e}")
+        return error_code.INVALID_DATA_LOADING, f"save mic check data failed: {e}"
+    return error_code.OK, "mic check data saved"
+
+
+def _load_check_data(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as file:
+            check_mic_result = json.load(file)
+    except Exception as e:
+        logger.error(f"读取麦克风校准结果失败: {e}")
+        return {}
+    return check_mic_result if isinstance(check_mic_result, dict) else {}
+
+
+def load_channel_deviations(path: str = MIC_CHECK_DATA_JSON) -> Dict[int, float]:
+    """读取 {1 基通道号: 偏差 dB}，只返回有效（有限）的偏差"""
+    deviations = {}
+    for key, value in _load_check_data(path).items():
+        if not (key.startswith("channel-") and key.endswith("_deviation_value")):
+            continue
+        try:
+            channel = int(key[len("channel-"):-len("_deviation_value")])
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(value):
+            deviations[channel] = value
+    return deviations
+
+
+def load_channel_gains(selected_channels: List[int], path: str = MIC_CHECK_DATA_JSON) -> np.ndarray:
+    """selected_channels 为 0 基设备通道索引，返回与之对应的线性增益数组 (len(selected_channels),)"""
+    deviations = load_channel_deviations(path)
+    offsets = np.array([deviations.get(int(ch) + 1, 0.0) for ch in selected_channels], dtype=np.float64)
+    return np.power(10.0, offsets / 20.0).astype(np.float32)
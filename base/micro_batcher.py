@@ -0,0 +1,75 @@
+"""
+分析任务微批处理模块
+
+逐个任务调用检测器会重复付出每次调用的固定开销。MicroBatcher 放在分析进程的任务队列之后：
+- 阻塞等待第一个任务，随后取出队列中已积压的任务（最多 max_batch_size 个）；
+  max_wait_ms > 0 时还会再等待最多 max_wait_ms 毫秒收集后续任务
+- group_jobs() 按 (模型, 配置, 采样率, 片段形状) 分组，同组片段堆叠为 (batch, channels, samples)
+  一次交给 ModelRunner.predict_batch，结果再按 job_id 分发回各自任务
+默认 max_wait_ms=0：不额外等待，只在分析慢于投递、队列出现积压时合批，不增加单个任务的延迟。
+当前每个 AudioPipeline（每个工位进程）有各自的分析进程与任务队列，约每 extract_interval 秒投递一个任务，
+多工位之间并不共用队列；只有多个投递方共用同一个队列时，max_wait_ms > 0 才有意义。
+
+使用示例（analysis_worker 内部）：
+    batcher = MicroBatcher(job_queue, max_batch_size=8)
+    while True:
+        jobs = batcher.next_batch()
+        if jobs is None:
+            break
+        ...
+"""
+
+import queue
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class MicroBatcher:
+    def __init__(self, job_queue, max_batch_size: int = 8, max_wait_ms: float = 0.0):
+        """
+        参数:
+            job_queue: queue.Queue / multiprocessing.Queue，None 表示停止
+            max_batch_size: 每批最多任务数
+            max_wait_ms: 取到第一个任务后继续等待后续任务的最长时间，0 表示只取已积压的任务
+        """
+        self.job_queue = job_queue
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_sec = max(0.0, float(max_wait_ms)) / 1000.0
+        self._stopped = False
+
+    def next_batch(self) -> Optional[List[Dict]]:
+        """返回一批任务；收到停止标记（None）后先返回已收集的任务，之后返回 None"""
+        if self._stopped:
+            return None
+        first = self.job_queue.get()
+        if first is None:
+            self._stopped = True
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_sec
+        while len(batch) < self.max_batch_size:
+            # 先取积压的任务，不等待
+            try:
+                job = self.job_queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self.job_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if job is None:
+                self._stopped = True
+                break
+            batch.append(job)
+        return batch
+
+
+def group_jobs(items: List, key: Callable[[object], Hashable]) -> "OrderedDict[Hashable, List]":
+    """按 key 分组并保持到达顺序"""
+    groups: "OrderedDict[Hashable, List]" = OrderedDict()
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
@@ -0,0 +1,115 @@
+"""
+分析进程内的模型注册表与常驻模型缓存
+
+analysis_worker 按任务中的 model_name / model_path / config_path 从 ModelCache 取模型执行器（ModelRunner），
+首次使用或文件更新后才加载，之后常驻复用：
+- 缓存键为 (model_name, model_path, model_path 的 mtime, config_path, config_path 的 mtime)，
+  模型或配置文件被替换后自动重新加载；按 LRU 保留最近使用的 capacity 个
+- 一个任务的所有通道 (channels, samples) 组成一个批次，一次 predict 完成；
+  MicroBatcher 收集到的同类任务堆叠为 (batch, channels, samples) 交给 predict_batch，一次完成整批
+- get() 返回本次加载耗时，与 predict 耗时分开上报
+
+已注册的模型（model_name -> 执行器）：
+    knock_peak_detector  KnockDetector 峰值检测；config_path 为 peak_detection_config.json
+新模型继承 ModelRunner 实现 predict（可选 predict_batch），用 @register_model(name) 注册。
+结果须与 run_peak_detection 的结构相同（ret_code / ret_msg / result / health_scores），
+界面按 health_scores 判定报警与 NG 计数。
+"""
+
+import abc
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ModelRunner(abc.ABC):
+    model_name = ""
+
+    def __init__(self, model_path: str, config_path: str):
+        self.model_path = model_path
+        self.config_path = config_path
+
+    @abc.abstractmethod
+    def predict(self, segments: np.ndarray, sampling_rate: int, file_name: str = "current") -> Dict:
+        """segments 为 (channels, samples)，返回 run_peak_detection 结构的结果字典"""
+
+    def predict_batch(self, batch: np.ndarray, sampling_rate: int, file_names: List[str]) -> List[Dict]:
+        """batch 为 (batch, channels, samples)，返回每条片段的结果字典；默认逐条调用 predict"""
+        return [self.predict(segments, sampling_rate, name) for segments, name in zip(batch, file_names)]
+
+
+MODEL_RUNNERS: Dict[str, Callable[[str, str], ModelRunner]] = {}
+
+
+def register_model(name: str):
+    def decorator(cls):
+        cls.model_name = name
+        MODEL_RUNNERS[name] = cls
+        return cls
+    return decorator
+
+
+@register_model("knock_peak_detector")
+class PeakDetectorRunner(ModelRunner):
+    def __init__(self, model_path: str, config_path: str):
+        from base.peak_detection_runner import load_peak_detector
+
+        super().__init__(model_path, config_path)
+        self.detector = load_peak_detector(config_path)
+
+    def predict(self, segments, sampling_rate, file_name="current"):
+        from base.peak_detection_runner import detect_peaks
+
+        # KnockDetector.run 一次处理 (channels, samples) 的所有通道
+        return detect_peaks(self.detector, [segments], [file_name], [sampling_rate])
+
+    def predict_batch(self, batch, sampling_rate, file_names):
+        from base.peak_detection_runner import detect_peaks_batch
+
+        return detect_peaks_batch(self.detector, batch, file_names, sampling_rate)
+
+
+def _mtime_ns(path: Optional[str]) -> int:
+    try:
+        return os.stat(path).st_mtime_ns if path else 0
+    except OSError:
+        return 0
+
+
+class ModelCache:
+    def __init__(self, capacity: int = 2):
+        self.capacity = max(1, int(capacity))
+        self._runners: "OrderedDict[Tuple, ModelRunner]" = OrderedDict()
+
+    def get(self, model_name: str, model_path: str = "", config_path: str = "") -> Tuple[ModelRunner, float]:
+        """
+        返回 (执行器, 本次加载耗时秒)，命中缓存时耗时为 0。
+        异常:
+            KeyError: 未注册的 model_name
+            其他: 模型或配置加载失败（原样抛出）
+        """
+        model_name = model_name or "knock_peak_detector"
+        if model_name not in MODEL_RUNNERS:
+            raise KeyError(f"未注册的模型: {model_name}")
+        key = (model_name, model_path or "", _mtime_ns(model_path), config_path or "", _mtime_ns(config_path))
+        runner = self._runners.get(key)
+        if runner is not None:
+            self._runners.move_to_end(key)
+            return runner, 0.0
+
+        start = time.perf_counter()
+        runner = MODEL_RUNNERS[model_name](model_path, config_path)
+        load_sec = time.perf_counter() - start
+        # 同一模型文件的旧版本不再需要，直接移除；其余按 LRU 淘汰
+        for old_key in [k for k in self._runners if k[0] == key[0] and k[1] == key[1] and k[3] == key[3]]:
+            del self._runners[old_key]
+        self._runners[key] = runner
+        while len(self._runners) > self.capacity:
+            self._runners.popitem(last=False)
+        return runner, load_sec
+
+    def __len__(self) -> int:
+        return len(self._runners)
@@ -0,0 +1,44 @@
+import threading
+import time
+from collections import deque
+from typing import Iterable, Optional
+
+
+class NgRateCounter:
+    """
+    进程内滑动窗口 NG 计数器（信息限制告警使用）：
+    - 由分析结果直接喂入 NG 时间戳，无需查询数据库
+    - 启动时可用数据库中窗口内的历史 NG 时间戳预热一次
+    - count() 时淘汰窗口外的时间戳，均摊 O(1)
+    """
+
+    def __init__(self, window_sec: float):
+        self.window_sec = max(0.0, float(window_sec))
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    def seed(self, timestamps: Iterable[float]):
+        """用历史 NG 时间戳（epoch 秒）重置计数器内容。"""
+        with self._lock:
+            self._timestamps = deque(sorted(float(ts) for ts in timestamps if ts is not None))
+
+    def add(self, timestamp: Optional[float] = None, count: int = 1):
+        ts = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            for _ in range(max(0, int(count))):
+                self._timestamps.append(ts)
+
+    def count(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else float(now)
+        with self._lock:
+            self._evict(now)
+            return len(self._timestamps)
+
+    def clear(self):
+        with self._lock:
+            self._timestamps.clear()
+
+    def _evict(self, now: float):
+        oldest_allowed = now - self.window_sec
+        while self._timestamps and self._timestamps[0] < oldest_allowed:
+            self._timestamps.popleft()
@@ -10,24 +10,65 @@ from consts import error_code
 from consts.running_consts import PEAK_DETECTION_CONFIG_JSON
 
 
+def load_peak_detector(config_path: str | None = None) -> KnockDetector:
+    """读取峰值检测配置并构建 KnockDetector；分析进程中可常驻复用（见 base.model_registry）"""
+    cfg_path = config_path or os.path.normpath(PEAK_DETECTION_CONFIG_JSON)
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    return KnockDetector(cfg)
+
+
 def run_peak_detection(signals: List[np.ndarray],
                        file_names: List[str],
                        fs,
                        config_path: str | None = None) -> str:
-    cfg_path = config_path or os.path.normpath(PEAK_DETECTION_CONFIG_JSON)
     try:
-        with open(cfg_path, "r", encoding="utf-8") as f:
-            cfg = json.load(f)
+        detector = load_peak_detector(config_path)
     except Exception as exc:
         return json.dumps({
             "ret_code": error_code.INVALID_CONFIG,
             "ret_msg": f"load config failed: {exc}",
             "result": []
         }, ensure_ascii=False)
+    return json.dumps(detect_peaks(detector, signals, file_names, fs), ensure_ascii=False)
+
 
-    detector = KnockDetector(cfg)
+def detect_peaks(detector: KnockDetector, signals: List[np.ndarray], file_names: List[str], fs) -> Dict:
+    """用已构建的 detector 检测，返回与 run_peak_detection 相同结构的字典（未序列化）"""
     sr_list = fs if isinstance(fs, (list, tuple)) else [fs] * len(signals)
+    try:
+        detections = [
+            detector.run(np.array(signal, copy=False), int(sr_list[idx])) for idx, signal in enumerate(signals)
+        ]
+        results, peak_result_map = _detection_rows(detections, file_names)
+    except Exception as exc:
+        return _detection_error(exc)
+    return _detection_payload(results, peak_result_map)
+
+
+def detect_peaks_batch(detector: KnockDetector, batch: np.ndarray, file_names: List[str], fs: int) -> List[Dict]:
+    """
+    (batch, channels, samples) 整批一次向量化检测（KnockDetector.run_batch），
+    返回每条片段各自的结果字典，与逐条调用 detect_peaks 相同
+    """
+    try:
+        detections = detector.run_batch(batch, int(fs))
+        rows = [_detection_rows([detection], [name]) for detection, name in zip(detections, file_names)]
+    except Exception as exc:
+        return [_detection_error(exc) for _ in file_names]
+    return [_detection_payload(results, peak_result_map) for results, peak_result_map in rows]
+
 
+def _detection_error(exc: Exception) -> Dict:
+    return {
+        "ret_code": error_code.INVALID_PROCESS,
+        "ret_msg": f"knock detection error: {exc}",
+        "result": []
+    }
+
+
+def _detection_rows(detections, file_names: List[str]):
+    """检测结果 -> (result 行列表, 供健康分数生成器使用的 {通道: 状态})"""
     results = []
     peak_result_map: Dict[str, Dict[str, any]] = {}
 
@@ -38,49 +79,41 @@ def run_peak_detection(signals: List[np.ndarray],
         MotorState.KNOCKED: "knocked",
     }
 
-    try:
-        for idx, signal in enumerate(signals):
-            signal = np.array(signal, copy=False)
-            sr = int(sr_list[idx])
-            detection = detector.run(signal, sr)
-            for ch_result in detection.channels:
-                ch_name = ch_result.get("channel", f"channel_{len(results)}")
-                motor_state = ch_result.get("motor_state", MotorState.RUNNING)
-                state_name = state_names.get(motor_state, "unknown")
-                
-                detail = {
-                    "file": file_names[idx],
-                    "channel": ch_name,
-                    "motor_state": state_name,
-                    "energy_level": ch_result.get("energy_level", 0.0),
-                    "is_running": ch_result.get("is_running", True),
-                    "max_flux": ch_result.get("max_flux", 0.0),
-                    "max_zscore": ch_result.get("max_zscore", 0.0),
-                    "is_knocked": ch_result.get("is_knocked", False),
-                    "zscore_threshold": ch_result.get("zscore_threshold"),
-                    "energy_threshold": ch_result.get("energy_threshold"),
-                }
-                results.append([
-                    f"{file_names[idx]}::{ch_name}",
-                    json.dumps(detail, ensure_ascii=False),
-                ])
-                
-                # 传递完整的状态信息给健康分数生成器
-                peak_result_map[ch_name] = {
-                    "motor_state": int(motor_state),
-                    "is_running": ch_result.get("is_running", True),
-                    "is_knocked": ch_result.get("is_knocked", False),
-                    "energy_level": ch_result.get("energy_level", 0.0),
-                    "max_zscore": ch_result.get("max_zscore", 0.0),
-                }
+    for idx, detection in enumerate(detections):
+        for ch_result in detection.channels:
+            ch_name = ch_result.get("channel", f"channel_{len(results)}")
+            motor_state = ch_result.get("motor_state", MotorState.RUNNING)
+            state_name = state_names.get(motor_state, "unknown")
 
-    except Exception as exc:
-        return json.dumps({
-            "ret_code": error_code.INVALID_PROCESS,
-            "ret_msg": f"knock detection error: {exc}",
-            "result": []
-        }, ensure_ascii=False)
+            detail = {
+                "file": file_names[idx],
+                "channel": ch_name,
+                "motor_state": state_name,
+                "energy_level": ch_result.get("energy_level", 0.0),
+                "is_running": ch_result.get("is_running", True),
+                "max_flux": ch_result.get("max_flux", 0.0),
+                "max_zscore": ch_result.get("max_zscore", 0.0),
+                "is_knocked": ch_result.get("is_knocked", False),
+                "zscore_threshold": ch_result.get("zscore_threshold"),
+                "energy_threshold": ch_result.get("energy_threshold"),
+            }
+            results.append([
+                f"{file_names[idx]}::{ch_name}",
+                json.dumps(detail, ensure_ascii=False),
+            ])
+
+            # 传递完整的状态信息给健康分数生成器
+            peak_result_map[ch_name] = {
+                "motor_state": int(motor_state),
+                "is_running": ch_result.get("is_running", True),
+                "is_knocked": ch_result.get("is_knocked", False),
+                "energy_level": ch_result.get("energy_level", 0.0),
+                "max_zscore": ch_result.get("max_zscore", 0.0),
+            }
+    return results, peak_result_map
 
+
+def _detection_payload(results: List, peak_result_map: Dict) -> Dict:
     health_scores = {}
     try:
         generator = HealthScoreGenerator()
@@ -88,10 +121,9 @@ def run_peak_detection(signals: List[np.ndarray],
     except Exception as exc:
         health_scores = {"error": str(exc)}
 
-    result_json = json.dumps({
+    return {
         "ret_code": error_code.OK,
         "ret_msg": "knock peak detection completed",
         "result": results,
         "health_scores": health_scores,
-    }, ensure_ascii=False)
-    return result_json
+    }
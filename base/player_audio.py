@@ -3,37 +3,59 @@ from PyQt5.QtCore import QObject, pyqtSignal, QThread
 
 from base.sound_device_manager import sd
 from base.log_manager import LogManager
+from base.wav_reader import MappedWavReader
 
 
 logger = LogManager.set_log_handler("core")
 
 class AudioPlayer(QObject):
+    """
+    数组数据在 start() 时按设备通道预先排布为 C 连续 float32，回调只做 np.copyto；
+    播放结束时回调抛出 sd.CallbackStop，由流的结束回调切回所属线程关闭流并发出 playback_finished。
+    underruns 统计输出欠载次数，供界面显示。
+    """
+
     playback_finished = pyqtSignal()
+    # 音频线程 -> 播放器所在线程：流已自然结束
+    _stream_finished = pyqtSignal()
 
-    def __init__(self, audio_data, sample_rate=44100):
+    def __init__(self, audio_data, sample_rate=44100, blocksize=1024):
         """
         初始化播放器
 
         参数:
-            audio_data (np.ndarray): 要播放的音频数据，形状为 (n_samples,) 或 (n_samples, n_channels)
+            audio_data (np.ndarray | MappedWavReader): 要播放的音频数据，形状为 (n_samples,) 或 (n_samples, n_channels)；
+                传入 MappedWavReader 时在回调中按块从映射文件读取，采样率以文件为准
             sample_rate (int): 采样率
+            blocksize (int): 输出流块大小（帧）
         """
         super().__init__()
-        # 标准化数据类型与形状：float32，二维 (frames, channels)
-        audio_np = np.asarray(audio_data, dtype=np.float32)
-        if audio_np.ndim == 1:
-            audio_np = audio_np.reshape(-1, 1)
-        elif audio_np.ndim != 2:
-            raise ValueError("不支持的音频格式：期望 1D 或 2D 数组")
-
-        self.audio_data = audio_np  # 原始数据（规范化后）
-        self._play_view = audio_np  # 可能根据设备通道能力调整后的视图
+        if isinstance(audio_data, MappedWavReader):
+            self._reader = audio_data
+            self.audio_data = audio_data
+            self._play_view = audio_data
+            sample_rate = audio_data.sample_rate
+        else:
+            # 标准化数据类型与形状：float32，二维 (frames, channels)
+            audio_np = np.asarray(audio_data, dtype=np.float32)
+            if audio_np.ndim == 1:
+                audio_np = audio_np.reshape(-1, 1)
+            elif audio_np.ndim != 2:
+                raise ValueError("不支持的音频格式：期望 1D 或 2D 数组")
+            self._reader = None
+            self.audio_data = audio_np  # 原始数据（规范化后）
+            self._play_view = audio_np  # 可能根据设备通道能力调整后的视图
+        # 映射文件播放时的通道混合矩阵 (源通道数, 输出通道数)，None 表示直接输出
+        self._mix_matrix = None
         self.sample_rate = sample_rate
+        self.blocksize = int(blocksize)
+        self.underruns = 0
         self.stream = None
         self.current_frame = 0
         self.total_frames = int(self._play_view.shape[0])
         self.is_paused = False
         self.is_playing = False
+        self._stream_finished.connect(self._on_stream_finished)
 
     @staticmethod
     def _downmix_to_stereo(data: np.ndarray) -> np.ndarray:
@@ -58,6 +80,26 @@ class AudioPlayer(QObject):
         stereo = np.stack((left.astype(np.float32), right.astype(np.float32)), axis=1)
         return stereo
 
+    @staticmethod
+    def build_mix_matrix(channels: int, max_out: int):
+        """
+        与 _downmix_to_stereo / 单声道混音等价的混合矩阵，供按块读取的映射文件使用；
+        设备通道足够时返回 None
+        """
+        if channels <= max_out:
+            return None
+        if max_out >= 2:
+            matrix = np.zeros((channels, 2), dtype=np.float32)
+            even = np.arange(0, channels, 2)
+            odd = np.arange(1, channels, 2)
+            matrix[even, 0] = 1.0 / len(even)
+            if len(odd) > 0:
+                matrix[odd, 1] = 1.0 / len(odd)
+            else:
+                matrix[:, 1] = matrix[:, 0]
+            return matrix
+        return np.full((channels, 1), 1.0 / channels, dtype=np.float32)
+
     def start(self):
         """开始播放"""
         if self.is_playing:
@@ -73,7 +115,12 @@ class AudioPlayer(QObject):
                 max_out = 2
             desired = int(self.audio_data.shape[1])
             max_out = max(1, max_out)
-            if desired > max_out:
+            if self._reader is not None:
+                # 映射文件不整体降混，回调中对每块乘混合矩阵
+                self._mix_matrix = self.build_mix_matrix(desired, max_out)
+                play_channels = desired if self._mix_matrix is None else int(self._mix_matrix.shape[1])
+                self.total_frames = self._reader.n_frames
+            elif desired > max_out:
                 if max_out >= 2:
                     # 超出设备通道能力时，优先降混为立体声
                     self._play_view = self._downmix_to_stereo(self.audio_data)
@@ -82,19 +129,24 @@ class AudioPlayer(QObject):
                     self._play_view = np.mean(self.audio_data, axis=1, keepdims=True).astype(np.float32)
             else:
                 self._play_view = self.audio_data
-            # 若设备支持 >=2 声道，但 _play_view 超过 max_out（极端情况），仍限制在设备能力内
-            play_channels = min(int(self._play_view.shape[1]), max_out)
-            if self._play_view.shape[1] != play_channels:
-                # 退化为前 play_channels 个通道（极端设备限制）
-                self._play_view = self._play_view[:, :play_channels]
-            self.total_frames = int(self._play_view.shape[0])
-
+            if self._reader is None:
+                # 若设备支持 >=2 声道，但 _play_view 超过 max_out（极端情况），仍限制在设备能力内
+                play_channels = min(int(self._play_view.shape[1]), max_out)
+                if self._play_view.shape[1] != play_channels:
+                    # 退化为前 play_channels 个通道（极端设备限制）
+                    self._play_view = self._play_view[:, :play_channels]
+                # 预先排布为设备格式，回调中整块复制无需临时数组
+                self._play_view = np.ascontiguousarray(self._play_view, dtype=np.float32)
+                self.total_frames = int(self._play_view.shape[0])
+
+            self.underruns = 0
             self.stream = sd.OutputStream(
                 samplerate=self.sample_rate,
                 channels=play_channels,
                 dtype="float32",
-                blocksize=1024,
+                blocksize=self.blocksize,
                 callback=self._callback,
+                finished_callback=self._stream_finished.emit,
             )
             self.stream.start()
             self.is_playing = True
@@ -104,36 +156,56 @@ class AudioPlayer(QObject):
 
     def _callback(self, outdata, frames, time_info, status):
         """音频回调函数"""
-        if status:
-            logger.error(f"音频输出错误: {status}")
+        if status.output_underflow:
+            self.underruns += 1
 
-        if self.is_paused or self.current_frame >= self.total_frames:
-            outdata[:] = 0
+        if self.is_paused:
+            outdata.fill(0)
             return
 
-        end_frame = self.current_frame + frames
-        data = self._play_view
-        if end_frame > self.total_frames:
-            remaining = self.total_frames - self.current_frame
-            if remaining > 0:
-                outdata[:remaining, :] = data[self.current_frame : self.current_frame + remaining, :]
-            if end_frame - self.total_frames > 0:
-                outdata[remaining:, :] = 0
-            self.current_frame = self.total_frames
+        if self._reader is not None:
+            self._fill_from_reader(outdata, frames)
         else:
-            outdata[:] = data[self.current_frame : end_frame, :]
-            self.current_frame = end_frame
+            start = self.current_frame
+            n = min(frames, self.total_frames - start)
+            if n > 0:
+                np.copyto(outdata[:n], self._play_view[start:start + n])
+                self.current_frame = start + n
+            if n < frames:
+                outdata[max(n, 0):].fill(0)
 
         if self.current_frame >= self.total_frames:
+            # 已写入的最后一块播放完后流自然结束，触发 finished_callback
+            raise sd.CallbackStop
+
+    def _fill_from_reader(self, outdata, frames):
+        """从映射文件读取当前块（必要时混音）写入 outdata，不足部分补零"""
+        block = self._reader.read(self.current_frame, frames)
+        if self._mix_matrix is not None:
+            block = block @ self._mix_matrix
+        n = block.shape[0]
+        np.copyto(outdata[:n], block)
+        if n < frames:
+            outdata[n:].fill(0)
+            self.current_frame = self.total_frames
+        else:
+            self.current_frame += n
+
+    def _on_stream_finished(self):
+        """流结束（自然播放完或被 stop 停止）后在播放器所在线程执行"""
+        if self.is_playing and self.current_frame >= self.total_frames:
             self.stop()
 
     def stop(self):
         """停止播放"""
-        if self.stream:
-            self.stream.stop()
-            self.stream.close()
-            self.stream = None
+        # 先清状态：stream.stop() 可能同步触发 finished_callback
+        stream, self.stream = self.stream, None
         self.is_playing = False
+        if stream:
+            stream.stop()
+            stream.close()
+            if self.underruns:
+                logger.warning(f"播放期间输出欠载 {self.underruns} 次")
         self.is_paused = False
         self.current_frame = 0
         self.playback_finished.emit()
@@ -0,0 +1,279 @@
+"""
+预处理结果磁盘缓存模块
+
+调整 configs/ 中的预处理配置后重跑时，只重新计算参数发生变化的阶段：
+- 缓存键 = (音频文件内容哈希, 规范化后的阶段参数, 上一阶段的键, 依赖库版本)
+- fusion_autoencoder_preprocess 拆为三个阶段分别缓存：
+    fixed       channel_config + fix_len_params       -> 振动/麦克风截断补齐后的时域信号
+    separation  separation_params                     -> 分离后的麦克风信号
+    spectrogram spec_params                           -> [vib_spec, mic_spec]
+  shared_stft 模式下分离与频谱为一个阶段（shared_spectrogram）；其他预处理方法整体作为一个阶段
+- 各阶段键由上一阶段的键与本阶段参数链式得到，查找从最后一个阶段开始，全部命中时只读取最终特征
+- 每个条目为 <root>/<键前两位>/<键>.npz；命中时更新文件 mtime，超过容量上限时按 mtime 从旧到新淘汰（LRU）
+- hits / misses 按阶段统计，report() 输出命中报告
+
+使用示例：
+    cache = FeatureCache("D:/cache/preprocess", max_bytes=20 * 1024 ** 3)
+    vib_spec, mic_spec = cached_preprocess_file(path, preprocess_param, cache)
+    print(cache.report())
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from base.log_manager import LogManager
+from base.pre_processing.custom_pipelines import CustomPipelines
+
+logger = LogManager.set_log_handler("core")
+
+CACHE_VERSION = 1
+_HASH_CHUNK = 1 << 20
+
+
+def library_versions() -> Dict[str, str]:
+    versions = {"cache": str(CACHE_VERSION), "numpy": np.__version__}
+    for name in ("scipy", "librosa"):
+        try:
+            versions[name] = __import__(name).__version__
+        except Exception:
+            versions[name] = "none"
+    return versions
+
+
+def canonicalize(params) -> str:
+    """参数字典规范化为稳定的 JSON 字符串：键排序，元组按列表处理，整数值浮点数与整数等价"""
+
+    def normalize(value):
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, np.generic):
+            return normalize(value.item())
+        return value
+
+    return json.dumps(normalize(params), sort_keys=True, ensure_ascii=False, default=str)
+
+
+_content_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def content_hash(path: str) -> str:
+    """文件内容 SHA1；同一进程内按 (路径, mtime, 大小) 记忆，避免重复读取"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _content_hash_memo.get(memo_key)
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+        _content_hash_memo[memo_key] = digest
+    return digest
+
+
+class FeatureCache:
+    def __init__(self, root: str, max_bytes: int = 10 * 1024 ** 3):
+        self.root = os.path.abspath(root)
+        self.max_bytes = int(max_bytes)
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.evictions = 0
+        self._versions = canonicalize(library_versions())
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._total_bytes = 0
+        self.refresh_size()
+
+    def refresh_size(self) -> int:
+        """重新统计缓存目录大小（其他进程可能写入或淘汰了条目）"""
+        self._total_bytes = sum(size for _, _, size in self._scan())
+        return self._total_bytes
+
+    def stage_key(self, parent_key: str, stage: str, params) -> str:
+        payload = "\n".join((parent_key, stage, canonicalize(params), self._versions))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".npz")
+
+    def get(self, key: str, stage: str = "") -> Optional[List[np.ndarray]]:
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                arrays = [npz[f"arr_{i}"] for i in range(len(npz.files))]
+            # 以 mtime 记录最近访问时间
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            self.misses[stage] += 1
+            return None
+        self.hits[stage] += 1
+        return arrays
+
+    def put(self, key: str, arrays: List[np.ndarray]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        try:
+            np.savez(tmp_path, *arrays)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入预处理缓存失败 {path}: {e}")
+            return
+        with self._lock:
+            self._total_bytes += os.path.getsize(path)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        for sub in os.listdir(self.root):
+            sub_dir = os.path.join(self.root, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if not name.endswith(".npz") or ".tmp." in name:
+                    continue
+                path = os.path.join(sub_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime_ns, stat.st_size
+
+    def _evict(self):
+        # 重新扫描（其他进程可能也写入了同一目录），淘汰到容量上限的 90%
+        entries = sorted(self._scan(), key=lambda item: item[1])
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_bytes * 0.9)
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                continue
+        self._total_bytes = total
+
+    def stats(self) -> Dict:
+        stages = sorted(set(self.hits) | set(self.misses))
+        return {
+            "stages": {stage: {"hits": self.hits[stage], "misses": self.misses[stage]} for stage in stages},
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "evictions": self.evictions,
+            "size_bytes": self._total_bytes,
+        }
+
+    def reset_stats(self):
+        self.hits.clear()
+        self.misses.clear()
+        self.evictions = 0
+
+    def merge_stats(self, stats: Dict):
+        """合并其他进程返回的 stats() 结果"""
+        for stage, counts in stats.get("stages", {}).items():
+            self.hits[stage] += counts["hits"]
+            self.misses[stage] += counts["misses"]
+        self.evictions += stats.get("evictions", 0)
+
+    def report(self) -> str:
+        stats = self.stats()
+        lines = [f"预处理缓存 {self.root}（{stats['size_bytes'] / 1024 ** 2:.1f} MB / {self.max_bytes / 1024 ** 2:.0f} MB）"]
+        for stage, counts in stats["stages"].items():
+            total = counts["hits"] + counts["misses"]
+            rate = counts["hits"] / total * 100 if total else 0.0
+            lines.append(f"  {stage:<20} 命中 {counts['hits']:>6}  未命中 {counts['misses']:>6}  命中率 {rate:5.1f}%")
+        lines.append(f"  淘汰 {stats['evictions']} 条")
+        return "\n".join(lines)
+
+
+def _cached_stage(cache: FeatureCache, key: str, stage: str, compute) -> List[np.ndarray]:
+    arrays = cache.get(key, stage)
+    if arrays is None:
+        arrays = [np.asarray(x) for x in compute()]
+        cache.put(key, arrays)
+    return arrays
+
+
+def cached_preprocess(signal: np.ndarray, sr: int, source_key: str, preprocess_param: Dict, cache: FeatureCache,
+                      method: str = "fusion_autoencoder_preprocess") -> List[np.ndarray]:
+    """
+    带缓存的预处理。source_key 标识输入音频内容（通常为 content_hash(path)）；
+    signal 为 (N, C) 原始信号，可传入返回数组的可调用对象以延迟读取。
+    各阶段的键只依赖参数，先查最后一个阶段，未命中时才逐级向前读取或计算上游阶段。
+    """
+    params = copy.deepcopy(preprocess_param)
+    root_key = f"{source_key}:{int(sr)}"
+
+    def raw_signal():
+        return signal() if callable(signal) else signal
+
+    if method != "fusion_autoencoder_preprocess":
+        return _cached_stage(
+            cache, cache.stage_key(root_key, method, params), method,
+            lambda: getattr(CustomPipelines, method)(raw_signal(), sr, **copy.deepcopy(params)),
+        )
+
+    fixed_params = {"channel_config": params.get("channel_config", {}), "fix_len_params": params.get("fix_len_params", {})}
+    separation_params = params.get("separation_params", {})
+    spec_params = params.get("spec_params", {})
+    fixed_key = cache.stage_key(root_key, "fixed", fixed_params)
+
+    def compute_fixed():
+        vib_fixed_list, mic_fixed = CustomPipelines._fusion_fixed_channels(
+            raw_signal(), sr, copy.deepcopy(fixed_params["channel_config"]), copy.deepcopy(fixed_params["fix_len_params"])
+        )
+        return [np.stack(vib_fixed_list), mic_fixed]
+
+    def fixed():
+        vib_fixed, mic_fixed = _cached_stage(cache, fixed_key, "fixed", compute_fixed)
+        return list(vib_fixed), mic_fixed
+
+    if params.get("shared_stft", False) and CustomPipelines._same_stft_params(separation_params, spec_params):
+        return _cached_stage(
+            cache,
+            cache.stage_key(fixed_key, "shared_spectrogram", {"separation": separation_params, "spec": spec_params}),
+            "shared_spectrogram",
+            lambda: CustomPipelines._fusion_shared_stft(
+                *fixed(), copy.deepcopy(separation_params), copy.deepcopy(spec_params)
+            ),
+        )
+
+    separation_key = cache.stage_key(fixed_key, "separation", separation_params)
+    spectrogram_key = cache.stage_key(separation_key, "spectrogram", spec_params)
+
+    def compute_spectrogram():
+        vib_fixed_list, mic_fixed = fixed()
+        (mic_separated,) = _cached_stage(
+            cache, separation_key, "separation",
+            lambda: [CustomPipelines.vibration_guided_separation(
+                {"mic": mic_fixed, "vib": vib_fixed_list}, sr, **copy.deepcopy(separation_params)
+            )],
+        )
+        return CustomPipelines._fusion_spectrograms(vib_fixed_list, mic_separated, sr, copy.deepcopy(spec_params))
+
+    return _cached_stage(cache, spectrogram_key, "spectrogram", compute_spectrogram)
+
+
+def cached_preprocess_file(path: str, preprocess_param: Dict, cache: FeatureCache,
+                           method: str = "fusion_autoencoder_preprocess") -> List[np.ndarray]:
+    """按文件内容哈希缓存的预处理；所有阶段命中时不读取音频数据"""
+    from base.wav_reader import MappedWavReader
+
+    with MappedWavReader(path) as reader:
+        sr = reader.sample_rate
+        return cached_preprocess(
+            lambda: reader.to_array().copy(), sr, content_hash(path), preprocess_param, cache, method
+        )
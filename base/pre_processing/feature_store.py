@@ -0,0 +1,400 @@
+"""
+批量预处理与特征库模块
+
+把多日期录音一次性预处理为模型训练用特征，训练各 epoch 直接内存映射读取，不再重复计算：
+- build_feature_store(): 在进程池中对每个 WAV 执行 CustomPipelines 预处理方法
+  （默认 fusion_autoencoder_preprocess：fix_length -> 振动引导分离 -> 频谱），
+  结果按分片写入 NPY 文件（每个模型输入一个文件，形状 (行数, *特征形状)），并维护 index.json
+- FeatureStore: 以 mmap 方式打开特征库，按下标/批次读取，不把整个特征库读入内存
+
+目录结构：
+    <root>/index.json                 配置、各输入形状、分片列表、每条录音所在的分片与行号
+    <root>/shard_00000_in0.npy        第 0 个分片的第 0 个模型输入（如振动谱）
+    <root>/shard_00000_in1.npy        第 0 个分片的第 1 个模型输入（如麦克风谱）
+
+断点续跑：index.json 在每个分片写完后更新；配置不变时，路径/mtime/大小一致的录音直接跳过。
+录音变化（mtime/大小不同）后重新预处理，新行写入后替换同一路径的旧条目，旧行记入分片的 dead_rows，
+每条录音在特征库中始终只有一行当前特征。
+指定 cache_dir（--cache-dir）时各阶段结果经 feature_cache.FeatureCache 按内容哈希缓存，
+换配置重建特征库时只重新计算参数变化的阶段，结束时输出命中报告。
+
+用法：
+    python -m base.pre_processing.feature_store --config configs/ai_model_config/config_fusion_autoencoder_model.yml \\
+        --output D:/features/fusion_ae D:/audio_data/20250101 D:/audio_data/20250102
+
+    store = FeatureStore("D:/features/fusion_ae")
+    for vib, mic in store.iter_batches(16, shuffle=True, seed=epoch):
+        ...
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from base.load_config import load_config
+from base.log_manager import LogManager
+from base.pre_processing.custom_pipelines import CustomPipelines
+from base.pre_processing.feature_cache import FeatureCache, cached_preprocess_file
+from consts import error_code
+
+logger = LogManager.set_log_handler("core")
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3
+# 配置文件中的 preprocess_method 与 CustomPipelines 方法名的对应关系
+PREPROCESS_METHODS = {
+    "fusion_ae_preprocess": "fusion_autoencoder_preprocess",
+}
+
+
+def config_hash(method: str, params: Dict) -> str:
+    payload = json.dumps({"method": method, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _init_worker():
+    # 进程池提供并行度，限制各进程内部的 BLAS/FFT 线程数
+    for key in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMBA_NUM_THREADS"):
+        os.environ.setdefault(key, "1")
+
+
+_worker_caches: Dict[tuple, FeatureCache] = {}
+
+
+def _worker_cache(cache_dir: str, cache_max_bytes: int) -> FeatureCache:
+    # 每个工作进程复用同一个缓存实例，避免每个文件都扫描缓存目录
+    key = (cache_dir, cache_max_bytes)
+    cache = _worker_caches.get(key)
+    if cache is None:
+        cache = _worker_caches[key] = FeatureCache(cache_dir, cache_max_bytes)
+    return cache
+
+
+def preprocess_wav_file(path: str, method: str, params: Dict, cache_dir: Optional[str] = None,
+                        cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+    """在工作进程中预处理单个 WAV，返回 (path, [特征数组, ...], 错误信息, 缓存统计或 None)"""
+    from base.wav_reader import MappedWavReader
+
+    cache = _worker_cache(cache_dir, cache_max_bytes) if cache_dir else None
+    try:
+        if cache is not None:
+            cache.reset_stats()
+            outputs = cached_preprocess_file(path, params, cache, method)
+        else:
+            with MappedWavReader(path) as reader:
+                signal = reader.to_array().copy()
+                sr = reader.sample_rate
+            outputs = getattr(CustomPipelines, method)(signal, sr, **json.loads(json.dumps(params)))
+        if isinstance(outputs, np.ndarray):
+            outputs = [outputs]
+        outputs = [np.ascontiguousarray(x, dtype=np.float32) for x in outputs]
+        return path, outputs, None, (cache.stats() if cache is not None else None)
+    except Exception as e:
+        return path, None, str(e), (cache.stats() if cache is not None else None)
+
+
+class FeatureStore:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        with open(os.path.join(self.root, INDEX_FILE), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        # 旧版本续跑时可能为同一路径留下多行，只保留最后写入的一行
+        self.items = list({item["path"]: item for item in self.index["items"]}.values())
+        self._shards: Dict[int, List[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def num_inputs(self) -> int:
+        return len(self.index["inputs"])
+
+    @property
+    def paths(self) -> List[str]:
+        return [item["path"] for item in self.items]
+
+    def _shard(self, shard_id: int) -> List[np.ndarray]:
+        arrays = self._shards.get(shard_id)
+        if arrays is None:
+            files = self.index["shards"][shard_id]["files"]
+            arrays = [np.load(os.path.join(self.root, name), mmap_mode="r") for name in files]
+            self._shards[shard_id] = arrays
+        return arrays
+
+    def __getitem__(self, i: int) -> List[np.ndarray]:
+        item = self.items[i]
+        return [array[item["row"]] for array in self._shard(item["shard"])]
+
+    def load_batch(self, indices: Sequence[int]) -> List[np.ndarray]:
+        """读取若干条特征，返回每个模型输入一个 (批大小, *特征形状) 的数组"""
+        batch = [
+            np.empty((len(indices), *spec["shape"]), dtype=spec["dtype"]) for spec in self.index["inputs"]
+        ]
+        for out_row, i in enumerate(indices):
+            for k, array in enumerate(self[i]):
+                batch[k][out_row] = array
+        return batch
+
+    def iter_batches(self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None) -> Iterator[List[np.ndarray]]:
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        else:
+            # 顺序读取时按分片/行排序，保证磁盘顺序访问
+            order = np.array(sorted(order, key=lambda i: (self.items[i]["shard"], self.items[i]["row"])), dtype=np.int64)
+        for start in range(0, len(order), batch_size):
+            yield self.load_batch(order[start:start + batch_size])
+
+
+class _ShardWriter:
+    """把逐条到达的特征写入预分配的 NPY 内存映射分片"""
+
+    def __init__(self, root: str, shard_id: int, shard_size: int, input_specs: List[Dict]):
+        self.root = root
+        self.shard_id = shard_id
+        self.shard_size = shard_size
+        self.files = [f"shard_{shard_id:05d}_in{k}.npy" for k in range(len(input_specs))]
+        self.arrays = [
+            np.lib.format.open_memmap(
+                os.path.join(root, name), mode="w+", dtype=spec["dtype"], shape=(shard_size, *spec["shape"])
+            )
+            for name, spec in zip(self.files, input_specs)
+        ]
+        self.rows = 0
+
+    @property
+    def full(self) -> bool:
+        return self.rows >= self.shard_size
+
+    def append(self, outputs: List[np.ndarray]) -> int:
+        row = self.rows
+        for array, value in zip(self.arrays, outputs):
+            array[row] = value
+        self.rows += 1
+        return row
+
+    def close(self) -> Dict:
+        for array in self.arrays:
+            array.flush()
+        if self.rows < self.shard_size:
+            # 未写满的分片截断为实际行数
+            for k, name in enumerate(self.files):
+                path = os.path.join(self.root, name)
+                tmp_path = path + ".tmp.npy"
+                np.save(tmp_path, np.asarray(self.arrays[k][: self.rows]))
+                self.arrays[k] = None
+                os.replace(tmp_path, path)
+        self.arrays = []
+        return {"files": self.files, "rows": self.rows}
+
+
+def _drop_items(index: Dict, paths) -> int:
+    """从 index["items"] 中移除 paths 对应的条目，其分片行记入 dead_rows；返回移除条数"""
+    paths = set(paths)
+    kept = []
+    for item in index["items"]:
+        if item["path"] in paths:
+            shard = index["shards"][item["shard"]]
+            shard["dead_rows"] = sorted(set(shard.get("dead_rows", [])) | {item["row"]})
+        else:
+            kept.append(item)
+    dropped = len(index["items"]) - len(kept)
+    index["items"] = kept
+    return dropped
+
+
+def _write_index(root: str, index: Dict):
+    path = os.path.join(root, INDEX_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def discover_wav_files(inputs: Sequence[str]) -> List[str]:
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True))
+        elif os.path.isfile(path):
+            files.append(path)
+    return sorted({os.path.abspath(p) for p in files})
+
+
+def build_feature_store(
+    wav_paths: Sequence[str],
+    output_dir: str,
+    preprocess_param: Dict,
+    *,
+    method: str = "fusion_autoencoder_preprocess",
+    workers: Optional[int] = None,
+    shard_size: int = 64,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    progress=print,
+):
+    """
+    预处理 wav_paths 并写入/追加到 output_dir 特征库，返回 (code, stats)。
+    已有特征库的配置不同时返回 INVALID_CONFIG，需换目录或先删除旧库。
+    cache_dir 不为空时启用分阶段预处理缓存，stats["cache"] 为汇总的命中统计。
+    """
+    method = PREPROCESS_METHODS.get(method, method)
+    if not hasattr(CustomPipelines, method):
+        return error_code.INVALID_CONFIG, {"msg": f"未知的预处理方法: {method}"}
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    digest = config_hash(method, preprocess_param)
+
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("config_hash") != digest:
+            return error_code.INVALID_CONFIG, {"msg": f"{output_dir} 已有不同配置的特征库"}
+    else:
+        index = {
+            "version": INDEX_VERSION,
+            "config_hash": digest,
+            "method": method,
+            "preprocess_param": preprocess_param,
+            "inputs": [],
+            "shards": [],
+            "items": [],
+        }
+
+    done = {item["path"]: (item["mtime_ns"], item["size"]) for item in index["items"]}
+    pending = []
+    for path in wav_paths:
+        stat = os.stat(path)
+        if done.get(path) != (stat.st_mtime_ns, stat.st_size):
+            pending.append((path, stat.st_mtime_ns, stat.st_size))
+    stats = {"total": len(wav_paths), "skipped": len(wav_paths) - len(pending), "written": 0, "failed": 0}
+    progress(f"共 {len(wav_paths)} 个文件，已在特征库 {stats['skipped']} 个，待处理 {len(pending)} 个")
+    if not pending:
+        return error_code.OK, stats
+
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    cache_summary = FeatureCache(cache_dir, cache_max_bytes) if cache_dir else None
+    if cache_summary is not None:
+        cache_dir = cache_summary.root
+    writer: Optional[_ShardWriter] = None
+    shard_items: List[Dict] = []
+    failed_paths: List[str] = []
+    start = time.perf_counter()
+
+    def flush_shard():
+        nonlocal writer, shard_items
+        if writer is None:
+            return
+        index["shards"].append(writer.close())
+        # 已变化录音的旧条目由新行替换
+        _drop_items(index, [item["path"] for item in shard_items])
+        index["items"].extend(shard_items)
+        _write_index(output_dir, index)
+        writer, shard_items = None, []
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"), initializer=_init_worker) as pool:
+        results = pool.map(
+            preprocess_wav_file,
+            [p for p, _, _ in pending],
+            [method] * len(pending),
+            [preprocess_param] * len(pending),
+            [cache_dir] * len(pending),
+            [cache_max_bytes] * len(pending),
+        )
+        for (path, mtime_ns, size), (_, outputs, err, cache_stats) in zip(pending, results):
+            if cache_summary is not None and cache_stats:
+                cache_summary.merge_stats(cache_stats)
+            if err is not None:
+                stats["failed"] += 1
+                failed_paths.append(path)
+                logger.error(f"预处理失败 {path}: {err}")
+                progress(f"预处理失败 {path}: {err}")
+                continue
+            specs = [{"shape": list(x.shape), "dtype": str(x.dtype)} for x in outputs]
+            if not index["inputs"]:
+                index["inputs"] = specs
+            elif specs != index["inputs"]:
+                stats["failed"] += 1
+                failed_paths.append(path)
+                logger.error(f"特征形状不一致 {path}: {specs} != {index['inputs']}")
+                continue
+            if writer is None:
+                writer = _ShardWriter(output_dir, len(index["shards"]), shard_size, index["inputs"])
+            row = writer.append(outputs)
+            shard_items.append(
+                {"path": path, "mtime_ns": mtime_ns, "size": size, "shard": writer.shard_id, "row": row}
+            )
+            stats["written"] += 1
+            done_count = stats["written"] + stats["failed"]
+            elapsed = time.perf_counter() - start
+            progress(f"[{done_count}/{len(pending)}] {os.path.basename(path)} | {done_count / elapsed:.2f} 文件/s")
+            if writer.full:
+                flush_shard()
+        flush_shard()
+    # 变化后预处理失败的录音不再保留旧特征，下次运行时重试
+    if _drop_items(index, failed_paths):
+        _write_index(output_dir, index)
+
+    stats["elapsed_sec"] = time.perf_counter() - start
+    if cache_summary is not None:
+        cache_summary.refresh_size()
+        stats["cache"] = cache_summary.stats()
+        progress(cache_summary.report())
+    progress(
+        f"完成：写入 {stats['written']}，失败 {stats['failed']}，跳过 {stats['skipped']}，耗时 {stats['elapsed_sec']:.1f} s"
+    )
+    return (error_code.OK if stats["failed"] == 0 else error_code.INVALID_PROCESS), stats
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="批量预处理录音并写入内存映射特征库")
+    p.add_argument("inputs", nargs="+", help="WAV 文件或目录（递归查找 *.wav）")
+    p.add_argument("--config", required=True, help="包含 preprocess 模块的 YML 配置")
+    p.add_argument("--output", required=True, help="特征库目录")
+    p.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    p.add_argument("--shard-size", type=int, default=64, help="每个分片的录音条数")
+    p.add_argument("--cache-dir", default=None, help="分阶段预处理缓存目录，不指定则不缓存")
+    p.add_argument("--cache-max-gb", type=float, default=DEFAULT_CACHE_MAX_BYTES / 1024 ** 3, help="缓存容量上限（GB）")
+    return p
+
+
+def main(argv=None) -> int:
+    args = _build_arg_parser().parse_args(argv)
+    module_config = load_config(args.config, "preprocess")
+    if not module_config:
+        print(f"[ERROR] {args.config} 中没有 preprocess 模块", file=sys.stderr)
+        return 2
+    wav_paths = discover_wav_files(args.inputs)
+    try:
+        code, stats = build_feature_store(
+            wav_paths,
+            args.output,
+            module_config.get("preprocess_param", {}),
+            method=module_config.get("preprocess_method", "fusion_autoencoder_preprocess"),
+            workers=args.workers,
+            shard_size=args.shard_size,
+            cache_dir=args.cache_dir,
+            cache_max_bytes=int(args.cache_max_gb * 1024 ** 3),
+        )
+    except KeyboardInterrupt:
+        return 130
+    if code == error_code.INVALID_CONFIG:
+        print(f"[ERROR] {stats.get('msg')}", file=sys.stderr)
+        return 2
+    return 0 if code == error_code.OK else 1
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+长录音分块流式振动引导分离模块
+
+CustomPipelines.vibration_guided_separation 需要整段信号在内存中做 STFT/ISTFT，几小时的录音无法处理。
+本模块按 STFT 帧分块读取（MappedWavReader 内存映射），逐块做 STFT -> 掩码 -> ISTFT 重叠相加，
+把麦克风通道分离为两路并以 int16 流式写入：
+    xxx_source1.wav  振动引导掩码保留的分量（增益 mask_smooth + mask_floor，与 vibration_guided_separation 相同）
+    xxx_source2.wav  互补分量（增益 1 - mask_smooth + mask_floor）
+文件名与 AudioDetailDialog._infer_separated_path 推断的路径一致，详情弹窗可直接播放。
+
+与整段计算的一致性：
+- 第一遍只对振动通道做 STFT，得到掩码归一化所需的全局最大幅度，并记录首/末帧的振动幅度
+  （整段计算时 3x3 平滑沿时间轴 wrap，首帧与末帧互为邻居）
+- 第二遍每块额外计算前后各一帧振动谱作为平滑上下文，重叠相加按 librosa.istft 的窗口平方和归一化
+  因此 source1 与 vibration_guided_separation 的结果只有浮点舍入差异；输出长度与输入相同，
+  末尾不足一帧（center=False）的部分补零
+内存占用只与 block_seconds 有关，与录音时长无关。
+
+用法：
+    python -m base.pre_processing.streaming_separation --config configs/ai_model_config/config_fusion_autoencoder_model.yml \\
+        D:/audio_data/20250101/long_recording.wav
+"""
+
+import argparse
+import os
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.ndimage import uniform_filter
+from scipy.signal import get_window
+
+from base.load_config import load_config
+from base.log_manager import LogManager
+from base.pre_processing.custom_pipelines import CustomPipelines
+from base.wav_reader import MappedWavReader
+from consts import error_code
+
+logger = LogManager.set_log_handler("core")
+
+SOURCE_SUFFIXES = ("_source1", "_source2")
+
+
+def separated_paths(path: str) -> List[str]:
+    base, ext = os.path.splitext(path)
+    return [f"{base}{suffix}{ext}" for suffix in SOURCE_SUFFIXES]
+
+
+def _overlap_add(acc: np.ndarray, frames: np.ndarray, hop_length: int):
+    """frames (帧数, n_fft) 以 hop_length 为步长叠加到 acc；按 hop 宽度分列向量化，不逐帧循环"""
+    n, n_fft = frames.shape
+    for j in range(0, n_fft, hop_length):
+        width = min(hop_length, n_fft - j)
+        acc[j:j + n * hop_length].reshape(n, hop_length)[:, :width] += frames[:, j:j + width]
+
+
+class _Int16WavWriter:
+    """逐块写入单声道 int16 WAV（换算比例与 save_audio_data 一致），完成后原子替换目标文件"""
+
+    def __init__(self, path: str, sample_rate: int):
+        self.path = path
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._wav = wave.open(self._tmp_path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block: np.ndarray):
+        pcm = np.clip(block * 32768.0, -32768, 32767).astype("<i2")
+        self._wav.writeframes(pcm.tobytes())
+
+    def close(self):
+        self._wav.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._wav.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class StreamingSeparator:
+    def __init__(self, reader: MappedWavReader, separation_params: Dict, channel_config: Dict,
+                 block_seconds: float = 10.0):
+        """
+        参数:
+            reader: 已打开的录音
+            separation_params: 与 fusion 配置中的 separation_params 相同（n_fft/hop_length/center/掩码参数）
+            channel_config: 与 fusion 配置中的 channel_config 相同，决定振动/麦克风通道
+            block_seconds: 每块处理的时长，决定峰值内存
+        """
+        self.reader = reader
+        self.params = dict(separation_params)
+        self.n_fft = int(self.params.get("n_fft", 2048))
+        self.hop_length = int(self.params.get("hop_length", 512))
+        self.center = bool(self.params.get("center", False))
+        self.vib_idxs, self.mic_idx = CustomPipelines._fusion_channel_indices(reader.channels, channel_config)
+        self.window = get_window("hann", self.n_fft, fftbins=True).astype(np.float32)
+
+        # center=True 时与 librosa 一致，两端各补 n_fft // 2 个零（虚拟补零，不复制数据）
+        self.pad = self.n_fft // 2 if self.center else 0
+        padded_len = reader.n_frames + 2 * self.pad
+        if padded_len < self.n_fft:
+            raise ValueError(f"录音过短：{reader.n_frames} 帧 < n_fft={self.n_fft}")
+        self.n_stft_frames = 1 + (padded_len - self.n_fft) // self.hop_length
+        self.block_frames = max(1, int(block_seconds * reader.sample_rate) // self.hop_length)
+
+        self.peak = None
+        self._edge_combined = None
+
+    def _read_padded(self, start: int, stop: int, channels: Sequence[int]) -> np.ndarray:
+        """读取补零坐标下 [start, stop) 的指定通道，返回 (len(channels), stop - start) float32"""
+        out = np.zeros((len(channels), stop - start), dtype=np.float32)
+        a = max(start - self.pad, 0)
+        b = min(stop - self.pad, self.reader.n_frames)
+        if b > a:
+            block = self.reader.read(a, b - a)
+            offset = a + self.pad - start
+            out[:, offset:offset + (b - a)] = block[:, list(channels)].T
+        return out
+
+    def _stft_frames(self, f0: int, f1: int, channels: Sequence[int]) -> np.ndarray:
+        """STFT 帧 [f0, f1) 的复数谱，形状 (通道数, 帧数, n_fft // 2 + 1)"""
+        seg = self._read_padded(f0 * self.hop_length, (f1 - 1) * self.hop_length + self.n_fft, channels)
+        frames = np.lib.stride_tricks.sliding_window_view(seg, self.n_fft, axis=-1)[:, ::self.hop_length]
+        return np.fft.rfft(frames * self.window, axis=-1)
+
+    def _combined_mag(self, f0: int, f1: int) -> np.ndarray:
+        vib_mags = list(np.abs(self._stft_frames(f0, f1, self.vib_idxs)))
+        return CustomPipelines._combine_vib_mags(vib_mags, **self.params).astype(np.float32, copy=False)
+
+    def _block_ranges(self):
+        for f0 in range(0, self.n_stft_frames, self.block_frames):
+            yield f0, min(f0 + self.block_frames, self.n_stft_frames)
+
+    def scan_peak(self, progress=None):
+        """第一遍：振动幅度谱全局最大值，以及首/末帧幅度（时间轴 wrap 平滑的上下文）"""
+        peak = 0.0
+        first = last = None
+        for f0, f1 in self._block_ranges():
+            combined = self._combined_mag(f0, f1)
+            peak = max(peak, float(combined.max()))
+            if f0 == 0:
+                first = combined[0].copy()
+            if f1 == self.n_stft_frames:
+                last = combined[-1].copy()
+            if progress:
+                progress(f1 / self.n_stft_frames)
+        self.peak = np.float32(peak)
+        self._edge_combined = (first, last)
+        return self.peak
+
+    def _gain_block(self, f0: int, f1: int) -> np.ndarray:
+        """帧 [f0, f1) 的平滑掩码 mask_smooth，形状 (帧数, 频点数)"""
+        first, last = self._edge_combined
+        c0, c1 = max(f0 - 1, 0), min(f1 + 1, self.n_stft_frames)
+        combined = self._combined_mag(c0, c1)
+        rows = [combined]
+        if f0 == 0:
+            rows.insert(0, last[np.newaxis])
+        if f1 == self.n_stft_frames:
+            rows.append(first[np.newaxis])
+        if len(rows) > 1:
+            combined = np.concatenate(rows, axis=0)
+
+        mask = CustomPipelines._binary_mask(combined, self.peak, self.params.get("mask_threshold", 0.1))
+        smooth = np.empty_like(mask)
+        uniform_filter(mask, size=3, output=smooth, mode='wrap')
+        return smooth[1:-1]
+
+    def run(self, writers: Sequence[_Int16WavWriter], progress=None):
+        """第二遍：逐块分离并写入 writers（source1, source2）"""
+        if self.peak is None:
+            self.scan_peak()
+        mask_floor = self.params.get("mask_floor", 0.1)
+        n_fft, hop = self.n_fft, self.hop_length
+        win_sq = self.window ** 2
+        n_out = self.reader.n_frames
+
+        # 重叠相加缓冲区：acc_start 为缓冲区首样本在补零坐标下的位置，之前的样本已写出
+        acc_len = self.block_frames * hop + -(-n_fft // hop) * hop
+        accs = [np.zeros(acc_len, dtype=np.float32) for _ in writers]
+        wss = np.zeros(acc_len, dtype=np.float32)
+        acc_start = 0
+        written = 0
+        tiny = np.finfo(np.float32).tiny
+
+        def emit(n_ready):
+            nonlocal written
+            # 补零坐标 [acc_start, acc_start + n_ready) -> 原始坐标，去掉 center 补零部分
+            lo = max(self.pad - acc_start, 0)
+            hi = min(n_ready, self.pad + n_out - acc_start)
+            if hi <= lo:
+                return
+            norm = wss[lo:hi]
+            nonzero = norm > tiny
+            for writer, acc in zip(writers, accs):
+                block = acc[lo:hi].copy()
+                block[nonzero] /= norm[nonzero]
+                writer.write(block)
+            written += hi - lo
+
+        for f0, f1 in self._block_ranges():
+            smooth = self._gain_block(f0, f1)
+            mic_stft = self._stft_frames(f0, f1, [self.mic_idx])[0]
+            n = f1 - f0
+            offset = f0 * hop - acc_start
+            for k, acc in enumerate(accs):
+                gain = smooth + mask_floor if k == 0 else (1.0 - smooth) + mask_floor
+                frames = np.fft.irfft(mic_stft * gain, n=n_fft, axis=-1).astype(np.float32, copy=False)
+                frames *= self.window
+                _overlap_add(acc[offset:], frames, hop)
+            _overlap_add(wss[offset:], np.broadcast_to(win_sq, (n, n_fft)), hop)
+
+            # 下一帧从 f1 * hop 开始，此前的样本不会再有叠加，可以写出
+            ready = (f1 * hop - acc_start) if f1 < self.n_stft_frames else ((f1 - 1) * hop + n_fft - acc_start)
+            emit(ready)
+            for acc in accs + [wss]:
+                remain = acc_len - ready
+                acc[:remain] = acc[ready:]
+                acc[remain:] = 0
+            acc_start += ready
+            if progress:
+                progress(f1 / self.n_stft_frames)
+
+        # 末尾不足一帧的部分（center=False）补零，输出长度与输入一致
+        if written < n_out:
+            for writer in writers:
+                tail = n_out - written
+                for start in range(0, tail, self.block_frames * hop):
+                    writer.write(np.zeros(min(self.block_frames * hop, tail - start), dtype=np.float32))
+
+
+def separate_file(
+    path: str,
+    separation_params: Dict,
+    channel_config: Dict,
+    *,
+    output_paths: Optional[Sequence[str]] = None,
+    block_seconds: float = 10.0,
+    progress=print,
+):
+    """
+    分离单个录音并写出 source1/source2，返回 (code, 输出路径列表或错误信息)。
+    output_paths 默认为 xxx_source1.wav / xxx_source2.wav。
+    """
+    output_paths = list(output_paths or separated_paths(path))
+    try:
+        reader = MappedWavReader(path)
+    except Exception as e:
+        return error_code.INVALID_PATH, f"无法读取 {path}: {e}"
+
+    writers = []
+    try:
+        with reader:
+            separator = StreamingSeparator(reader, separation_params, channel_config, block_seconds)
+            start = time.perf_counter()
+            last_report = [0.0]
+
+            def report(stage, weight, base):
+                def callback(fraction):
+                    now = time.perf_counter()
+                    if now - last_report[0] < 1.0 and fraction < 1.0:
+                        return
+                    last_report[0] = now
+                    progress(f"{os.path.basename(path)} {stage} {(base + weight * fraction) * 100:5.1f}% | "
+                             f"{now - start:.1f} s")
+                return callback
+
+            # 第一遍只算振动通道 STFT，约占总耗时的 1/3
+            separator.scan_peak(report("扫描", 1 / 3, 0.0) if progress else None)
+            writers = [_Int16WavWriter(p, reader.sample_rate) for p in output_paths]
+            separator.run(writers, report("分离", 2 / 3, 1 / 3) if progress else None)
+            for writer in writers:
+                writer.close()
+    except Exception as e:
+        for writer in writers:
+            writer.abort()
+        logger.error(f"流式分离失败 {path}: {e}")
+        return error_code.INVALID_PROCESS, str(e)
+    return error_code.OK, output_paths
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="长录音分块流式振动引导分离，输出 *_source1.wav / *_source2.wav")
+    p.add_argument("inputs", nargs="+", help="WAV 文件")
+    p.add_argument("--config", required=True, help="包含 preprocess 模块的 fusion 配置（读取 separation_params/channel_config）")
+    p.add_argument("--block-seconds", type=float, default=10.0, help="每块处理的时长（秒），决定峰值内存")
+    return p
+
+
+def main(argv=None) -> int:
+    args = _build_arg_parser().parse_args(argv)
+    module_config = load_config(args.config, "preprocess")
+    if not module_config:
+        print(f"[ERROR] {args.config} 中没有 preprocess 模块", file=sys.stderr)
+        return 2
+    params = module_config.get("preprocess_param", {})
+    failed = 0
+    for path in args.inputs:
+        code, result = separate_file(
+            path,
+            params.get("separation_params", {}),
+            params.get("channel_config", {}),
+            block_seconds=args.block_seconds,
+        )
+        if code != error_code.OK:
+            failed += 1
+            print(f"[ERROR] {result}", file=sys.stderr)
+        else:
+            print(f"已写出 {', '.join(result)}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+流式声压级（SPL）计
+
+与 AudioThdFrequencyResponseAnalysis.spl_calculation 的计算一致，但按块增量计算，适合在输入流回调中实时读数：
+- 运行最大值：|x| 在 window_size 个采样内的最大值。每块与上一块末尾 window_size - 1 个采样拼接后
+  用 maximum_filter1d 计算（其 C 实现即单调双端队列算法，O(N)），只保留窗口完全落在数据内的输出
+- SPL = 20 * log10(最大值 / 参考声压)
+- 平滑：smooth_size 点滑动平均，用拼接上一块末尾 smooth_size - 1 个值的累积和相减得到；
+  窗口内含数字静音（-inf dB）时结果为 -inf，与 np.convolve 相同
+- 读数：最近 average_size 个平滑值的均值（原流程取整段中间 200 个点的均值）
+
+前 warmup_seconds 秒的数据只用于填充窗口、不产生读数（原流程丢弃录音前 1 s）。
+最近 stable_seconds 秒内，各通道前、后半段读数均值之差都不超过 tolerance_db 时判为稳定（读数不再漂移），
+提前完成，结果为该时段读数的均值（单个读数只平均 200 个点，本身有约 0.01 dB 量级的抖动）；
+到 max_seconds 仍未稳定时以最近 stable_seconds 秒的读数均值作为结果。
+输入块为 (frames,) 或 (frames, channels)，各通道同时计算。
+
+使用示例：
+    meter = StreamingSplMeter(44100, channels=8)
+    for block in blocks:             # InputStream 回调中取得的数据块
+        meter.update(block)
+        if meter.done:
+            break
+    spl = meter.result()             # (channels,) dB
+"""
+
+from collections import deque
+from typing import Optional
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d
+
+
+class StreamingSplMeter:
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int = 1,
+        reference_pressure: float = 20e-6,
+        window_size: int = 1201,
+        smooth_size: int = 1102,
+        average_size: int = 200,
+        warmup_seconds: float = 1.0,
+        stable_seconds: float = 2.0,
+        tolerance_db: float = 0.05,
+        max_seconds: float = 10.0,
+    ):
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.reference_pressure = float(reference_pressure)
+        self.window_size = int(window_size)
+        self.smooth_size = int(smooth_size)
+        self.average_size = int(average_size)
+        self.warmup_frames = int(warmup_seconds * self.sample_rate)
+        self.stable_frames = int(stable_seconds * self.sample_rate)
+        self.tolerance_db = float(tolerance_db)
+        self.max_frames = int(max_seconds * self.sample_rate)
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.stable = False
+        self.reading: Optional[np.ndarray] = None
+        self._max_tail = np.zeros((0, self.channels), dtype=np.float64)
+        self._spl_tail = np.zeros((0, self.channels), dtype=np.float64)
+        self._silent_tail = np.zeros((0, self.channels), dtype=np.int64)
+        self._smooth_tail = np.zeros((0, self.channels), dtype=np.float64)
+        # (块结束时的帧数, 各通道读数)
+        self._history = deque()
+
+    @property
+    def elapsed(self) -> float:
+        return self.frames / self.sample_rate
+
+    @property
+    def done(self) -> bool:
+        return self.stable or self.frames >= self.max_frames
+
+    def update(self, block: np.ndarray) -> Optional[np.ndarray]:
+        """输入一块数据，返回当前各通道读数（dB）；预热阶段或窗口尚未填满时返回 None"""
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+        block = block[:, :self.channels]
+        self.frames += len(block)
+
+        amplitude = self._running_max(np.abs(block))
+        if len(amplitude) == 0:
+            return None
+        with np.errstate(divide="ignore"):
+            spl = 20 * np.log10(amplitude / self.reference_pressure)
+        smooth = self._moving_average(spl)
+        if len(smooth) == 0:
+            return None
+        self._smooth_tail = np.concatenate([self._smooth_tail, smooth])[-self.average_size:]
+        if self.frames <= self.warmup_frames:
+            return None
+
+        self.reading = self._smooth_tail.mean(axis=0)
+        self._history.append((self.frames, self.reading))
+        while self._history and self._history[0][0] <= self.frames - self.stable_frames:
+            self._history.popleft()
+        self.stable = self._is_stable()
+        return self.reading
+
+    def result(self) -> Optional[np.ndarray]:
+        """最近 stable_seconds 秒内读数的均值（各通道，dB）；尚无读数时返回 None"""
+        if not self._history:
+            return None
+        return np.mean([reading for _, reading in self._history], axis=0)
+
+    def _running_max(self, magnitude: np.ndarray) -> np.ndarray:
+        data = np.concatenate([self._max_tail, magnitude])
+        self._max_tail = data[max(0, len(data) - self.window_size + 1):]
+        valid = len(data) - self.window_size + 1
+        if valid <= 0:
+            return data[:0]
+        half = self.window_size // 2
+        # 居中滤波输出 i 覆盖 [i - half, i - half + window_size)，取完全落在数据内的部分即各窗口的最大值
+        return maximum_filter1d(data, self.window_size, axis=0)[half:half + valid]
+
+    def _moving_average(self, spl: np.ndarray) -> np.ndarray:
+        silent = np.isneginf(spl)
+        values = np.concatenate([self._spl_tail, np.where(silent, 0.0, spl)])
+        flags = np.concatenate([self._silent_tail, silent.astype(np.int64)])
+        start = max(0, len(values) - self.smooth_size + 1)
+        self._spl_tail = values[start:]
+        self._silent_tail = flags[start:]
+        valid = len(values) - self.smooth_size + 1
+        if valid <= 0:
+            return values[:0]
+        zeros = np.zeros((1, values.shape[1]))
+        csum = np.concatenate([zeros, np.cumsum(values, axis=0)])
+        silent_count = np.concatenate([zeros, np.cumsum(flags, axis=0)])
+        smooth = (csum[self.smooth_size:] - csum[:valid]) / self.smooth_size
+        silent_in_window = (silent_count[self.smooth_size:] - silent_count[:valid]) > 0
+        smooth[silent_in_window] = -np.inf
+        return smooth
+
+    def _is_stable(self) -> bool:
+        if not self._history or self.frames - self.warmup_frames < self.stable_frames:
+            return False
+        readings = np.array([reading for _, reading in self._history])
+        if len(readings) < 2 or not np.all(np.isfinite(readings)):
+            return False
+        half = len(readings) // 2
+        drift = np.abs(readings[:half].mean(axis=0) - readings[half:].mean(axis=0))
+        return bool(np.all(drift <= self.tolerance_db))
@@ -1,7 +1,7 @@
 import time
 import threading
 
-from PyQt5.QtCore import QThread
+import numpy as np
 
 from base.data_struct.data_deal_struct import DataDealStruct
 from base.sound_device_manager import sd
@@ -10,21 +10,33 @@ from base.log_manager import LogManager
 
 logger = LogManager.set_log_handler("core")
 
-class AudioDataManager(QThread):
-    # signal_for_update = pyqtSignal(object)  # 使用 object 类型传递 ndarray
+class AudioDataManager:
+    """
+    采集流管理：打开 sounddevice 输入流，在回调中把各选中通道写入 DataDealStruct 的环形缓冲。
+    设置了通道增益（麦克风校准结果，见 base.mic_calibration）时，各通道写入前先乘以对应增益。
+    不依赖 Qt，可在无界面环境或基准测试中直接调用 audio_callback 注入数据。
+    """
 
     def __init__(self):
-        super().__init__()
         self.data_struct = DataDealStruct()
         # self.stream = None
         self.sampling_rate = 44100
         self.channels = None
         self.selected_channels = None
+        # 与 selected_channels 一一对应的线性增益，None 表示不调整
+        self.channel_gains = None
         self.ctx = None
         self.lock = threading.Lock()
         # self.timer = QTimer()
         # self.timer.timeout.connect(self.emit_audio_data)
 
+    def set_channel_gains(self, gains):
+        """gains 与 selected_channels 一一对应；全部为 1 或传入 None 时不做乘法"""
+        if gains is None or np.allclose(gains, 1.0):
+            self.channel_gains = None
+        else:
+            self.channel_gains = np.asarray(gains, dtype=np.float32)
+
     def start_recording(self, ctx, selected_channels, sampling_rate, channels):
         self.ctx = ctx
         self.selected_channels = selected_channels
@@ -33,64 +45,13 @@ class AudioDataManager(QThread):
         # self.audio_data = [[] for _ in range(len(selected_channels))]
         print(f"start_recording: {self.ctx}, {self.selected_channels}, {self.sampling_rate}, {self.channels}")
 
-        def audio_callback(in_data, frames, t, status):
-            # 开始一轮写入：epoch 置为奇数（写入中），并限制不超过 10000
-            try:
-                if self.data_struct.epoch >= 10000:
-                    self.data_struct.epoch = 1
-                else:
-                    self.data_struct.epoch += 1
-            except Exception as e:
-                logger.error(f"audio_callback failed: {e}")
-            if status:
-                print(f"Audio error: {status}")
-                print(time.strftime("%Y%m%d_%H%M%S", time.localtime()))
-            # 更新音频数据
-            # print(frames)
-            data = in_data.T
-
-            for i, ch in enumerate(self.selected_channels):
-                # 获取当前通道的环形缓冲与长度
-                ring_buffer = self.data_struct.audio_data_arr[i]
-                buffer_len = int(ring_buffer.shape[0])
-                if buffer_len <= 0:
-                    continue
-                # 读取并规范写入位置（确保落在 [0, buffer_len)）
-                write_idx = int(self.data_struct.write_index[i]) % buffer_len
-
-                # 将新数据按两段写入（末尾段 + 开头段）
-                tail_space = buffer_len - write_idx
-                if frames <= tail_space:
-                    # 全部写入尾段
-                    ring_buffer[write_idx:write_idx + frames] = data[ch]
-                    write_idx = (write_idx + frames) % buffer_len
-                else:
-                    # 分段写入
-                    first_len = tail_space
-                    second_len = frames - first_len
-                    ring_buffer[write_idx:buffer_len] = data[ch][:first_len]
-                    ring_buffer[0:second_len] = data[ch][first_len:]
-                    write_idx = second_len % buffer_len
-
-                # 回写更新后的写入位置
-                self.data_struct.write_index[i] = write_idx
-            
-            # 本轮写入完成：epoch 置为偶数（稳定态），并限制不超过 10000
-            try:
-                if self.data_struct.epoch >= 10000:
-                    self.data_struct.epoch = 0
-                else:
-                    self.data_struct.epoch += 1
-            except Exception as e:
-                logger.error(f"audio_callback failed: {e}")
-
         try:
             self.ctx.start_stream(
                 sd.InputStream,
                 self.sampling_rate,
                 self.channels,
                 self.ctx.input_dtype,
-                audio_callback,
+                self.audio_callback,
                 False,
                 blocksize=2048,
             )
@@ -99,12 +60,63 @@ class AudioDataManager(QThread):
             logger.error(f"Failed to start audio stream: {e}")
             print(f"Failed to start audio stream: {e}")
 
+    def audio_callback(self, in_data, frames, t, status):
+        # 开始一轮写入：epoch 置为奇数（写入中），并限制不超过 10000
+        try:
+            if self.data_struct.epoch >= 10000:
+                self.data_struct.epoch = 1
+            else:
+                self.data_struct.epoch += 1
+        except Exception as e:
+            logger.error(f"audio_callback failed: {e}")
+        if status:
+            print(f"Audio error: {status}")
+            print(time.strftime("%Y%m%d_%H%M%S", time.localtime()))
+        # 更新音频数据
+        # print(frames)
+        data = in_data.T
+        gains = self.channel_gains
+
+        for i, ch in enumerate(self.selected_channels):
+            channel_data = data[ch] if gains is None else data[ch] * gains[i]
+            # 获取当前通道的环形缓冲与长度
+            ring_buffer = self.data_struct.audio_data_arr[i]
+            buffer_len = int(ring_buffer.shape[0])
+            if buffer_len <= 0:
+                continue
+            # 读取并规范写入位置（确保落在 [0, buffer_len)）
+            write_idx = int(self.data_struct.write_index[i]) % buffer_len
+
+            # 将新数据按两段写入（末尾段 + 开头段）
+            tail_space = buffer_len - write_idx
+            if frames <= tail_space:
+                # 全部写入尾段
+                ring_buffer[write_idx:write_idx + frames] = channel_data
+                write_idx = (write_idx + frames) % buffer_len
+            else:
+                # 分段写入
+                first_len = tail_space
+                second_len = frames - first_len
+                ring_buffer[write_idx:buffer_len] = channel_data[:first_len]
+                ring_buffer[0:second_len] = channel_data[first_len:]
+                write_idx = second_len % buffer_len
+
+            # 回写更新后的写入位置
+            self.data_struct.write_index[i] = write_idx
+        
+        # 本轮写入完成：epoch 置为偶数（稳定态），并限制不超过 10000
+        try:
+            if self.data_struct.epoch >= 10000:
+                self.data_struct.epoch = 0
+            else:
+                self.data_struct.epoch += 1
+        except Exception as e:
+            logger.error(f"audio_callback failed: {e}")
+
     def stop_recording(self):
         if self.ctx and self.ctx.stream.active:
             self.ctx.stream.stop()
             self.ctx = None
-        self.quit()
-        self.wait()
         # self.timer.stop()
 
     # def emit_audio_data(self):
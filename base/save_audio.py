@@ -39,6 +39,7 @@ from typing import Optional
 import numpy as np
 
 from base.database.db_manager import DataManage
+from base.database.fixed_time_ng_total import ensure_warning_epoch_schema, warning_epoch_values
 from consts import db_consts
 
 from base.audio_data_manager import save_audio_data
@@ -97,6 +98,7 @@ def insert_warning_record(
     向 warning_audio_data_table 插入一条记录。
     采用 consts.db_consts.WARNING_COLUMNS 列顺序：
     [warning_time, warning_level, warning_status, charge_person, file_name, record_time, stop_time, deal_status, description]
+    并同时写入 WARNING_EPOCH_COLUMNS 对应的 epoch 列，供按时间范围的索引查询使用。
     """
     warning_time = _now_str()
     warning_time = stop_time
@@ -115,8 +117,14 @@ def insert_warning_record(
         description,
     ]
 
+    row_dict = dict(zip(db_consts.WARNING_COLUMNS, data_row))
+    columns = db_consts.WARNING_COLUMNS + list(db_consts.WARNING_EPOCH_COLUMNS.values())
+    data_row.extend(warning_epoch_values(row_dict))
+
     with DataManage(db_consts.DATABASE_PATH) as db:
-        db.insert_data_into_db("warning_audio_data_table", db_consts.WARNING_COLUMNS, [data_row])
+        # 旧数据库首次写入前补齐 epoch 列与索引
+        ensure_warning_epoch_schema(db)
+        db.insert_data_into_db("warning_audio_data_table", columns, [data_row])
 
 
 # def save_and_log_warning_segment(
@@ -0,0 +1,81 @@
+"""
+激励/录音对齐
+
+对齐帧数定义与 scipy.signal.correlate(recorded, stimulus) 的全互相关一致：
+取 |互相关| 最大处对应的延迟（recorded[lag:] 与 stimulus 对齐，可为负）。
+
+- correlation_lag(): 精确互相关，fftconvolve 计算、correlation_lags 换算延迟（默认路径，5 s 扫频约 30 ms）
+- align_lag(): 默认即 correlation_lag；指定 decimation > 1 时改为由粗到细搜索（近似，需调用方确认激励适用）
+    1. 两路信号按 decimation 分块求均值降采样，在降采样信号上做全互相关，取 |互相关| 最大的几个候选
+    2. 在原采样率下，对每个候选附近 ±2*decimation 个延迟逐个计算精确互相关（重叠部分点积），取最大者
+  细搜索使用与 correlate 相同的精确值，因此只要真实峰落在候选窗口内，结果与全互相关完全一致；
+  降采样为分块均值、没有抗混叠滤波，激励在 sr / (2 * decimation) 以下能量不足时（如 6-18 kHz 扫频）粗峰会丢失、
+  结果错误，因此不作为默认；信号较短时直接走精确路径。
+- pad_stimulus(): 播放前后补零，NumPy 预分配，替代 [0] * n + list(data) 的列表拼接
+"""
+
+from typing import Optional
+
+import numpy as np
+from scipy import signal
+
+# 由粗到细搜索时常用的降采样倍数（需显式传入）；信号短于 MIN_COARSE_FRAMES 时不降采样
+COARSE_DECIMATION = 8
+MIN_COARSE_FRAMES = 16384
+# 粗搜索保留的候选峰个数
+COARSE_CANDIDATES = 3
+
+
+def pad_stimulus(data, prepare_frames: int = 0, prolong_frames: int = 0, dtype=None) -> np.ndarray:
+    """在激励前补 prepare_frames 个零、后补 prolong_frames 个零"""
+    data = np.asarray(data, dtype=dtype)
+    padded = np.zeros(prepare_frames + len(data) + prolong_frames, dtype=data.dtype)
+    padded[prepare_frames:prepare_frames + len(data)] = data
+    return padded
+
+
+def correlation_lag(stimulus: np.ndarray, recorded: np.ndarray) -> int:
+    """精确全互相关的对齐延迟，与 argmax(|correlate(recorded, stimulus)|) - len(stimulus) + 1 相同"""
+    stimulus = np.asarray(stimulus, dtype=np.float64)
+    recorded = np.asarray(recorded, dtype=np.float64)
+    corr = signal.fftconvolve(recorded, stimulus[::-1], mode="full")
+    lags = signal.correlation_lags(len(recorded), len(stimulus), mode="full")
+    return int(lags[np.argmax(np.abs(corr))])
+
+
+def _block_mean(x: np.ndarray, factor: int) -> np.ndarray:
+    usable = len(x) // factor * factor
+    return x[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32)
+
+
+def _lag_value(stimulus: np.ndarray, recorded: np.ndarray, lag: int) -> float:
+    """延迟 lag 处的精确互相关值：sum(recorded[n + lag] * stimulus[n])"""
+    if lag >= 0:
+        rec = recorded[lag:lag + len(stimulus)]
+        return float(np.dot(rec, stimulus[:len(rec)]))
+    stim = stimulus[-lag:-lag + len(recorded)]
+    return float(np.dot(recorded[:len(stim)], stim))
+
+
+def align_lag(stimulus: np.ndarray, recorded: np.ndarray, decimation: Optional[int] = None) -> int:
+    """对齐延迟；decimation 为 None/<=1（默认）或信号过短时使用精确的 correlation_lag，否则由粗到细搜索"""
+    stimulus = np.asarray(stimulus, dtype=np.float64)
+    recorded = np.asarray(recorded, dtype=np.float64)
+    if not decimation or decimation <= 1 or min(len(stimulus), len(recorded)) < max(MIN_COARSE_FRAMES, 4 * decimation):
+        return correlation_lag(stimulus, recorded)
+
+    coarse_stim = _block_mean(stimulus, decimation)
+    coarse_rec = _block_mean(recorded, decimation)
+    coarse_corr = np.abs(signal.fftconvolve(coarse_rec, coarse_stim[::-1], mode="full"))
+    coarse_lags = signal.correlation_lags(len(coarse_rec), len(coarse_stim), mode="full")
+    top = np.argpartition(coarse_corr, -COARSE_CANDIDATES)[-COARSE_CANDIDATES:]
+
+    min_lag, max_lag = -(len(stimulus) - 1), len(recorded) - 1
+    candidates = set()
+    for centre in coarse_lags[top] * decimation:
+        low, high = max(min_lag, centre - 2 * decimation), min(max_lag, centre + 2 * decimation)
+        candidates.update(range(int(low), int(high) + 1))
+    # 与 argmax 相同：值相等时取最小延迟
+    lags = sorted(candidates)
+    values = np.abs([_lag_value(stimulus, recorded, lag) for lag in lags])
+    return int(lags[int(np.argmax(values))])
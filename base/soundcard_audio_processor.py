@@ -2,10 +2,10 @@ import multiprocessing
 import os
 
 import numpy as np
-from scipy import signal
 from scipy.io import wavfile
 
 from base.log_manager import LogManager
+from base.signal_alignment import align_lag, pad_stimulus
 from base.sound_device_manager import sd
 from consts import error_code
 
@@ -19,7 +19,7 @@ class SoundcardAudioProcessor(object):
         data = stimulus_dict.get("data") * stimulus_dict.get("amplitude")
         prepare_frames = record_dict.get("prepare_frames", 1000)
         prolong_frames = record_dict.get("prolong_frames", 10000)
-        prolong_data = [0] * prepare_frames + list(data) + [0] * prolong_frames
+        prolong_data = pad_stimulus(data, prepare_frames, prolong_frames)
         sr = stimulus_dict.get("sr")
         rec_data = sd.playrec(prolong_data, samplerate=sr, channels=1, blocking=True).T[0]
         align_frames = self.calculate_alignment(prolong_data, rec_data)
@@ -153,20 +153,22 @@ class SoundcardAudioProcessor(object):
             os.makedirs(directory)
 
     @staticmethod
-    def calculate_alignment(stimulus_signal, recorded_signal):
+    def calculate_alignment(stimulus_signal, recorded_signal, decimation=None):
         """
+        Cross-correlation alignment (see base.signal_alignment), exact by default.
         Args:
             stimulus_signal: np.ndarray
                 The stimulus audio signal.
             recorded_signal: np.ndarray
                 The recorded audio signal.
+            decimation: int
+                Opt-in decimation factor of the approximate coarse-to-fine search;
+                None or 1 for the exact full correlation.
         Returns:
             align_frames: int
                 The index of the alignment frames.
         """
-        corr = signal.correlate(recorded_signal, stimulus_signal)
-        align_frames = np.argmax(np.abs(corr)) - len(stimulus_signal) + 1
-        return align_frames
+        return align_lag(stimulus_signal, recorded_signal, decimation)
 
     def start_process(self, process):
         """
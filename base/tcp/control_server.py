@@ -0,0 +1,273 @@
+"""
+本地控制/查询服务模块（asyncio）
+
+为无界面运行的工位提供远程控制与状态查询，单个端口同时支持两种协议：
+- JSON 行协议：每行一个请求 {"cmd": "status", ...}，每行一个响应 {"code": 0, "data": ...}，连接可复用
+- 简易 HTTP/1.1：GET/POST 路由，JSON 响应体，每个请求后关闭连接，便于 curl 或浏览器直接访问
+
+支持的命令（HTTP 路由）：
+- status           (GET  /status)                    录音/分析状态、队列深度、最新健康分数
+- health_scores    (GET  /health_scores)             最新各通道健康分数
+- results          (GET  /results?n=20)              最近 N 条分析结果
+- record_audio     (POST /record)                    开始录音
+- stop_record      (POST /stop)                      停止录音
+- get_settings     (GET  /settings)                  当前分析设置
+- update_settings  (POST /settings, body 为 JSON)    修改分析设置并重新加载
+
+station 为被控对象（如 HeadlessController），需提供：
+record_audio() / stop_record() / update_analysis_settings(dict) -> (code, msg)，
+get_status() / get_health_scores() / get_analysis_settings() -> dict，get_recent_results(n) -> list。
+可能阻塞的调用在线程池中执行，不阻塞事件循环。
+
+使用示例：
+    server = ControlServer(station, host="127.0.0.1", port=50200)
+    server.start()          # 后台线程运行；或 server.serve_forever() 在当前线程运行
+    ...
+    server.stop()
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from base.log_manager import LogManager
+from consts import error_code
+
+logger = LogManager.set_log_handler("core")
+
+HTTP_METHODS = (b"GET ", b"POST ", b"PUT ", b"DELETE ", b"HEAD ", b"OPTIONS ")
+
+HTTP_ROUTES = {
+    ("GET", "/status"): "status",
+    ("GET", "/health_scores"): "health_scores",
+    ("GET", "/results"): "results",
+    ("POST", "/record"): "record_audio",
+    ("POST", "/stop"): "stop_record",
+    ("GET", "/settings"): "get_settings",
+    ("POST", "/settings"): "update_settings",
+}
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ControlServer:
+    def __init__(
+        self,
+        station,
+        host: str = "127.0.0.1",
+        port: int = 50200,
+        *,
+        max_request_size: int = 64 * 1024,
+        max_results: int = 500,
+    ):
+        self.station = station
+        self.host = host
+        self.port = int(port)
+        self.max_request_size = int(max_request_size)
+        self.max_results = int(max_results)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._clients = set()
+
+    # ---------------- 生命周期 ---------------- #
+
+    def start(self):
+        """在后台线程中运行服务，端口绑定完成后返回。"""
+        if self._thread is not None:
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self.serve_forever, name="control-server", daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+
+    def serve_forever(self):
+        """在当前线程运行事件循环，直到 stop() 被调用。"""
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            logger.error(f"控制服务异常退出: {e}")
+        finally:
+            self._started.set()
+
+    def stop(self):
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None:
+            try:
+                loop.call_soon_threadsafe(stop_event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, limit=self.max_request_size
+        )
+        # 端口为 0 时由系统分配，回写实际端口
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info(f"控制服务已启动 {self.host}:{self.port}")
+        self._started.set()
+        try:
+            async with server:
+                await self._stop_event.wait()
+                server.close()
+                # 主动关闭仍在连接中的客户端，等待其处理协程退出
+                for writer in list(self._clients):
+                    writer.close()
+                await asyncio.sleep(0)
+        finally:
+            self._loop = None
+            self._stop_event = None
+            logger.info("控制服务已停止")
+
+    # ---------------- 连接处理 ---------------- #
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(self._encode_line(error_code.INVALID_TYPE_DATA, "请求过长"))
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                if line.startswith(HTTP_METHODS):
+                    await self._handle_http(line, reader, writer)
+                    break
+                if not line.strip():
+                    continue
+                code, data = await self._handle_json_line(line)
+                writer.write(self._encode_line(code, data))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"控制服务处理连接失败: {e}")
+        finally:
+            self._clients.discard(writer)
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _handle_json_line(self, line: bytes) -> Tuple[int, Any]:
+        try:
+            request = json.loads(line.decode("utf-8"))
+        except Exception as e:
+            return error_code.INVALID_TYPE_DATA, f"JSON 解析失败: {e}"
+        if not isinstance(request, dict) or not request.get("cmd"):
+            return error_code.INVALID_TYPE_DATA, "请求必须为包含 cmd 的 JSON 对象"
+        params = {k: v for k, v in request.items() if k != "cmd"}
+        return await self.dispatch(str(request["cmd"]), params)
+
+    async def _handle_http(self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            await self._write_http(writer, 400, {"code": error_code.INVALID_TYPE_DATA, "data": "请求行格式错误"})
+            return
+        headers = {}
+        while True:
+            header_line = await reader.readline()
+            if not header_line or header_line in (b"\r\n", b"\n"):
+                break
+            name, _, value = header_line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        content_length = int(headers.get("content-length", 0) or 0)
+        if content_length > self.max_request_size:
+            await self._write_http(writer, 413, {"code": error_code.INVALID_TYPE_DATA, "data": "请求体过大"})
+            return
+        if content_length > 0:
+            body = await reader.readexactly(content_length)
+
+        url = urlsplit(target)
+        cmd = HTTP_ROUTES.get((method.upper(), url.path.rstrip("/") or "/"))
+        if cmd is None:
+            await self._write_http(writer, 404, {"code": error_code.INVALID_QUERY, "data": f"未知路由: {method} {url.path}"})
+            return
+        params: Dict[str, Any] = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if body:
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except Exception as e:
+                await self._write_http(writer, 400, {"code": error_code.INVALID_TYPE_DATA, "data": f"JSON 解析失败: {e}"})
+                return
+            if cmd == "update_settings":
+                params["settings"] = payload
+            elif isinstance(payload, dict):
+                params.update(payload)
+
+        code, data = await self.dispatch(cmd, params)
+        if code == error_code.OK:
+            status = 200
+        elif code == error_code.UNKNOWN_ERROR:
+            status = 500
+        else:
+            status = 400
+        await self._write_http(writer, status, {"code": code, "data": data})
+
+    # ---------------- 命令分发 ---------------- #
+
+    async def dispatch(self, cmd: str, params: Dict[str, Any]) -> Tuple[int, Any]:
+        loop = asyncio.get_running_loop()
+        try:
+            if cmd == "status":
+                return error_code.OK, await loop.run_in_executor(None, self.station.get_status)
+            if cmd == "health_scores":
+                return error_code.OK, await loop.run_in_executor(None, self.station.get_health_scores)
+            if cmd == "results":
+                try:
+                    n = int(params.get("n", 20))
+                except (TypeError, ValueError):
+                    return error_code.INVALID_TYPE_DATA, "n 必须为整数"
+                n = max(0, min(n, self.max_results))
+                return error_code.OK, await loop.run_in_executor(None, self.station.get_recent_results, n)
+            if cmd == "record_audio":
+                return await loop.run_in_executor(None, self.station.record_audio)
+            if cmd == "stop_record":
+                return await loop.run_in_executor(None, self.station.stop_record)
+            if cmd == "get_settings":
+                return error_code.OK, await loop.run_in_executor(None, self.station.get_analysis_settings)
+            if cmd == "update_settings":
+                settings = params.get("settings")
+                if not isinstance(settings, dict):
+                    return error_code.INVALID_TYPE_DATA, "settings 必须为 JSON 对象"
+                return await loop.run_in_executor(None, self.station.update_analysis_settings, settings)
+        except Exception as e:
+            logger.error(f"控制命令 {cmd} 执行失败: {e}")
+            return error_code.UNKNOWN_ERROR, f"{cmd} 执行失败: {e}"
+        return error_code.INVALID_QUERY, f"未知命令: {cmd}"
+
+    # ---------------- 编码 ---------------- #
+
+    @staticmethod
+    def _encode_line(code: int, data: Any) -> bytes:
+        return json.dumps({"code": code, "data": data}, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+    @staticmethod
+    async def _write_http(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
@@ -0,0 +1,293 @@
+"""
+分析结果流式发布模块
+
+将每个分析窗口的健康分数与敲击检测指标实时推送给产线控制器：
+- 本地 TCP 服务端，可同时接入多个订阅端；另可选 UDP 单播目标
+- 结果按 batch_interval_sec 或 max_batch_size 合批，每批编码一次后分发给所有订阅端
+- 编码：ndjson（每条记录一行 JSON，默认）或 msgpack（需安装 msgpack，记录首尾相接的流）
+- 限流：令牌桶限制每秒发布的记录数，超出部分丢弃最旧记录
+- 慢订阅端：每个订阅端有独立的有界队列，满时丢弃最旧批次，不影响其他订阅端与分析流程
+
+使用示例：
+    publisher = ResultPublisher(host="0.0.0.0", port=50100)
+    publisher.start()
+    publisher.publish_results(job_id, run_peak_detection_results)
+    ...
+    publisher.stop()
+"""
+
+import json
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from base.log_manager import LogManager
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+logger = LogManager.set_log_handler("core")
+
+
+def build_result_records(result_packets: Sequence[dict], job_id: Optional[str] = None,
+                         timestamp: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    将 run_peak_detection 的结果包展开为逐通道记录：
+    {"ts", "job_id", "channel", "health_score", "motor_state", "is_running", "is_knocked",
+     "max_zscore", "max_flux", "energy_level"}
+    """
+    ts = time.time() if timestamp is None else float(timestamp)
+    records = []
+    for packet in result_packets or []:
+        if not isinstance(packet, dict):
+            continue
+        health_scores = packet.get("health_scores") or {}
+        if not isinstance(health_scores, dict):
+            health_scores = {}
+        for row in packet.get("result") or []:
+            if not isinstance(row, (list, tuple)) or len(row) < 2:
+                continue
+            try:
+                detail = json.loads(row[1]) if isinstance(row[1], str) else dict(row[1])
+            except Exception:
+                continue
+            channel = detail.get("channel") or str(row[0]).split("::")[-1]
+            health_score = health_scores.get(str(channel))
+            records.append(
+                {
+                    "ts": ts,
+                    "job_id": job_id,
+                    "channel": channel,
+                    "health_score": float(health_score) if isinstance(health_score, (int, float)) else None,
+                    "motor_state": detail.get("motor_state"),
+                    "is_running": detail.get("is_running"),
+                    "is_knocked": detail.get("is_knocked"),
+                    "max_zscore": detail.get("max_zscore"),
+                    "max_flux": detail.get("max_flux"),
+                    "energy_level": detail.get("energy_level"),
+                }
+            )
+    return records
+
+
+class _Subscriber:
+    def __init__(self, sock: socket.socket, address, queue_size: int):
+        self.sock = sock
+        self.address = address
+        self.batches = deque(maxlen=max(1, int(queue_size)))
+        self.dropped_batches = 0
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def offer(self, batch: bytes):
+        with self.condition:
+            if len(self.batches) == self.batches.maxlen:
+                self.dropped_batches += 1
+            self.batches.append(batch)
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ResultPublisher:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 50100,
+        *,
+        encoding: str = "ndjson",
+        batch_interval_sec: float = 0.1,
+        max_batch_size: int = 100,
+        max_records_per_sec: float = 200.0,
+        client_queue_size: int = 100,
+        udp_targets: Iterable[Tuple[str, int]] = (),
+        send_timeout_sec: float = 2.0,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.encoding = str(encoding or "ndjson").lower()
+        self.batch_interval_sec = max(0.001, float(batch_interval_sec))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_records_per_sec = float(max_records_per_sec)
+        self.client_queue_size = int(client_queue_size)
+        self.udp_targets = [(str(h), int(p)) for h, p in udp_targets]
+        self.send_timeout_sec = float(send_timeout_sec)
+
+        if self.encoding not in ("ndjson", "msgpack"):
+            raise ValueError(f"不支持的编码: {self.encoding}")
+        if self.encoding == "msgpack" and msgpack is None:
+            raise ValueError("msgpack 编码需要安装 msgpack")
+
+        self.published_count = 0
+        self.rate_limited_count = 0
+
+        self._pending = deque(maxlen=self.max_batch_size * 10)
+        self._pending_condition = threading.Condition()
+        self._subscribers: List[_Subscriber] = []
+        self._subscribers_lock = threading.Lock()
+        self._server_sock: Optional[socket.socket] = None
+        self._udp_sock: Optional[socket.socket] = None
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._tokens = self.max_records_per_sec
+        self._last_refill = time.monotonic()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._subscribers_lock:
+            return len(self._subscribers)
+
+    def start(self):
+        if self._server_sock is not None:
+            return
+        self._stop_event.clear()
+        server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server_sock.bind((self.host, self.port))
+        server_sock.listen()
+        server_sock.settimeout(0.5)
+        self._server_sock = server_sock
+        # 端口为 0 时由系统分配，回写实际端口
+        self.port = server_sock.getsockname()[1]
+        if self.udp_targets:
+            self._udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._udp_sock.setblocking(False)
+        self._threads = [
+            threading.Thread(target=self._accept_loop, name="result-publisher-accept", daemon=True),
+            threading.Thread(target=self._batch_loop, name="result-publisher-batch", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"结果发布服务已启动 {self.host}:{self.port} ({self.encoding})")
+
+    def stop(self):
+        self._stop_event.set()
+        with self._pending_condition:
+            self._pending_condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        with self._subscribers_lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for subscriber in subscribers:
+            subscriber.close()
+        for sock in (self._server_sock, self._udp_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        self._server_sock = None
+        self._udp_sock = None
+
+    def publish(self, record: Dict[str, Any]):
+        """发布一条记录（线程安全，不阻塞）。"""
+        with self._pending_condition:
+            self._pending.append(record)
+            if len(self._pending) >= self.max_batch_size:
+                self._pending_condition.notify()
+
+    def publish_results(self, job_id: Optional[str], result_packets: Sequence[dict]):
+        for record in build_result_records(result_packets, job_id=job_id):
+            self.publish(record)
+
+    def _encode(self, records: List[Dict[str, Any]]) -> bytes:
+        if self.encoding == "msgpack":
+            return b"".join(msgpack.packb(record, use_bin_type=True) for record in records)
+        return b"".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for record in records
+        )
+
+    def _take_allowed(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 令牌桶限流：超出配额时保留最新的记录
+        if self.max_records_per_sec <= 0:
+            return records
+        now = time.monotonic()
+        self._tokens = min(
+            self.max_records_per_sec, self._tokens + (now - self._last_refill) * self.max_records_per_sec
+        )
+        self._last_refill = now
+        allowed = int(self._tokens)
+        if len(records) > allowed:
+            self.rate_limited_count += len(records) - allowed
+            records = records[len(records) - allowed:] if allowed > 0 else []
+        self._tokens -= len(records)
+        return records
+
+    def _batch_loop(self):
+        while not self._stop_event.is_set():
+            with self._pending_condition:
+                if len(self._pending) < self.max_batch_size:
+                    self._pending_condition.wait(self.batch_interval_sec)
+                records = list(self._pending)
+                self._pending.clear()
+            records = self._take_allowed(records)
+            if not records:
+                continue
+            for start in range(0, len(records), self.max_batch_size):
+                self._dispatch(self._encode(records[start:start + self.max_batch_size]))
+            self.published_count += len(records)
+
+    def _dispatch(self, batch: bytes):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(batch)
+        if self._udp_sock is not None:
+            for target in self.udp_targets:
+                try:
+                    self._udp_sock.sendto(batch, target)
+                except OSError as e:
+                    logger.warning(f"UDP 发布到 {target} 失败: {e}")
+
+    def _accept_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                sock, address = self._server_sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.settimeout(self.send_timeout_sec)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = _Subscriber(sock, address, self.client_queue_size)
+            with self._subscribers_lock:
+                self._subscribers.append(subscriber)
+            threading.Thread(
+                target=self._subscriber_loop, args=(subscriber,), name="result-publisher-client", daemon=True
+            ).start()
+            logger.info(f"结果订阅端已连接: {address}")
+
+    def _subscriber_loop(self, subscriber: _Subscriber):
+        try:
+            while not self._stop_event.is_set():
+                with subscriber.condition:
+                    while not subscriber.batches and not subscriber.closed:
+                        subscriber.condition.wait(0.5)
+                        if self._stop_event.is_set():
+                            return
+                    if subscriber.closed:
+                        return
+                    batch = subscriber.batches.popleft()
+                subscriber.sock.sendall(batch)
+        except OSError as e:
+            logger.info(f"结果订阅端断开: {subscriber.address} ({e})")
+        finally:
+            with self._subscribers_lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+            subscriber.close()
+            if subscriber.dropped_batches:
+                logger.warning(f"订阅端 {subscriber.address} 处理过慢，共丢弃 {subscriber.dropped_batches} 批结果")
@@ -1,8 +1,11 @@
 import argparse
 import json
+import queue
+import select
 import socket
 import sys
-from typing import Optional
+import threading
+from typing import Callable, Optional
 
 from base.log_manager import LogManager
 
@@ -14,7 +17,7 @@ class TcpClient:
     - 支持可选本地端口绑定
     - 支持三种封装：newline / length / raw
     - 支持发送 dict 或 JSON 文件
-    - 可选等待响应（按行或直到连接关闭）
+    - 可选等待响应（按 framing 分帧读取，见 FramedReader）
     """
 
     def __init__(
@@ -27,6 +30,7 @@ class TcpClient:
         timeout_sec: float = 10.0,
         framing: str = "newline",
         wait_response: bool = True,
+        max_frame_size: int = 1 << 20,
     ):
         self.server_host = server_host
         self.server_port = int(server_port)
@@ -35,6 +39,7 @@ class TcpClient:
         self.timeout_sec = float(timeout_sec)
         self.framing = str(framing or "newline").lower()
         self.wait_response = bool(wait_response)
+        self.max_frame_size = int(max_frame_size)
 
         if self.framing not in ("newline", "length", "raw"):
             raise ValueError(f"不支持的 framing: {self.framing}")
@@ -47,7 +52,17 @@ class TcpClient:
         return self._send_payload(payload_bytes)
 
     def _send_payload(self, payload_bytes: bytes) -> Optional[bytes]:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        with self._open_socket() as sock:
+            # 发送数据（封装）
+            sock.sendall(self._frame_payload(payload_bytes))
+
+            if not self.wait_response:
+                return None
+            return self._read_response(sock)
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
             sock.settimeout(self.timeout_sec)
             # 绑定本地地址与端口（如果指定）
             if self.bind_host or self.bind_port:
@@ -57,38 +72,308 @@ class TcpClient:
 
             # 连接服务端
             sock.connect((self.server_host, int(self.server_port)))
+        except Exception:
+            sock.close()
+            raise
+        return sock
 
-            # 发送数据（封装）
-            if self.framing == "length":
-                length_prefix = len(payload_bytes).to_bytes(4, byteorder="big", signed=False)
-                sock.sendall(length_prefix + payload_bytes)
-            elif self.framing == "newline":
-                sock.sendall(payload_bytes + b"\n")
-            else:
-                sock.sendall(payload_bytes)
-
-            if not self.wait_response:
-                return None
-            return self._read_response(sock)
+    def _frame_payload(self, payload_bytes: bytes) -> bytes:
+        if self.framing == "length":
+            length_prefix = len(payload_bytes).to_bytes(4, byteorder="big", signed=False)
+            return length_prefix + payload_bytes
+        if self.framing == "newline":
+            return payload_bytes + b"\n"
+        return payload_bytes
 
     def _read_response(self, sock: socket.socket) -> bytes:
-        # 简单读取响应：优先按行读取（遇到换行停止），否则读到连接关闭
+        # 按 framing 读取一帧响应：newline / raw 读到第一个换行（含换行符）或连接关闭，
+        # length 读取 4 字节长度前缀的负载；超时返回已收到的部分（与改动前的单次请求行为一致）。
+        # 超过最大帧长或长度前缀帧中途断开时抛出异常，不把不完整的数据当作响应
         sock.settimeout(self.timeout_sec)
-        chunks = []
+        reader = FramedReader(sock, self.framing, max_frame_size=self.max_frame_size)
         try:
-            # 尝试按行读取
-            while True:
-                b = sock.recv(1)
-                if not b:
-                    break
-                chunks.append(b)
-                if b == b"\n":
-                    break
+            return reader.read_frame()
         except socket.timeout:
-            pass
-        except Exception as e:
+            return reader.drain()
+        except (FrameTooLargeError, OSError) as e:
             logger.error(f"Failed to read response: {e}")
-        return b"".join(chunks) if chunks else b""
+            raise
+
+
+class FrameTooLargeError(ValueError):
+    pass
+
+
+class FramedReader:
+    """
+    基于 recv_into 的缓冲分帧读取器：
+    - 复用固定大小的 bytearray 接收缓冲，每次系统调用读取尽可能多的数据
+    - 已接收但未消费的字节保留在 pending 中，供同一连接上的下一帧使用
+    - 单帧超过 max_frame_size 时抛出 FrameTooLargeError
+    - raw 没有消息边界，与 newline 相同读到第一个换行或连接关闭为止（不会一直等到对端关闭）
+    - 连接在帧中途关闭：length 抛出 ConnectionError；newline / raw 返回剩余的不完整行，
+      strict=True 时同样抛出 ConnectionError（长连接上不完整的帧不能当作响应）
+    """
+
+    LENGTH_PREFIX_SIZE = 4
+
+    def __init__(self, sock: socket.socket, framing: str = "newline", *, max_frame_size: int = 1 << 20,
+                 buffer_size: int = 64 << 10):
+        self.sock = sock
+        self.framing = str(framing or "newline").lower()
+        self.max_frame_size = int(max_frame_size)
+        self._buffer = bytearray(int(buffer_size))
+        self._view = memoryview(self._buffer)
+        self._pending = bytearray()
+
+        if self.framing not in ("newline", "length", "raw"):
+            raise ValueError(f"不支持的 framing: {self.framing}")
+
+    def read_frame(self, strict: bool = False) -> bytes:
+        if self.framing == "length":
+            return self._read_length_prefixed(strict)
+        return self._read_line(strict)
+
+    def drain(self) -> bytes:
+        """取出并清空尚未组成完整帧的已接收字节。"""
+        data = bytes(self._pending)
+        self._pending.clear()
+        return data
+
+    def _fill(self) -> int:
+        received = self.sock.recv_into(self._buffer)
+        if received:
+            self._pending += self._view[:received]
+        return received
+
+    def _take(self, size: int) -> bytes:
+        frame = bytes(self._pending[:size])
+        del self._pending[:size]
+        return frame
+
+    def _read_line(self, strict: bool = False) -> bytes:
+        search_from = 0
+        while True:
+            newline_idx = self._pending.find(b"\n", search_from)
+            if newline_idx >= 0:
+                return self._take(newline_idx + 1)
+            if len(self._pending) > self.max_frame_size:
+                raise FrameTooLargeError(f"响应超过最大帧长 {self.max_frame_size} 字节")
+            search_from = len(self._pending)
+            if not self._fill():
+                if strict:
+                    raise ConnectionError(f"连接在响应行中途关闭（已收到 {len(self._pending)} 字节）")
+                # 连接关闭：返回剩余的不完整行
+                return self.drain()
+
+    def _read_length_prefixed(self, strict: bool = False) -> bytes:
+        if not self._fill_to(self.LENGTH_PREFIX_SIZE):
+            if strict or self._pending:
+                raise ConnectionError(f"连接在长度前缀中途关闭（已收到 {len(self._pending)} 字节）")
+            return b""
+        frame_size = int.from_bytes(self._pending[:self.LENGTH_PREFIX_SIZE], byteorder="big", signed=False)
+        if frame_size > self.max_frame_size:
+            raise FrameTooLargeError(f"响应长度 {frame_size} 超过最大帧长 {self.max_frame_size} 字节")
+        if not self._fill_to(self.LENGTH_PREFIX_SIZE + frame_size):
+            raise ConnectionError(f"连接在长度前缀帧中途关闭（期望 {frame_size} 字节）")
+        del self._pending[:self.LENGTH_PREFIX_SIZE]
+        return self._take(frame_size)
+
+    def _fill_to(self, size: int) -> bool:
+        while len(self._pending) < size:
+            if not self._fill():
+                return False
+        return True
+
+
+class PersistentTcpClient(TcpClient):
+    """
+    长连接 TCP 客户端：
+    - 后台发送线程维护一条长连接，调用方 send_dict_async 仅入队，不阻塞（可在 GUI 线程调用）
+    - 有界发送队列，满时丢弃最旧的消息
+    - 连接失败或断开时按指数退避重连（reconnect_initial_sec 起，翻倍至 reconnect_max_sec）
+    - fire_and_forget=True 时不读取响应；否则读取响应并回调 on_response(bytes)，只回调完整的帧；
+      读取超时、帧过大或连接中途断开时丢弃该响应并关闭连接（剩余字节不再可信），下一条消息发送前重连，
+      已发出的消息不重发
+    - raw 封装没有消息边界，每条消息发送后即关闭连接；newline/length 封装要求服务端在同一连接上
+      持续接收多条消息（每条消息一连接的服务端请使用 TcpClient）
+    """
+
+    def __init__(
+        self,
+        server_host: str,
+        server_port: int,
+        *,
+        queue_size: int = 100,
+        fire_and_forget: bool = True,
+        reconnect_initial_sec: float = 0.5,
+        reconnect_max_sec: float = 30.0,
+        on_response: Optional[Callable[[bytes], None]] = None,
+        **kwargs,
+    ):
+        super().__init__(server_host, server_port, wait_response=not fire_and_forget, **kwargs)
+        self.fire_and_forget = bool(fire_and_forget)
+        self.reconnect_initial_sec = float(reconnect_initial_sec)
+        self.reconnect_max_sec = float(reconnect_max_sec)
+        self.on_response = on_response
+        self.dropped_count = 0
+
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._sock: Optional[socket.socket] = None
+        self._reader: Optional[FramedReader] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._sock is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sender_loop, name="tcp-sender", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_sec: float = 2.0):
+        self._stop_event.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_sec)
+            self._thread = None
+        self._close_socket()
+
+    def send_dict_async(self, data_obj: dict) -> bool:
+        """
+        将 dict 编码后放入发送队列并立即返回；队列满时丢弃最旧的一条。
+        返回 False 表示发送线程未运行。
+        """
+        if not isinstance(data_obj, dict):
+            raise TypeError("data_obj 必须是 dict")
+        payload_text = json.dumps(data_obj, ensure_ascii=False, separators=(",", ":"))
+        return self.send_payload_async(payload_text.encode("utf-8"))
+
+    def send_payload_async(self, payload_bytes: bytes) -> bool:
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        frame = self._frame_payload(payload_bytes)
+        while True:
+            try:
+                self._queue.put_nowait(frame)
+                return True
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped_count += 1
+                    logger.warning(f"TCP 发送队列已满，丢弃最旧消息（累计 {self.dropped_count} 条）")
+                except queue.Empty:
+                    pass
+
+    def _sender_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                frame = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if frame is None:
+                break
+            self._deliver(frame)
+        self._close_socket()
+
+    def _deliver(self, frame: bytes):
+        # 发送失败时重连后重试，直到成功或客户端停止
+        while not self._stop_event.is_set():
+            sock = self._ensure_connected()
+            if sock is None:
+                return
+            try:
+                sock.sendall(frame)
+            except OSError as e:
+                logger.warning(f"TCP 发送失败，准备重连: {e}")
+                self._close_socket()
+                continue
+            if not self.fire_and_forget:
+                self._receive_response(sock)
+            if self.framing == "raw":
+                self._close_socket()
+            return
+
+    def _receive_response(self, sock: socket.socket):
+        reader = self._reader
+        try:
+            sock.settimeout(self.timeout_sec)
+            response = reader.read_frame(strict=True)
+        except socket.timeout:
+            logger.warning(f"TCP 响应读取超时，丢弃未读完的帧并重连（已收到 {len(reader.drain())} 字节）")
+            self._close_socket()
+            return
+        except (FrameTooLargeError, OSError) as e:
+            logger.warning(f"TCP 响应读取失败，关闭连接: {e}")
+            self._close_socket()
+            return
+        if self.on_response is not None:
+            self.on_response(response)
+
+    def _ensure_connected(self) -> Optional[socket.socket]:
+        if self._sock is not None and not self._peer_closed(self._sock):
+            return self._sock
+        self._close_socket()
+        delay = self.reconnect_initial_sec
+        while not self._stop_event.is_set():
+            try:
+                self._sock = self._open_socket()
+                self._reader = FramedReader(self._sock, self.framing, max_frame_size=self.max_frame_size)
+                logger.info(f"TCP 已连接 {self.server_host}:{self.server_port}")
+                return self._sock
+            except OSError as e:
+                logger.warning(f"TCP 连接 {self.server_host}:{self.server_port} 失败，{delay:.1f}s 后重试: {e}")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.reconnect_max_sec)
+        return None
+
+    @staticmethod
+    def _peer_closed(sock: socket.socket) -> bool:
+        # 对端关闭时 socket 可读且 peek 到 0 字节；未关闭时 select 立即返回不可读
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            if not readable:
+                return False
+            return sock.recv(1, socket.MSG_PEEK) == b""
+        except (OSError, ValueError):
+            return True
+
+    def _close_socket(self):
+        sock, self._sock = self._sock, None
+        self._reader = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+_persistent_clients = {}
+_persistent_clients_lock = threading.Lock()
+
+
+def get_persistent_client(server_host: str, server_port: int, **kwargs) -> PersistentTcpClient:
+    """
+    获取（必要时创建并启动）指向 server_host:server_port 的共享长连接客户端。
+    同一地址与封装方式复用同一个客户端与发送线程。
+    """
+    key = (str(server_host), int(server_port), str(kwargs.get("framing", "newline")).lower())
+    with _persistent_clients_lock:
+        client = _persistent_clients.get(key)
+        if client is None:
+            client = PersistentTcpClient(server_host, server_port, **kwargs)
+            _persistent_clients[key] = client
+        client.start()
+        return client
 
 
 def send_dict(
@@ -0,0 +1,90 @@
+"""
+内存映射 WAV 读取模块
+
+通过 scipy.io.wavfile 的 mmap 模式把 WAV 的 data 块映射为 (帧数, 通道数) 的数组，打开文件只解析文件头，
+播放或分析时按需读取任意区间并转换为 float32（比例与 librosa.load 一致），
+长时间多通道录音无需整体解码进内存，首帧可立即播放。
+
+24 bit 等 mmap 不支持的格式由调用方回退到整体加载。
+
+使用示例：
+    reader = MappedWavReader(path)
+    block = reader.read(0, 1024)       # (1024, channels) float32
+    reader.close()
+"""
+
+import numpy as np
+from scipy.io import wavfile
+
+
+class MappedWavReader:
+    def __init__(self, path: str):
+        """
+        参数:
+            path (str): WAV 文件路径（PCM 8/16/32 bit 或 float32/float64）
+        异常:
+            ValueError: 格式不支持内存映射（如 24 bit PCM）或文件损坏
+        """
+        self.path = path
+        sample_rate, data = wavfile.read(path, mmap=True)
+        if data.ndim == 1:
+            data = data.reshape(-1, 1)
+        self.sample_rate = int(sample_rate)
+        self._data = data
+
+        if data.dtype == np.uint8:
+            self._scale, self._offset = 1.0 / 128.0, 128.0
+        elif data.dtype.kind == "i":
+            self._scale, self._offset = 1.0 / float(2 ** (8 * data.dtype.itemsize - 1)), 0.0
+        else:
+            self._scale, self._offset = 1.0, 0.0
+
+    @property
+    def n_frames(self) -> int:
+        return int(self._data.shape[0])
+
+    @property
+    def channels(self) -> int:
+        return int(self._data.shape[1])
+
+    @property
+    def shape(self):
+        return self._data.shape
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def raw(self) -> np.ndarray:
+        """映射的原始采样（未做比例转换）"""
+        return self._data
+
+    def read(self, start: int, frames: int) -> np.ndarray:
+        """读取 [start, start + frames) 区间，越界部分截断；返回 (n, channels) float32"""
+        start = max(0, int(start))
+        stop = min(self.n_frames, start + max(0, int(frames)))
+        block = np.asarray(self._data[start:stop], dtype=np.float32)
+        if self._offset:
+            block -= self._offset
+        if self._scale != 1.0:
+            block *= self._scale
+        return block
+
+    def to_array(self) -> np.ndarray:
+        """整体读取为 (frames, channels) float32"""
+        return self.read(0, self.n_frames)
+
+    def close(self):
+        """释放映射（Windows 下映射期间文件无法移动/删除）"""
+        self._data = np.zeros((0, self.channels), dtype=self._data.dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,78 @@
+"""
+激励/录音对齐耗时对比：原实现（列表补零 + scipy.signal.correlate 全互相关）与当前实现
+（pad_stimulus 预分配补零 + align_lag 精确互相关），以及可选的由粗到细搜索（--decimation，近似）。
+
+用法：
+    python benchmarks/bench_alignment.py --seconds 5 --delay 2345
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+from base.signal_alignment import COARSE_DECIMATION, align_lag, pad_stimulus  # noqa: E402
+
+
+def _best(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="激励/录音对齐耗时对比")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--sampling-rate", type=int, default=44100)
+    parser.add_argument("--delay", type=int, default=2345, help="模拟的声卡往返延迟（帧）")
+    parser.add_argument("--prepare-frames", type=int, default=1000)
+    parser.add_argument("--prolong-frames", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--decimation", type=int, default=COARSE_DECIMATION, help="由粗到细搜索的降采样倍数")
+    args = parser.parse_args()
+
+    sr = args.sampling_rate
+    t = np.arange(int(sr * args.seconds)) / sr
+    data = 0.5 * signal.chirp(t, 20, t[-1], 20000, method="logarithmic")
+    rng = np.random.default_rng(0)
+
+    def reference():
+        prolong_data = [0] * args.prepare_frames + list(data) + [0] * args.prolong_frames
+        recorded = _simulate(np.asarray(prolong_data), args.delay, rng)
+        corr = signal.correlate(recorded, prolong_data)
+        return np.argmax(np.abs(corr)) - len(prolong_data) + 1
+
+    def current(decimation=None):
+        prolong_data = pad_stimulus(data, args.prepare_frames, args.prolong_frames)
+        recorded = _simulate(prolong_data, args.delay, rng)
+        return align_lag(prolong_data, recorded, decimation)
+
+    ref_sec, ref_lag = _best(reference, args.repeat)
+    new_sec, new_lag = _best(current, args.repeat)
+    coarse_sec, coarse_lag = _best(lambda: current(args.decimation), args.repeat)
+    print(f"{args.seconds:.1f} s 扫频 @ {sr} Hz，模拟延迟 {args.delay} 帧")
+    print(f"  原实现   {ref_sec * 1e3:8.1f} ms   对齐帧 {ref_lag}")
+    print(f"  当前实现 {new_sec * 1e3:8.1f} ms   对齐帧 {new_lag}   加速 {ref_sec / new_sec:.1f}x")
+    print(
+        f"  粗到细   {coarse_sec * 1e3:8.1f} ms   对齐帧 {coarse_lag}   加速 {ref_sec / coarse_sec:.1f}x"
+        f"（decimation={args.decimation}，近似）"
+    )
+
+
+def _simulate(stimulus, delay, rng):
+    recorded = np.zeros(len(stimulus))
+    recorded[delay:] = 0.3 * stimulus[:len(stimulus) - delay]
+    return recorded + 0.01 * rng.standard_normal(len(recorded))
+
+
+if __name__ == "__main__":
+    main()
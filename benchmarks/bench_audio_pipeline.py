@@ -0,0 +1,99 @@
+"""
+AudioPipeline 采集 → 历史缓冲 → 片段提取 的吞吐测试（不需要 Qt 与声卡）。
+
+用法：
+    python benchmarks/bench_audio_pipeline.py --channels 4 --seconds 120
+
+按声卡回调的块大小（2048 帧）生成随机数据，直接调用 AudioDataManager.audio_callback 写入环形缓冲，
+每累计 flush_interval 秒的数据执行一次 flush()，每累计 analysis_interval 秒执行一次片段提取，
+统计各环节耗时与实时倍率（模拟音频时长 / 实际耗时）。不启动分析进程。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+from base.audio_pipeline import AudioPipeline  # noqa: E402
+from base.data_struct.audio_segment_extractor import AudioSegmentExtractor  # noqa: E402
+
+BLOCK_SIZE = 2048
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AudioPipeline 吞吐测试")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=120.0, help="模拟的音频时长（秒）")
+    parser.add_argument("--sampling-rate", type=int, default=44100)
+    parser.add_argument("--history-sec", type=int, default=600)
+    parser.add_argument("--flush-interval", type=float, default=0.1)
+    parser.add_argument("--analysis-interval", type=float, default=3.5)
+    parser.add_argument("--segment-duration", type=float, default=4.0)
+    args = parser.parse_args()
+
+    pipeline = AudioPipeline(
+        sampling_rate=args.sampling_rate,
+        history_sec=args.history_sec,
+        flush_interval_sec=args.flush_interval,
+    )
+    pipeline.set_device("benchmark", args.channels, list(range(args.channels)))
+    # 不打开声卡，直接向回调注入数据
+    pipeline.audio_manager.selected_channels = pipeline.selected_channels
+    extractor = AudioSegmentExtractor(
+        extract_interval=args.analysis_interval,
+        segment_duration=args.segment_duration,
+        sampling_rate=args.sampling_rate,
+    )
+    extractor.set_audio_source(pipeline.data_struct.audio_data, write_index_ref=pipeline.storage_filled_len)
+
+    rng = np.random.default_rng(0)
+    blocks = [
+        (rng.standard_normal((BLOCK_SIZE, args.channels)) * 0.1).astype(np.float32) for _ in range(16)
+    ]
+    total_frames = int(args.seconds * args.sampling_rate)
+    flush_frames = int(args.flush_interval * args.sampling_rate)
+    extract_frames = int(args.analysis_interval * args.sampling_rate)
+
+    callback_sec = flush_sec = extract_sec = 0.0
+    flush_calls = extract_calls = 0
+    since_flush = since_extract = 0
+    written = 0
+    wall_start = time.perf_counter()
+    while written < total_frames:
+        block = blocks[(written // BLOCK_SIZE) % len(blocks)]
+        t0 = time.perf_counter()
+        pipeline.audio_manager.audio_callback(block, BLOCK_SIZE, None, None)
+        callback_sec += time.perf_counter() - t0
+        written += BLOCK_SIZE
+        since_flush += BLOCK_SIZE
+        since_extract += BLOCK_SIZE
+
+        if since_flush >= flush_frames:
+            since_flush = 0
+            t0 = time.perf_counter()
+            pipeline.flush()
+            flush_sec += time.perf_counter() - t0
+            flush_calls += 1
+        if since_extract >= extract_frames:
+            since_extract = 0
+            t0 = time.perf_counter()
+            extractor._extract_segments()
+            extractor.get_extracted_segments()
+            extract_sec += time.perf_counter() - t0
+            extract_calls += 1
+    wall_sec = time.perf_counter() - wall_start
+
+    blocks_written = max(1, written // BLOCK_SIZE)
+    print(f"通道数 {args.channels}，模拟 {written / args.sampling_rate:.1f} s 音频，历史数组 {args.history_sec} s")
+    print(f"  声卡回调  {callback_sec * 1e6 / blocks_written:8.1f} us/块  （块时长 {BLOCK_SIZE / args.sampling_rate * 1e3:.1f} ms）")
+    print(f"  flush     {flush_sec * 1e3 / max(1, flush_calls):8.2f} ms/次  （{flush_calls} 次）")
+    print(f"  片段提取  {extract_sec * 1e3 / max(1, extract_calls):8.2f} ms/次  （{extract_calls} 次）")
+    print(f"  总耗时 {wall_sec:.2f} s，实时倍率 {written / args.sampling_rate / wall_sec:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
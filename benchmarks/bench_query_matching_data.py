@@ -0,0 +1,82 @@
+"""
+query_matching_data 逐条查询 与 query_matching_data_batched 临时表批量查询 的耗时对比。
+
+用法：
+    python benchmarks/bench_query_matching_data.py --rows 20000 --keys 10000
+
+在临时目录中创建独立的 SQLite 数据库（默认与线上表一致，record_time 列无索引；--index 时建立索引），
+随机抽取 keys 个查询键，分别统计两种实现的耗时并校验结果一致。
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+from base.database.db_manager import DataManage  # noqa: E402
+
+
+def _build_database(db_path, rows, with_index):
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE record_audio_data_table (record_id TEXT PRIMARY KEY, file_path TEXT, record_time TEXT)"
+    )
+    connection.executemany(
+        "INSERT INTO record_audio_data_table VALUES (?, ?, ?)",
+        ((f"id-{i}", f"/audio/{i}.wav", f"t-{i:08d}") for i in range(rows)),
+    )
+    if with_index:
+        connection.execute("CREATE INDEX idx_record_time ON record_audio_data_table (record_time)")
+    connection.commit()
+    connection.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="query_matching_data 批量查询基准测试")
+    parser.add_argument("--rows", type=int, default=20000, help="表中记录数，默认 20000")
+    parser.add_argument("--keys", type=int, default=10000, help="查询键数量，默认 10000")
+    parser.add_argument("--index", action="store_true", help="为 record_time 建立索引（默认不建立）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最小值），默认 3")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        _build_database(db_path, args.rows, args.index)
+        rng = random.Random(0)
+        data_list = [(f"t-{rng.randrange(args.rows):08d}",) for _ in range(args.keys)]
+
+        timings = {"loop": [], "batched": []}
+        with DataManage(db_path) as db:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                loop_result = db.query_matching_data(
+                    data_list, "record_audio_data_table", ["record_time"], ["file_path"]
+                )
+                timings["loop"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                batched_result = db.query_matching_data_batched(
+                    data_list, "record_audio_data_table", ["record_time"], ["file_path"]
+                )
+                timings["batched"].append(time.perf_counter() - start)
+
+                if loop_result != batched_result:
+                    print("[ERROR] 批量查询结果与逐条查询不一致", file=sys.stderr)
+                    return 1
+
+    loop_sec = min(timings["loop"])
+    batched_sec = min(timings["batched"])
+    print(f"rows={args.rows} keys={args.keys} index={args.index}")
+    print(f"loop    : {loop_sec * 1000:8.1f} ms")
+    print(f"batched : {batched_sec * 1000:8.1f} ms")
+    print(f"speed-up: {loop_sec / batched_sec:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+TcpClient 响应读取：逐字节 recv(1) 与 FramedReader（recv_into 缓冲）的吞吐对比。
+
+用法：
+    python benchmarks/bench_tcp_framed_reader.py --messages 2000 --size 4096
+
+启动本地回显服务端（同一连接上按帧回显），客户端在一条连接上发送 messages 条 size 字节的请求，
+分别用两种方式读取回显并统计耗时；length 封装只测试 FramedReader（旧实现不支持长度前缀响应）。
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+from base.tcp.tcp_client import FramedReader  # noqa: E402
+
+
+def _echo_server(server_sock: socket.socket, framing: str):
+    conn, _ = server_sock.accept()
+    with conn:
+        reader = FramedReader(conn, framing, max_frame_size=64 << 20)
+        while True:
+            frame = reader.read_frame()
+            if not frame:
+                return
+            if framing == "length":
+                conn.sendall(len(frame).to_bytes(4, byteorder="big") + frame)
+            else:
+                conn.sendall(frame)
+
+
+def _legacy_read_line(sock: socket.socket) -> bytes:
+    # 旧版 TcpClient._read_response 的实现：每字节一次系统调用
+    chunks = []
+    while True:
+        b = sock.recv(1)
+        if not b:
+            break
+        chunks.append(b)
+        if b == b"\n":
+            break
+    return b"".join(chunks)
+
+
+def _run(framing: str, mode: str, messages: int, size: int) -> float:
+    server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_sock.bind(("127.0.0.1", 0))
+    server_sock.listen(1)
+    server_thread = threading.Thread(target=_echo_server, args=(server_sock, framing), daemon=True)
+    server_thread.start()
+
+    payload = b"x" * (size - 1)
+    if framing == "length":
+        request = len(payload).to_bytes(4, byteorder="big") + payload
+    else:
+        request = payload + b"\n"
+
+    with socket.create_connection(server_sock.getsockname()) as sock:
+        reader = FramedReader(sock, framing, max_frame_size=64 << 20)
+        start = time.perf_counter()
+        for _ in range(messages):
+            sock.sendall(request)
+            response = _legacy_read_line(sock) if mode == "legacy" else reader.read_frame()
+            if len(response) < size - 1:
+                raise RuntimeError(f"响应不完整: {len(response)} 字节")
+        elapsed = time.perf_counter() - start
+    server_thread.join(timeout=2)
+    server_sock.close()
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="TCP 分帧读取基准测试")
+    parser.add_argument("--messages", type=int, default=2000, help="请求条数，默认 2000")
+    parser.add_argument("--size", type=int, default=4096, help="每条消息字节数，默认 4096")
+    args = parser.parse_args(argv)
+
+    total_mb = args.messages * args.size / (1 << 20)
+    cases = [("newline", "legacy"), ("newline", "buffered"), ("length", "buffered")]
+    for framing, mode in cases:
+        elapsed = _run(framing, mode, args.messages, args.size)
+        print(
+            f"{framing:8s} {mode:9s}: {elapsed * 1000:8.1f} ms  "
+            f"{args.messages / elapsed:9.0f} msg/s  {total_mb / elapsed:7.1f} MB/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,12 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 
 
 # DEFAULT_DIR = os.path.split(os.path.realpath(__file__))[0].replace("\\", "/") + "/../"
-DEFAULT_DIR = os.path.dirname(os.path.realpath(sys.argv[0])).replace("\\", "/") + "/"
+# 同一台机器运行多个无界面工位时，可通过 AUDIO_STATION_DIR 为每个工位指定独立的工作目录
+DEFAULT_DIR = (
+    os.path.realpath(os.environ["AUDIO_STATION_DIR"]).replace("\\", "/").rstrip("/") + "/"
+    if os.environ.get("AUDIO_STATION_DIR")
+    else os.path.dirname(os.path.realpath(sys.argv[0])).replace("\\", "/") + "/"
+)
 
 STORED_SAMPLE_PATH = DEFAULT_DIR + "audio_data/stored_sample"
 STORED_RECORDED_PATH = DEFAULT_DIR + "audio_data/stored_data"
@@ -33,6 +38,41 @@ DB_WARNING_COLUMNS = [
     "description",
 ]
 
+# 文本时间列对应的整数 epoch 列（带 B-tree 索引，用于范围查询）
+CN_TIME_FORMAT = "%Y年%m月%d日 %H时%M分%S秒"
+WARNING_EPOCH_COLUMNS = {
+    "warning_time": "warning_epoch",
+    "record_time": "record_epoch",
+    "stop_time": "stop_epoch",
+}
+RECORD_EPOCH_COLUMNS = {
+    "record_time": "record_epoch",
+    "stop_time": "stop_epoch",
+}
+# 全文检索（FTS5）覆盖的文本列
+WARNING_SEARCH_COLUMNS = ["description", "file_name"]
+RECORD_SEARCH_COLUMNS = ["description", "file_path"]
+
+# 离线批量重分析结果表：每个分析窗口的每个通道一行
+BATCH_RESULT_TABLE = "batch_analysis_result_table"
+BATCH_RESULT_COLUMNS = {
+    "config_hash": "TEXT NOT NULL",
+    "file_path": "TEXT NOT NULL",
+    "window_index": "INTEGER NOT NULL",
+    "start_sec": "REAL",
+    "end_sec": "REAL",
+    "channel": "TEXT NOT NULL",
+    "motor_state": "TEXT",
+    "is_running": "INTEGER",
+    "is_knocked": "INTEGER",
+    "energy_level": "REAL",
+    "max_flux": "REAL",
+    "max_zscore": "REAL",
+    "health_score": "REAL",
+    "analyzed_epoch": "INTEGER",
+}
+BATCH_RESULT_KEY_COLUMNS = ["config_hash", "file_path", "window_index", "channel"]
+
 DB_USERS_COLUMNS = ["user_id", "user_name", "password", "access_level", "user_created_time", "user_updated_time"]
 AUDIO_COLUMNS = [col for col in DB_AUDIO_COLUMNS if col != "record_id"]
 WARNING_COLUMNS = [col for col in DB_WARNING_COLUMNS if col != "record_id"]
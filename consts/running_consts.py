@@ -2,11 +2,18 @@ import os
 import sys
 
 # DEFAULT_DIR = os.path.split(os.path.realpath(__file__))[0].replace("\\", "/") + "/../"
-DEFAULT_DIR = os.path.dirname(os.path.realpath(sys.argv[0])).replace("\\", "/") + "/"
+# 同一台机器运行多个无界面工位时，可通过 AUDIO_STATION_DIR 为每个工位指定独立的工作目录
+DEFAULT_DIR = (
+    os.path.realpath(os.environ["AUDIO_STATION_DIR"]).replace("\\", "/").rstrip("/") + "/"
+    if os.environ.get("AUDIO_STATION_DIR")
+    else os.path.dirname(os.path.realpath(sys.argv[0])).replace("\\", "/") + "/"
+)
 
 PEAK_DETECTION_SETTINGS_JSON = DEFAULT_DIR + "configs/ai_model_config/peak_detection_models.json"
 PEAK_DETECTION_CONFIG_JSON   = DEFAULT_DIR + "configs/ai_model_config/peak_detection_config.json"
 HEALTH_SCORE_CONFIG_JSON     = DEFAULT_DIR + "configs/ai_model_config/health_score_config.json"
+RESULT_PUBLISHER_CONFIG_JSON = DEFAULT_DIR + "ui/ui_config/result_publisher.json"
+MIC_CHECK_DATA_JSON          = DEFAULT_DIR + "ui/ui_config/mic_check_data.json"
 
 # basic consts
 KB = 1 << 10
@@ -0,0 +1,33 @@
+"""
+无界面工位启动入口：采集 + 分析 + 本地控制服务（JSON 行 / HTTP，见 base/tcp/control_server.py）。
+
+同一台机器运行多个工位时，每个工位单独启动一个进程，并指定独立的工作目录与端口，例如：
+    python headless_station_Launcher.py --station-dir D:/stations/line1 --port 50201
+    python headless_station_Launcher.py --station-dir D:/stations/line2 --port 50202
+工作目录下需包含该工位的 ui/ui_config（采集设备、告警、TCP 配置）与 configs/ai_model_config，数据库与日志也写入该目录。
+"""
+import argparse
+import os
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面工位：采集 + 分析 + 本地控制服务")
+    parser.add_argument("--host", default="127.0.0.1", help="控制服务监听地址")
+    parser.add_argument("--port", type=int, default=50200, help="控制服务监听端口")
+    parser.add_argument("--station-dir", default=None, help="工位工作目录（默认程序所在目录）")
+    parser.add_argument("--auto-record", action="store_true", help="启动后立即开始录音")
+    args = parser.parse_args()
+
+    if args.station_dir:
+        # 必须在导入 consts 之前设置，分析子进程会继承该环境变量
+        os.environ["AUDIO_STATION_DIR"] = os.path.abspath(args.station_dir)
+
+    from ui.main_window import run_headless_station
+    run_headless_station(args.host, args.port, auto_record=args.auto_record)
+
+
+if __name__ == "__main__":
+    import multiprocessing as mp
+    mp.freeze_support()
+    sys.exit(main())
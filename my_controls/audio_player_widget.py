@@ -4,6 +4,7 @@
 - 独立线程播放，不阻塞主进程
 - 不影响主进程的录音功能
 - 包含播放/暂停按钮和进度显示
+- 设置文件时只读取缩略图缓存用于预览，完整音频在首次播放时才打开
 """
 
 import os
@@ -17,8 +18,11 @@ from PyQt5.QtWidgets import (
     QPushButton, QSlider, QStyle
 )
 
+from base.audio_thumbnail import load_thumbnail
 from base.player_audio import AudioPlayer
+from base.wav_reader import MappedWavReader
 from consts.running_consts import DEFAULT_DIR
+from my_controls.waveform_thumbnail import WaveformThumbnail
 
 
 class AudioPlayerWidget(QWidget):
@@ -119,8 +123,20 @@ class AudioPlayerWidget(QWidget):
         self._time_label.setStyleSheet("color: #aaaaaa; font-size: 12px;")
         self._time_label.setMinimumWidth(90)
         control_layout.addWidget(self._time_label)
+
+        # 输出欠载计数（仅在发生欠载时显示）
+        self._underrun_label = QLabel("")
+        self._underrun_label.setStyleSheet("color: #faad14; font-size: 12px;")
+        self._underrun_label.setToolTip("播放期间声卡输出欠载（卡顿）次数")
+        self._underrun_label.setVisible(False)
+        control_layout.addWidget(self._underrun_label)
         
         main_layout.addLayout(control_layout)
+
+        # 波形/频谱预览
+        self._thumbnail_view = WaveformThumbnail()
+        self._thumbnail_view.setFixedHeight(56)
+        main_layout.addWidget(self._thumbnail_view)
         
         # 文件名标签（隐藏，但保留用于内部状态）
         self._file_label = QLabel("")
@@ -137,6 +153,7 @@ class AudioPlayerWidget(QWidget):
     
     def set_audio_file(self, file_path: str):
         """设置音频文件路径"""
+        self._release_audio()
         self._audio_file_path = file_path
         
         if file_path and os.path.exists(file_path):
@@ -144,16 +161,37 @@ class AudioPlayerWidget(QWidget):
             self._file_label.setText(file_name)
             self._file_label.setToolTip(file_path)
             self._play_btn.setEnabled(True)
-            self._load_audio()
+            thumbnail = load_thumbnail(file_path)
+            self._thumbnail_view.set_thumbnail(thumbnail)
+            if thumbnail is not None:
+                self._sample_rate = thumbnail["sample_rate"]
+                self._duration_seconds = thumbnail["duration"]
+                self._update_time_label(0, self._duration_seconds)
+                self._progress_slider.setEnabled(True)
+            else:
+                # 无法生成缩略图（如非 WAV 格式）时直接加载
+                self._load_audio()
         else:
             self._file_label.setText("文件不存在")
             self._play_btn.setEnabled(False)
+            self._thumbnail_view.set_thumbnail(None)
             self._wave_data = None
             self._duration_seconds = 0.0
             self._update_time_label(0, 0)
     
     def _load_audio(self):
-        """加载音频数据"""
+        """加载音频数据：WAV 优先内存映射（只解析文件头，播放时按块读取），其他格式回退到 librosa 整体解码"""
+        try:
+            self._wave_data = MappedWavReader(self._audio_file_path)
+            self._sample_rate = self._wave_data.sample_rate
+            self._duration_seconds = self._wave_data.duration
+            self._update_time_label(0, self._duration_seconds)
+            self._progress_slider.setEnabled(True)
+            return
+        except Exception:
+            # 24 bit 或非 WAV 格式
+            self._wave_data = None
+
         try:
             wave_data, sr = librosa.load(
                 self._audio_file_path, 
@@ -181,6 +219,15 @@ class AudioPlayerWidget(QWidget):
             self._play_btn.setEnabled(False)
             self._wave_data = None
     
+    def _release_audio(self):
+        """释放映射的音频文件，避免 Windows 下文件被占用无法移动/删除"""
+        if self._player is not None:
+            self._stop_playback()
+            self._player = None
+        if isinstance(self._wave_data, MappedWavReader):
+            self._wave_data.close()
+        self._wave_data = None
+
     def _on_play_clicked(self):
         """播放/暂停按钮点击"""
         if self._is_playing:
@@ -190,6 +237,8 @@ class AudioPlayerWidget(QWidget):
     
     def _start_playback(self):
         """开始播放"""
+        if self._wave_data is None and self._audio_file_path:
+            self._load_audio()
         if self._wave_data is None:
             return
         
@@ -205,6 +254,7 @@ class AudioPlayerWidget(QWidget):
         self._player = AudioPlayer(self._wave_data, sample_rate=self._sample_rate)
         self._player.playback_finished.connect(self._on_playback_finished)
         self._player.start()
+        self._underrun_label.setVisible(False)
         
         self._is_playing = True
         self._play_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
@@ -220,6 +270,7 @@ class AudioPlayerWidget(QWidget):
         self._play_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
         self._progress_timer.stop()
         self._progress_slider.setValue(0)
+        self._thumbnail_view.set_position(None)
         self._update_time_label(0, self._duration_seconds)
         self.playback_stopped.emit()
     
@@ -229,6 +280,7 @@ class AudioPlayerWidget(QWidget):
         self._play_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
         self._progress_timer.stop()
         self._progress_slider.setValue(0)
+        self._thumbnail_view.set_position(None)
         self._update_time_label(0, self._duration_seconds)
         self.playback_stopped.emit()
     
@@ -243,9 +295,14 @@ class AudioPlayerWidget(QWidget):
         if total_frames > 0:
             progress = int((current_frame / total_frames) * 1000)
             self._progress_slider.setValue(progress)
+            self._thumbnail_view.set_position(current_frame / total_frames)
             
             current_time = current_frame / self._sample_rate
             self._update_time_label(current_time, self._duration_seconds)
+
+        if self._player.underruns:
+            self._underrun_label.setText(f"欠载 {self._player.underruns}")
+            self._underrun_label.setVisible(True)
     
     def _update_time_label(self, current: float, total: float):
         """更新时间标签"""
@@ -274,7 +331,8 @@ class AudioPlayerWidget(QWidget):
         return self._is_playing
     
     def closeEvent(self, event):
-        """关闭时停止播放"""
+        """关闭时停止播放并释放文件映射"""
         self._stop_playback()
+        self._release_audio()
         super().closeEvent(event)
 
@@ -0,0 +1,129 @@
+from PyQt5.QtCore import QDateTime, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QCheckBox, QDateTimeEdit
+
+
+class HistoryFilterBar(QWidget):
+    """
+    历史/告警表格顶部的过滤栏：
+    - 时间范围（勾选后生效）、关键字（全文检索备注与文件名）
+    - 可选的通道、处理状态、警告级别下拉框（show_warning_fields=True 时显示）
+    - 点击“查询”或在关键字框回车时发出 filters_changed(dict)，由数据库端完成过滤
+    发出的 dict 键：start_epoch / end_epoch / keyword / channel / deal_status / warning_level，
+    未设置的条件不出现在 dict 中。
+    """
+
+    filters_changed = pyqtSignal(dict)
+
+    ALL_TEXT = "全部"
+
+    def __init__(self, show_warning_fields: bool = False, parent=None):
+        super().__init__(parent)
+        self.show_warning_fields = show_warning_fields
+
+        self.time_checkbox = QCheckBox("时间范围")
+        self.start_edit = QDateTimeEdit(QDateTime.currentDateTime().addDays(-1))
+        self.end_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        for edit in (self.start_edit, self.end_edit):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+            edit.setCalendarPopup(True)
+            edit.setEnabled(False)
+        self.time_checkbox.toggled.connect(self.start_edit.setEnabled)
+        self.time_checkbox.toggled.connect(self.end_edit.setEnabled)
+
+        self.keyword_edit = QLineEdit()
+        self.keyword_edit.setPlaceholderText("搜索备注 / 文件名")
+        self.keyword_edit.returnPressed.connect(self.emit_filters)
+
+        self.channel_combo = QComboBox()
+        self.channel_combo.setEditable(True)
+        self.channel_combo.addItems([self.ALL_TEXT] + [str(i) for i in range(8)])
+        self.deal_status_combo = QComboBox()
+        self.deal_status_combo.addItems([self.ALL_TEXT, "确认已处理", "确认未处理", "未确认", "忽略"])
+        self.warning_level_combo = QComboBox()
+        self.warning_level_combo.setEditable(True)
+        self.warning_level_combo.addItems([self.ALL_TEXT, "一般"])
+
+        self.search_btn = QPushButton("查询")
+        self.search_btn.clicked.connect(self.emit_filters)
+        self.reset_btn = QPushButton("重置")
+        self.reset_btn.clicked.connect(self.reset)
+
+        self._init_ui()
+
+    def _init_ui(self):
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+        layout.setSpacing(8)
+        layout.addWidget(self.time_checkbox)
+        layout.addWidget(self.start_edit)
+        layout.addWidget(QLabel("至"))
+        layout.addWidget(self.end_edit)
+        if self.show_warning_fields:
+            layout.addWidget(QLabel("通道"))
+            layout.addWidget(self.channel_combo)
+            layout.addWidget(QLabel("处理状态"))
+            layout.addWidget(self.deal_status_combo)
+            layout.addWidget(QLabel("警告级别"))
+            layout.addWidget(self.warning_level_combo)
+        layout.addWidget(self.keyword_edit, 1)
+        layout.addWidget(self.search_btn)
+        layout.addWidget(self.reset_btn)
+
+        # 深色主题样式，与表格风格统一
+        self.setStyleSheet(
+            """
+            QWidget {
+                color: rgb(255, 255, 255);
+                font-size: 15px;
+            }
+            QLineEdit, QComboBox, QDateTimeEdit {
+                background-color: rgb(70, 70, 70);
+                border: 1px solid rgb(90, 90, 90);
+                border-radius: 3px;
+                padding: 3px 6px;
+            }
+            QComboBox QAbstractItemView {
+                background-color: rgb(55, 55, 55);
+                selection-background-color: rgb(24, 144, 255);
+            }
+            QPushButton {
+                background-color: rgb(70, 70, 70);
+                border: none;
+                border-radius: 3px;
+                padding: 4px 12px;
+            }
+            QPushButton:hover {
+                background-color: rgb(24, 144, 255);
+            }
+            """
+        )
+
+    def get_filters(self) -> dict:
+        filters = {}
+        if self.time_checkbox.isChecked():
+            start_epoch = self.start_edit.dateTime().toSecsSinceEpoch()
+            end_epoch = self.end_edit.dateTime().toSecsSinceEpoch()
+            filters["start_epoch"], filters["end_epoch"] = sorted((start_epoch, end_epoch))
+        keyword = self.keyword_edit.text().strip()
+        if keyword:
+            filters["keyword"] = keyword
+        if self.show_warning_fields:
+            for key, combo in (
+                ("channel", self.channel_combo),
+                ("deal_status", self.deal_status_combo),
+                ("warning_level", self.warning_level_combo),
+            ):
+                text = combo.currentText().strip()
+                if text and text != self.ALL_TEXT:
+                    filters[key] = text
+        return filters
+
+    def emit_filters(self):
+        self.filters_changed.emit(self.get_filters())
+
+    def reset(self):
+        self.time_checkbox.setChecked(False)
+        self.keyword_edit.clear()
+        for combo in (self.channel_combo, self.deal_status_combo, self.warning_level_combo):
+            combo.setCurrentIndex(0)
+        self.emit_filters()
@@ -0,0 +1,124 @@
+from typing import Callable, Dict, List, Optional, Sequence
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    按需分页加载的只读/可编辑表格模型：
+    - fetch_page(limit, before_key) 返回 [(key, *row_values), ...]，按最新在前排序，
+      key 用作下一页的键集分页游标（例如 rowid），None 表示查询失败
+    - row_to_cells(row_values) 将数据库行转换为各列显示值
+    - 视图滚动到底部时由 Qt 调用 canFetchMore/fetchMore 追加下一页，
+      不会一次性把整张表读入内存
+    - decorations: {列号: QIcon}，用于显示固定图标的列
+    """
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        fetch_page: Callable,
+        row_to_cells: Optional[Callable] = None,
+        page_size: int = 200,
+        editable_columns: Sequence[int] = (),
+        decorations: Optional[Dict[int, object]] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.fetch_page = fetch_page
+        self.row_to_cells = row_to_cells or list
+        self.page_size = max(1, int(page_size))
+        self.editable_columns = set(editable_columns)
+        self.decorations = dict(decorations or {})
+
+        self._raw_rows: List[tuple] = []
+        self._cells: List[list] = []
+        self._next_key = None
+        self._has_more = True
+
+    def reload(self):
+        """清空缓存并重新加载第一页。"""
+        self.beginResetModel()
+        self._raw_rows = []
+        self._cells = []
+        self._next_key = None
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def append_rows(self, rows: Sequence[Sequence]):
+        """追加外部已查询好的行（不含分页键）。"""
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return
+        first = len(self._cells)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for row in rows:
+            self._raw_rows.append(row)
+            self._cells.append(list(self.row_to_cells(row)))
+        self.endInsertRows()
+
+    def row_values(self, row: int) -> Optional[tuple]:
+        if 0 <= row < len(self._raw_rows):
+            return self._raw_rows[row]
+        return None
+
+    # ---------------- QAbstractTableModel ---------------- #
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        page = self.fetch_page(self.page_size, self._next_key)
+        if not page:
+            # 查询失败或已无更多数据
+            self._has_more = False
+            return
+        self._has_more = len(page) >= self.page_size
+        self._next_key = page[-1][0]
+        self.append_rows([row[1:] for row in page])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._cells)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row, column = index.row(), index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            value = self._cells[row][column]
+            return "" if value is None else str(value)
+        if role == Qt.DecorationRole and column in self.decorations:
+            return self.decorations[column]
+        return QVariant()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self._cells[index.row()][index.column()] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() in self.editable_columns:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
@@ -0,0 +1,151 @@
+"""
+录音缩略图显示控件
+
+- paint_thumbnail(painter, rect, thumbnail, position=None): 在指定区域绘制频谱底图 + 波形包络（+ 播放位置）
+- WaveformThumbnail: 独立控件，用于音频详情弹窗中的播放器
+- WaveformThumbnailDelegate: 表格委托，在文件名列背景绘制波形预览，只读取已有缓存，不在绘制时生成
+
+thumbnail 为 base.audio_thumbnail.load_thumbnail 的返回值。
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from PyQt5.QtCore import QLineF, QRect, QRectF, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen
+from PyQt5.QtWidgets import QStyledItemDelegate, QWidget
+
+from base.audio_thumbnail import load_thumbnail
+
+# 频谱配色：深色背景 -> 主题蓝 -> 浅黄
+_SPECTROGRAM_COLORS = [
+    QColor(
+        int(np.interp(v, [0, 160, 255], [30, 24, 250])),
+        int(np.interp(v, [0, 160, 255], [30, 144, 230])),
+        int(np.interp(v, [0, 160, 255], [30, 255, 160])),
+    ).rgb()
+    for v in range(256)
+]
+
+
+def _spectrogram_image(spectrogram: np.ndarray) -> Optional[QImage]:
+    if spectrogram is None or spectrogram.size == 0:
+        return None
+    data = np.ascontiguousarray(spectrogram, dtype=np.uint8)
+    height, width = data.shape
+    image = QImage(data.data, width, height, width, QImage.Format_Indexed8)
+    image.setColorTable(_SPECTROGRAM_COLORS)
+    # QImage 不持有 numpy 内存，复制一份
+    return image.copy()
+
+
+def paint_thumbnail(painter: QPainter, rect: QRect, thumbnail: Dict, position: Optional[float] = None,
+                    spectrogram: bool = True, image_cache: Optional[Dict] = None,
+                    envelope_color: Optional[QColor] = None):
+    if thumbnail is None or rect.width() <= 1 or rect.height() <= 1:
+        return
+    painter.save()
+    painter.setClipRect(rect)
+
+    if spectrogram:
+        image = image_cache.get("image") if image_cache is not None else None
+        if image is None:
+            image = _spectrogram_image(thumbnail.get("spectrogram"))
+            if image_cache is not None:
+                image_cache["image"] = image
+        if image is not None:
+            painter.setOpacity(0.55)
+            painter.drawImage(QRectF(rect), image)
+            painter.setOpacity(1.0)
+
+    envelope = thumbnail.get("envelope")
+    if envelope is not None and envelope.shape[-1] > 0:
+        # 多通道合并为一条包络，再按像素列重采样
+        low = envelope[:, 0, :].astype(np.float32).min(axis=0)
+        high = envelope[:, 1, :].astype(np.float32).max(axis=0)
+        columns = max(1, min(rect.width(), low.shape[0]))
+        edges = np.linspace(0, low.shape[0], columns + 1).astype(np.int64)[:-1]
+        low = np.minimum.reduceat(low, edges)
+        high = np.maximum.reduceat(high, edges)
+        peak = max(1e-6, float(max(-low.min(), high.max())))
+        mid = rect.top() + rect.height() / 2.0
+        half = rect.height() / 2.0 - 1
+        xs = rect.left() + (np.arange(columns) + 0.5) * rect.width() / columns
+        y_low = mid - low / peak * half
+        y_high = mid - high / peak * half
+        painter.setPen(QPen(envelope_color or QColor(255, 255, 255, 200), max(1.0, rect.width() / columns)))
+        painter.drawLines([QLineF(x, a, x, b) for x, a, b in zip(xs, y_low, y_high)])
+
+    if position is not None:
+        x = rect.left() + max(0.0, min(1.0, position)) * rect.width()
+        painter.setPen(QPen(QColor(250, 173, 20), 2))
+        painter.drawLine(QLineF(x, rect.top(), x, rect.bottom()))
+    painter.restore()
+
+
+class WaveformThumbnail(QWidget):
+    """显示单个录音的缩略图，可标记播放位置"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._thumbnail = None
+        self._position = None
+        self._image_cache = {}
+        self.setMinimumHeight(48)
+
+    def set_thumbnail(self, thumbnail: Optional[Dict]):
+        self._thumbnail = thumbnail
+        self._position = None
+        self._image_cache = {}
+        self.update()
+
+    def set_position(self, position: Optional[float]):
+        """position: 0~1 的播放进度，None 表示不显示"""
+        self._position = position
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(30, 30, 30))
+        if self._thumbnail is None:
+            painter.setPen(QColor(120, 120, 120))
+            painter.drawText(self.rect(), Qt.AlignCenter, "无预览")
+        else:
+            paint_thumbnail(painter, self.rect(), self._thumbnail, self._position, image_cache=self._image_cache)
+        painter.end()
+
+
+class WaveformThumbnailDelegate(QStyledItemDelegate):
+    """
+    表格委托：在单元格背景绘制录音波形预览后再绘制文字。
+    path_for_index(index) 返回该行录音路径；缓存按路径保存最近 max_items 条（含缺失结果）。
+    """
+
+    def __init__(self, path_for_index: Callable, max_items: int = 512, parent=None):
+        super().__init__(parent)
+        self.path_for_index = path_for_index
+        self.max_items = int(max_items)
+        self._cache: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _thumbnail(self, path: str) -> Optional[Dict]:
+        if path in self._cache:
+            self._cache.move_to_end(path)
+            return self._cache[path]
+        thumbnail = load_thumbnail(path, create=False)
+        self._cache[path] = thumbnail
+        while len(self._cache) > self.max_items:
+            self._cache.popitem(last=False)
+        return thumbnail
+
+    def paint(self, painter, option, index):
+        path = self.path_for_index(index)
+        thumbnail = self._thumbnail(path) if path else None
+        if thumbnail is not None:
+            rect = option.rect.adjusted(2, 4, -2, -4)
+            # 淡色绘制，避免遮挡文字
+            paint_thumbnail(painter, rect, thumbnail, spectrogram=False, envelope_color=QColor(24, 144, 255, 90))
+        super().paint(painter, option, index)
@@ -3,6 +3,7 @@
 - 原始音频
 - 声源分离音频1
 - 声源分离音频2
+打开时只读取各文件的缩略图缓存（波形/频谱预览），完整音频在点击播放时才加载。
 """
 
 import os
@@ -39,8 +40,8 @@ class AudioDetailDialog(QDialog):
     def _init_ui(self):
         """初始化UI"""
         self.setWindowTitle("音频详情")
-        self.setMinimumSize(500, 450)
-        self.resize(550, 500)
+        self.setMinimumSize(500, 520)
+        self.resize(550, 640)
         self.setModal(True)
         
         # 深灰色主题（与主界面风格统一）
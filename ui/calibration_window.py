@@ -1,24 +1,29 @@
+import math
+import queue
 import sys
-import time
-from concurrent import futures
 
 import numpy as np
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QApplication, QDialog, QGroupBox, QHBoxLayout, QLineEdit, QLabel
 from PyQt5.QtWidgets import QMessageBox, QVBoxLayout, QPushButton
 from PyQt5.QtWidgets import QWidget, QRadioButton
 
-from base.pre_processing.audio_thd_frequency_response_analysis import AudioThdFrequencyResponseAnalysis
-from base.soundcard_audio_processor import SoundcardAudioProcessor
-from consts import error_code
+from base.pre_processing.streaming_spl_meter import StreamingSplMeter
+from base.sound_device_manager import sd
 
 
 class CalibrationWindow(QDialog):
 
-    def __init__(self, device_channels, checked_channel):
+    def __init__(self, device_channels, checked_channel, calibrate_channels=None):
+        """
+        checked_channel 为单通道校准的 1 基通道号；
+        calibrate_channels 为 1 基通道号列表时同时校准这些通道（一次录音，各通道同时计算），
+        结果见 deviation_values
+        """
         super().__init__()
         self.device_channels = device_channels
         self.checked_channel = checked_channel
+        self.calibrate_channels = calibrate_channels
 
         self.init_ui()
 
@@ -30,7 +35,7 @@ class CalibrationWindow(QDialog):
         self.setMaximumSize(600, 580)
         cal_wnd_layout = QVBoxLayout()
 
-        self.input_cal_wnd = InputCalibration(self.device_channels, self.checked_channel)
+        self.input_cal_wnd = InputCalibration(self.device_channels, self.checked_channel, self.calibrate_channels)
 
         btn_layout = self.create_btn_box()
 
@@ -63,20 +68,35 @@ class CalibrationWindow(QDialog):
 
     def clicked_close_button(self):
         self.input_cal_wnd.stop_timer = True
+        self.input_cal_wnd.stop_measurement()
         self.close()
 
     def exec(self):
         super().exec()
         return self.input_cal_wnd.deviation_value
 
+    @property
+    def deviation_values(self):
+        """{1 基通道号: 偏差 dB}，未完成校准时为空"""
+        return self.input_cal_wnd.deviation_values
+
 
 class InputCalibration(QWidget):
-    def __init__(self, device_channels, checked_channel):
+    def __init__(self, device_channels, checked_channel, calibrate_channels=None):
         super().__init__()
         self.device_channels = device_channels
         self.checked_channel = checked_channel
+        self.channel_numbers = list(calibrate_channels) if calibrate_channels else [checked_channel]
         self.deviation_value = None
+        self.deviation_values = {}
         self.stop_timer = False  # Initializes the stop timer flag to False
+        self.sample_rate = 44100
+        self.meter = None
+        self.stream = None
+        # 输入流回调只把数据块放入队列，由界面线程的定时器取出计算，界面不阻塞
+        self.audio_blocks = queue.Queue()
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll_meter)
         self.init_ui()
 
     def init_ui(self):
@@ -129,10 +149,25 @@ class InputCalibration(QWidget):
             "background-color: white;" "border: 1px solid rgb(122, 122, 122);" "border-radius: 3px;"
         )
 
-        recorded_layout = QHBoxLayout()
-        recorded_layout.addWidget(recorded_label)
-        recorded_layout.addStretch()
-        recorded_layout.addWidget(self.recorded_label)
+        live_spl_label = QLabel("当前声压：")
+        self.live_spl_label = QLabel("-- dB")
+        self.live_spl_label.setFixedSize(130, 20)
+        self.live_spl_label.setAlignment(Qt.AlignCenter)
+        self.live_spl_label.setStyleSheet(
+            "background-color: white;" "border: 1px solid rgb(122, 122, 122);" "border-radius: 3px;"
+        )
+
+        time_layout = QHBoxLayout()
+        time_layout.addWidget(recorded_label)
+        time_layout.addStretch()
+        time_layout.addWidget(self.recorded_label)
+        live_spl_layout = QHBoxLayout()
+        live_spl_layout.addWidget(live_spl_label)
+        live_spl_layout.addStretch()
+        live_spl_layout.addWidget(self.live_spl_label)
+        recorded_layout = QVBoxLayout()
+        recorded_layout.addLayout(time_layout)
+        recorded_layout.addLayout(live_spl_layout)
         recorded_box.setLayout(recorded_layout)
 
         return recorded_box
@@ -162,29 +197,87 @@ class InputCalibration(QWidget):
             self.standard_spl_flag = False
 
     def clicked_calibration(self):
-        prolong = 1
-        recorded_dict = {
-            "channels": self.device_channels,
-            "sample_rate": 44100,
-            "num_frames": 10 * 44100,
-            "prolong_frames": int(prolong * 44100),
-            "checked_channel": self.checked_channel,
-        }
-
-        with futures.ThreadPoolExecutor(max_workers=1) as executor:
-            recorded_thread = executor.submit(self.calculate_average_spl, recorded_dict)
-            self.update_recorded_time()
-
-        self.average_value = recorded_thread.result()
-        self.deviation_value = self.calculate_deviation(self.average_value)
-        self.deviation_lineedit.setText(str(self.deviation_value))
+        """
+        打开输入流开始测量：回调把数据块放入队列，定时器每 100 ms 取出送入流式 SPL 计，
+        实时显示当前声压与剩余时间；读数稳定后提前结束，最长 recorded_time 秒。
+        多通道校准时所有待校准通道在同一次录音中同时计算。
+        """
+        # channel_numbers 为界面上的 1 基通道号
+        self.channel_index = [min(max(channel - 1, 0), self.device_channels - 1) for channel in self.channel_numbers]
+        self.meter = StreamingSplMeter(self.sample_rate, channels=len(self.channel_index), max_seconds=self.recorded_time)
+        self.audio_blocks = queue.Queue()
+        try:
+            self.stream = sd.InputStream(
+                samplerate=self.sample_rate, channels=self.device_channels, callback=self.audio_callback
+            )
+            self.stream.start()
+        except Exception as e:
+            print("Failed to start calibration stream:", e)
+            self.stop_measurement()
+            self.calibration_popup(success_flag=False)
+            return
+        self.poll_timer.start(100)
+
+    def audio_callback(self, in_data, frames, t, status):
+        # 按索引列表取列，得到的是副本
+        self.audio_blocks.put(in_data[:, self.channel_index])
+
+    def poll_meter(self):
+        if self.meter is None:
+            return
+        while True:
+            try:
+                block = self.audio_blocks.get_nowait()
+            except queue.Empty:
+                break
+            reading = self.meter.update(block)
+            if reading is not None:
+                if len(reading) == 1:
+                    self.live_spl_label.setText(f"{reading[0]:.2f} dB")
+                else:
+                    self.live_spl_label.setText(f"{np.min(reading):.2f} ~ {np.max(reading):.2f} dB")
+            if self.meter.done:
+                break
+        remaining = max(0, math.ceil(self.meter.max_frames / self.sample_rate - self.meter.elapsed))
+        # Update the time display on the interface, showing the remaining time in red and the unit "s" in black.
+        self.recorded_label.setText(
+            f"<span style='color: red;'>{remaining} </span>" f"<span style='color: black;'>s</span>"
+        )
+        if self.meter.done or self.stop_timer:
+            self.finish_calibration()
+
+    def finish_calibration(self):
+        self.stop_measurement()
+        result = self.meter.result()
+        # 未取得读数或数字静音时偏差为 inf，按校准失败处理
+        self.average_value = result if result is not None else np.full(len(self.channel_numbers), -np.inf)
+        deviations = self.calculate_deviation(self.average_value)
+        self.deviation_values = {channel: float(value) for channel, value in zip(self.channel_numbers, deviations)}
+        if len(self.channel_numbers) == 1:
+            self.deviation_value = self.deviation_values[self.channel_numbers[0]]
+            self.deviation_lineedit.setText(str(self.deviation_value))
+        else:
+            self.deviation_value = dict(self.deviation_values)
+            self.deviation_lineedit.setText(
+                ", ".join(f"{channel}: {value}" for channel, value in self.deviation_values.items())
+            )
         if not self.stop_timer:
-            if str(self.deviation_value) == "inf":
+            if not np.all(np.isfinite(deviations)):
                 self.calibration_popup(success_flag=False)
             else:
                 self.calibration_popup(success_flag=True)
                 # self.save_deviation_value_to_text(self.deviation_value)
 
+    def stop_measurement(self):
+        self.poll_timer.stop()
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception as e:
+                print("Failed to stop calibration stream:", e)
+            self.stream = None
+
     def calibration_popup(self, success_flag=True):
         cal_msg = QMessageBox(self)
         if success_flag:
@@ -198,37 +291,16 @@ class InputCalibration(QWidget):
         cal_msg.setStandardButtons(QMessageBox.Ok)
         cal_msg.exec_()
 
-    def calculate_average_spl(self, recorded_dict):
-        rec_code, recorded_data = SoundcardAudioProcessor().sd_rec(recorded_dict)
-        step = 100
-        if rec_code == error_code.OK:
-            spl_smooth = AudioThdFrequencyResponseAnalysis().spl_calculation(recorded_data)
-            spl_smooth_mid = len(spl_smooth) // 2
-            spl_smooth_start = spl_smooth_mid - step
-            spl_smooth_end = spl_smooth_mid + step
-            spl_sample = spl_smooth[spl_smooth_start:spl_smooth_end]
-            self.average_value = np.sum(spl_sample) / (step * 2)
-            return self.average_value
-
-    def update_recorded_time(self):
-        while self.recorded_time > 0 and not self.stop_timer:
-            time.sleep(1)
-            self.recorded_time -= 1
-            # Update the time display on the interface, showing the remaining time in red and the unit "s" in black.
-            self.recorded_label.setText(
-                f"<span style='color: red;'>{self.recorded_time} </span>" f"<span style='color: black;'>s</span>"
-            )
-            QApplication.processEvents()
-
     def calculate_deviation(self, average_value):
-        if self.standard_spl_flag:
-            deviation_value = round(94 - average_value, 3)
-        else:
-            deviation_value = round(114 - average_value, 3)
-        return deviation_value
+        """average_value 为各通道实测声压数组，返回各通道偏差（保留 3 位小数）"""
+        standard_spl = 94 if self.standard_spl_flag else 114
+        return np.round(standard_spl - np.asarray(average_value, dtype=np.float64), 3)
 
     def reset_btn_clicked(self):
+        self.stop_measurement()
+        self.meter = None
         self.recorded_time = 10
+        self.live_spl_label.setText("-- dB")
         self.recorded_label.setText(
             f"<span style='color: red;'>{self.recorded_time} </span>" f"<span style='color: black;'>s</span>"
         )
@@ -1,7 +1,6 @@
 import sys
 import json
 import os
-from datetime import datetime
 
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QStandardItem, QStandardItemModel, QPalette, QColor
@@ -11,6 +10,7 @@ from PyQt5.QtWidgets import QPushButton, QVBoxLayout, QComboBox, QMessageBox
 from base.data_struct.data_deal_struct import DataDealStruct
 from base.sound_device_manager import get_device_info, change_default_mic
 from base.load_device_info import load_devices_data
+from base.mic_calibration import save_channel_deviations
 from consts.running_consts import DEFAULT_DIR
 from ui.calibration_window import CalibrationWindow
 # from ui.system_information_textedit import log_controller
@@ -349,12 +349,16 @@ class DeviceListWindow(QWidget):
             if len(self.selected_channels) == 0:
                 QMessageBox.information(self, "提示", "请至少选择一个通道进行校准")
                 return
-            if self.about_device_checiked_info():
+            mode = self.about_device_checiked_info()
+            if mode == "simultaneous":
+                self.mic_channel_check_simultaneous()
+            elif mode == "sequential":
                 self.mic_channel_check()
         else:
             QMessageBox.warning(self, "提示", "请选择设备")
 
     def about_device_checiked_info(self):
+        """返回 "simultaneous"（同时校准）、"sequential"（逐个校准）或 None（取消）"""
         about_device_checiked_info = QMessageBox()
         about_device_checiked_info.setWindowFlags(Qt.Dialog)
         about_device_checiked_info.setWindowTitle("关于设备校准")
@@ -362,33 +366,47 @@ class DeviceListWindow(QWidget):
             self.selected_device["max_input_channels"],
             [channel + 1 for channel in self.selected_channels],
         )
-        about_device_checiked_info.setText(info_str)
-        about_device_checiked_info.setStandardButtons(QMessageBox.Yes | QMessageBox.Cancel)
-
-        if QMessageBox.Yes == about_device_checiked_info.exec():
-            return True
-        else:
-            return False
+        if len(self.selected_channels) == 1:
+            about_device_checiked_info.setText(info_str)
+            about_device_checiked_info.setStandardButtons(QMessageBox.Yes | QMessageBox.Cancel)
+            return "sequential" if QMessageBox.Yes == about_device_checiked_info.exec() else None
+
+        # 多个通道：同时校准需校准声源同时作用于所有待校准通道（如多口耦合器），一次录音完成
+        about_device_checiked_info.setText(
+            info_str + "\n同时校准：校准声源同时作用于所有待校准通道，一次录音完成；\n逐个校准：依次将校准源放置到各通道处。"
+        )
+        simultaneous_btn = about_device_checiked_info.addButton("同时校准", QMessageBox.YesRole)
+        sequential_btn = about_device_checiked_info.addButton("逐个校准", QMessageBox.NoRole)
+        about_device_checiked_info.addButton(QMessageBox.Cancel)
+        about_device_checiked_info.exec()
+        clicked_btn = about_device_checiked_info.clickedButton()
+        if clicked_btn == simultaneous_btn:
+            return "simultaneous"
+        if clicked_btn == sequential_btn:
+            return "sequential"
+        return None
 
     def mic_channel_check(self):
         check_mic_result = {}
         for channel in self.selected_channels:
             QMessageBox.information(self, "提示", "开始校准通道：" + str(channel + 1) + "，请将校准源放置到待校准通道处")
             calibration_window = CalibrationWindow(self.selected_device["max_input_channels"], int(channel + 1))
-            check_result = calibration_window.exec()
-            check_mic_result["channel-%s_deviation_value" % str(channel + 1)] = check_result
-        check_mic_result["Datetime"] = datetime.now().strftime("%Y-%m-%d")
-        self.save_mic_check_result_to_json(check_mic_result)
+            check_mic_result[channel + 1] = calibration_window.exec()
+        save_channel_deviations(check_mic_result)
 
-    @staticmethod
-    def save_mic_check_result_to_json(check_mic_result):
-        # dir_path = "D:/gqgit/new_project/ui/ui_config/"
-        file_path = DEFAULT_DIR + "ui/ui_config/mic_check_data.json"
-        try:
-            with open(file_path, "w") as file:
-                json.dump(check_mic_result, file)
-        except Exception as e:
-            print("Error saving device data:", e)
+    def mic_channel_check_simultaneous(self):
+        channel_numbers = [channel + 1 for channel in self.selected_channels]
+        QMessageBox.information(
+            self, "提示", "开始同时校准通道：%s，请确保校准声源同时作用于所有待校准通道" % channel_numbers
+        )
+        calibration_window = CalibrationWindow(
+            self.selected_device["max_input_channels"], channel_numbers[0], calibrate_channels=channel_numbers
+        )
+        calibration_window.exec()
+        deviations = calibration_window.deviation_values
+        # 中途退出时没有结果，不写文件，保留已有的校准数据
+        if deviations:
+            save_channel_deviations(deviations)
 
     def on_select_item(self, index):
         self.selected_device = self.device_list[index.row()]
@@ -3,7 +3,7 @@
 
 对外接口（推荐调用）：
 - ErrorManageWidget.load_warning_data():
-    从数据库查询最新数据并写入表格（清空旧数据后再填充）。
+    重置表格并从数据库加载第一页告警数据（最新在前），滚动到底部时自动加载下一页。
 - ErrorManageWidget.show():
     已重载，展示窗口前会自动调用 load_warning_data()。
 - ErrorManageWidget.add_warning_data(audio_datas):
@@ -22,22 +22,26 @@
     widget.show()
 
 注意：
-- 数据库查询依赖 base.audio_data_manager.get_warning_audio_data_from_db。
+- 数据库查询依赖 base.audio_data_manager.get_warning_audio_data_page（按 rowid 键集分页）。
+- “操作”“处理状态”“查看结果”列由委托（delegate）绘制，不再为每行创建按钮/下拉框控件。
+- 顶部过滤栏（时间范围、通道、处理状态、警告级别、关键字）的条件在数据库端执行。
 - 若需要刷新表格（例如外部更新了数据库），再次调用 load_warning_data() 即可。
 """
 
 import sys
 
-from PyQt5.QtCore import Qt, QSize, QEvent, QTimer
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QPalette, QColor
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView
-from PyQt5.QtWidgets import QItemDelegate, QPushButton, QComboBox
+from PyQt5.QtCore import Qt, QSize, QEvent, QTimer, QRect
+from PyQt5.QtGui import QPalette, QColor, QFont, QPainter
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTableView, QHeaderView
+from PyQt5.QtWidgets import QStyledItemDelegate, QComboBox
 
-from base.audio_data_manager import get_warning_audio_data_from_db, update_warning_audio_data
+from base.audio_data_manager import get_warning_audio_data_page, update_warning_audio_data
 from consts import ui_style_const
 from consts.running_consts import DEFAULT_DIR
 
 from my_controls.look_analysis_report import open_html_in_default_browser
+from my_controls.history_filter_bar import HistoryFilterBar
+from my_controls.paged_table_model import PagedTableModel
 
 
 class ErrorManageWidget(QWidget):
@@ -46,7 +50,26 @@ class ErrorManageWidget(QWidget):
 
         self.error_manage_table = QTableView()
         self.error_manage_table.setIconSize(QSize(25, 25))
-        self.error_manage_model = CustomStandardItemModel(0, 10, [9])
+        self.filters = dict()
+        self.filter_bar = HistoryFilterBar(show_warning_fields=True)
+        self.filter_bar.filters_changed.connect(self.on_filters_changed)
+        self.error_manage_model = PagedTableModel(
+            [
+                "警告时间",
+                "警告级别",
+                "警告状态",
+                "负责人员",
+                "文件名称",
+                "录制时间",
+                "结束时间",
+                "操作",
+                "处理状态",
+                "查看结果",
+            ],
+            self.fetch_warning_page,
+            row_to_cells=self.warning_row_to_cells,
+            editable_columns=[8],
+        )
         self.error_manage_table.setModel(self.error_manage_model)
 
         self.adjust_column_false = True
@@ -63,8 +86,9 @@ class ErrorManageWidget(QWidget):
         self.is_adjusting_columns = False  # 防止递归调整
         self.previous_column_widths = {}  # 记录上次的列宽
 
-        # 监听单元格编辑变化（用于"备注"列）
+        # 监听单元格编辑变化（用于"处理状态"列）
         self.error_manage_model.dataChanged.connect(self.on_model_data_changed)
+        self.setup_delegates()
 
         self.init_ui()
 
@@ -143,20 +167,6 @@ class ErrorManageWidget(QWidget):
                 background: none;
             }"""
         )
-        self.error_manage_table.model().setHorizontalHeaderLabels(
-            [
-                "警告时间",
-                "警告级别",
-                "警告状态",
-                "负责人员",
-                "文件名称",
-                "录制时间",
-                "结束时间",
-                "操作",
-                "处理状态",
-                "查看结果",
-            ]
-        )
         header = self.error_manage_table.horizontalHeader()
         column_count = self.error_manage_model.columnCount()
         # 前几列使用可调宽度（Interactive），最后三列使用固定宽度（Fixed）
@@ -179,6 +189,7 @@ class ErrorManageWidget(QWidget):
         # 让 QTableView 的宽度与 ErrorManageWidget 一致（去掉左右边距）
         error_manage_table_layout.setContentsMargins(0, 2, 0, 0)
         error_manage_table_layout.setSpacing(0)
+        error_manage_table_layout.addWidget(self.filter_bar)
         error_manage_table_layout.addWidget(self.error_manage_table)
 
         return error_manage_table_layout
@@ -330,50 +341,20 @@ class ErrorManageWidget(QWidget):
 
     def load_warning_data(self):
         """
-        显式从数据库查询并写入表格。
+        显式从数据库加载第一页告警数据（最新在前），后续页随滚动按需加载。
         可在外部初始化完控件后调用，以避免在构造阶段自动加载。
         """
-        result = get_warning_audio_data_from_db()
-        # 清空现有数据
-        try:
-            self.error_manage_model.removeRows(0, self.error_manage_model.rowCount())
-        except Exception:
-            pass
-
-        if result:
-            reversed_result = list(reversed(result))
-            self.add_warning_data(reversed_result)
-        # 组件（按钮/下拉）依赖数据存在后再设置
-        self.setup_buttons_in_btn_column()
-        if result:
-            self.setup_combobox(reversed_result)
-
-        # 在最后一列添加“常看报告”超链接按钮
-        self.setup_report_link_column()
+        self.error_manage_model.reload()
+
+    def fetch_warning_page(self, limit, before_rowid=None):
+        return get_warning_audio_data_page(limit, before_rowid, self.filters)
+
+    def on_filters_changed(self, filters: dict):
+        self.filters = dict(filters or {})
+        self.load_warning_data()
 
     def add_warning_data(self, audio_datas):
-        for audio_data in audio_datas:
-            (
-                warning_time,
-                warning_level,
-                warning_status,
-                charge_person,
-                file_name,
-                record_time,
-                stop_time,
-                deal_status,
-                description,
-            ) = audio_data
-            self.add_history_data_to_table(
-                warning_time,
-                warning_level,
-                warning_status,
-                charge_person,
-                file_name,
-                record_time,
-                stop_time,
-                description,
-            )
+        self.error_manage_model.append_rows(audio_datas)
 
     def add_history_data_to_table(
         self,
@@ -386,26 +367,47 @@ class ErrorManageWidget(QWidget):
         stop_time: str,
         description,
     ):
-        audio_data_items = []
-        warning_time_item = QStandardItem(str(warning_time))
-        warning_level_item = QStandardItem(warning_level)
-        warning_status_item = QStandardItem(warning_status)
-        charge_person_item = QStandardItem(charge_person)
-        record_audio_name_item = QStandardItem(file_name)
-        record_time_item = QStandardItem(str(record_time))
-        stop_time_item = QStandardItem(str(stop_time))
-        audio_data_items.append(warning_time_item)
-        audio_data_items.append(warning_level_item)
-        audio_data_items.append(warning_status_item)
-        audio_data_items.append(charge_person_item)
-        audio_data_items.append(record_audio_name_item)
-        audio_data_items.append(record_time_item)
-        audio_data_items.append(stop_time_item)
-        audio_data_items.append(QStandardItem(""))
-        audio_data_items.append(QStandardItem(""))
-        audio_data_items.append(QStandardItem(""))
-
-        self.error_manage_model.appendRow(audio_data_items)
+        self.error_manage_model.append_rows(
+            [
+                (
+                    warning_time,
+                    warning_level,
+                    warning_status,
+                    charge_person,
+                    file_name,
+                    record_time,
+                    stop_time,
+                    "",
+                    description,
+                )
+            ]
+        )
+
+    @staticmethod
+    def warning_row_to_cells(audio_data):
+        (
+            warning_time,
+            warning_level,
+            warning_status,
+            charge_person,
+            file_name,
+            record_time,
+            stop_time,
+            deal_status,
+            description,
+        ) = audio_data
+        return [
+            str(warning_time),
+            warning_level,
+            warning_status,
+            charge_person,
+            file_name,
+            str(record_time),
+            str(stop_time),
+            "",
+            deal_status,
+            "",
+        ]
 
     def get_cell_value(self, row: int, column: int):
         """
@@ -427,152 +429,40 @@ class ErrorManageWidget(QWidget):
             return record_audio_data_path.split("/")[-1].split(".")[0]
         return ""
 
-    def setup_combobox(self, audio_datas):
-        # 深色主题下拉框样式
-        dark_combobox_style = """
-            QComboBox {
-                background-color: rgb(70, 70, 70);
-                color: rgb(255, 255, 255);
-                border: 1px solid rgb(90, 90, 90);
-                border-radius: 3px;
-                padding: 3px 8px;
-                font-size: 15px;
-            }
-            QComboBox::drop-down {
-                subcontrol-origin: padding;
-                subcontrol-position: top right;
-                width: 20px;
-                border: none;
-                background: transparent;
-            }
-            QComboBox::down-arrow {
-                image: url(./ui/ui_pic/shanglajiantou.png);
-                width: 12px;
-                height: 12px;
-            }
-            QComboBox QAbstractItemView {
-                background-color: rgb(55, 55, 55);
-                color: rgb(255, 255, 255);
-                selection-background-color: rgb(24, 144, 255);
-                border: 1px solid rgb(70, 70, 70);
-            }
+    def setup_delegates(self):
         """
-        for row in range(self.error_manage_model.rowCount()):
-            index = self.error_manage_model.index(row, 8)
-            combobox = QComboBox()
-            combobox.addItems(["确认已处理", "确认未处理", "未确认", "忽略"])
-            combobox.setStyleSheet(dark_combobox_style)
-            combobox.setCurrentText(audio_datas[row][7])
-            # 下拉框宽度与所在单元格（列）宽度保持一致
-            col_width = self.error_manage_table.columnWidth(8)
-            combobox.setFixedWidth(col_width - 10)
-            # 下拉列表弹出视图宽度也与单元格一致
-            try:
-                combobox.view().setFixedWidth(col_width - 10)
-            except Exception:
-                pass
-            # 禁用滚轮修改选项
-            combobox.installEventFilter(self)
-            # 下拉变更即写库
-            combobox.currentTextChanged.connect(lambda text, r=row: self.on_deal_status_changed(r, text))
-            self.error_manage_table.setIndexWidget(index, combobox)
-
-    def eventFilter(self, obj, event):
-        # 屏蔽所有 QComboBox 的滚轮事件，防止意外修改选项
-        if isinstance(obj, QComboBox) and event.type() == QEvent.Wheel:
-            return True
-        return super().eventFilter(obj, event)
-
-    def setup_buttons_in_btn_column(self):
-        table = self.error_manage_table  # 修正变量名
-        model = table.model()  # 获取当前模型
-        btn_col = model.columnCount() - 3  # 使用模型列数
-
-        # 深色主题按钮样式
-        dark_btn_style = """
-            QPushButton {
-                background-color: rgb(70, 70, 70);
-                color: rgb(255, 255, 255);
-                border: none;
-                border-radius: 3px;
-                padding: 4px 10px;
-                font-size: 15px;
-            }
-            QPushButton:hover {
-                background-color: rgb(24, 144, 255);
-            }
-            QPushButton:pressed {
-                background-color: rgb(20, 120, 220);
-            }
-        """
-
-        for row in range(model.rowCount()):
-            deal_btn = QPushButton("处理")
-            deal_btn.setStyleSheet(dark_btn_style)
-            deal_btn.clicked.connect(lambda _, r=row: self.on_deal_btn_clicked(r))
-
-            ignore_btn = QPushButton("忽略")
-            ignore_btn.setStyleSheet(dark_btn_style)
-            ignore_btn.clicked.connect(lambda _, r=row: self.on_ignore_btn_clicked(r))
-
-            container = QWidget()
-            container.setStyleSheet("background-color: rgb(55, 55, 55);")
-            layout = QHBoxLayout(container)
-            layout.addWidget(deal_btn)
-            layout.addWidget(ignore_btn)
-            layout.setContentsMargins(0, 0, 0, 0)
-
-            # 使用 QTableView 的 setIndexWidget 方法
-            index = model.index(row, btn_col)
-            table.setIndexWidget(index, container)
-
-    def setup_report_link_column(self):
-        """
-        在表格最后一列添加“常看报告”超链接样式按钮，点击后打印行号。
-        """
-        table = self.error_manage_table
-        model = table.model()
-        link_col = model.columnCount() - 1  # 最后一列
-
-        link_style = """
-            QPushButton {
-                color: rgb(24, 144, 255);
-                background-color: transparent;
-                border: none;
-                text-decoration: underline;
-                font-size: 15px;
-            }
-            QPushButton:hover {
-                color: rgb(135, 206, 250);
-            }
+        为“操作”“处理状态”“查看结果”列安装委托：
+        仅绘制外观，点击时才响应（下拉框编辑器按需创建），不随行数创建控件。
         """
+        model = self.error_manage_model
+        btn_col = model.columnCount() - 3
+        status_col = model.columnCount() - 2
+        link_col = model.columnCount() - 1
 
-        for row in range(model.rowCount()):
-            link_btn = QPushButton("常看报告")
-            link_btn.setStyleSheet(link_style)
-            link_btn.setCursor(Qt.PointingHandCursor)
-            link_btn.clicked.connect(lambda _, r=row: self.on_view_report_clicked(r))
+        self.action_delegate = ButtonsDelegate(
+            ["处理", "忽略"], [self.on_deal_btn_clicked, self.on_ignore_btn_clicked], self.error_manage_table
+        )
+        self.deal_status_delegate = DealStatusDelegate(
+            ["确认已处理", "确认未处理", "未确认", "忽略"], self.error_manage_table
+        )
+        self.report_link_delegate = LinkDelegate("常看报告", self.on_view_report_clicked, self.error_manage_table)
+        self.error_manage_table.setItemDelegateForColumn(btn_col, self.action_delegate)
+        self.error_manage_table.setItemDelegateForColumn(status_col, self.deal_status_delegate)
+        self.error_manage_table.setItemDelegateForColumn(link_col, self.report_link_delegate)
 
-            index = model.index(row, link_col)
-            table.setIndexWidget(index, link_btn)
+    def set_deal_status(self, row: int, new_text: str):
+        # 通过模型更新“处理状态”列（将触发写库）
+        index = self.error_manage_model.index(row, 8)
+        if index.isValid() and index.data() != new_text:
+            self.error_manage_model.setData(index, new_text)
 
     def on_deal_btn_clicked(self, row):
         print(f"处理第 {row} 行")
-        # 同步更新下拉框（将触发写库）
-        model = self.error_manage_table.model()
-        combo_index = model.index(row, 8)
-        combo = self.error_manage_table.indexWidget(combo_index)
-        if isinstance(combo, QComboBox):
-            combo.setCurrentText("确认已处理")
+        self.set_deal_status(row, "确认已处理")
 
     def on_ignore_btn_clicked(self, row):
         print(f"忽略第 {row} 行")
-        # 同步更新下拉框（将触发写库）
-        model = self.error_manage_table.model()
-        combo_index = model.index(row, 8)
-        combo = self.error_manage_table.indexWidget(combo_index)
-        if isinstance(combo, QComboBox):
-            combo.setCurrentText("忽略")
+        self.set_deal_status(row, "忽略")
 
     def on_view_report_clicked(self, row: int):
         """
@@ -596,17 +486,12 @@ class ErrorManageWidget(QWidget):
             update_warning_audio_data({"deal_status": new_text}, {"warning_time": warning_time, "file_name": file_name})
 
     def on_model_data_changed(self, top_left, bottom_right, roles=None):
-        # 仅处理“备注”列（索引 9）的编辑写库
+        # 仅处理“处理状态”列（索引 8）的编辑写库
         del roles  # 未使用
-        if top_left.column() != 9:
+        if top_left.column() != 8:
             return
         row = top_left.row()
-        model = self.error_manage_model
-        description = model.index(row, 9).data()
-        warning_time = model.index(row, 0).data()
-        file_name = model.index(row, 4).data()
-        if warning_time and file_name:
-            update_warning_audio_data({"description": description}, {"warning_time": warning_time, "file_name": file_name})
+        self.on_deal_status_changed(row, self.error_manage_model.index(row, 8).data())
 
     def show(self):
         self.load_warning_data()
@@ -624,18 +509,155 @@ class ErrorManageWidget(QWidget):
         super().resizeEvent(event)
 
 
-class CustomStandardItemModel(QStandardItemModel):
-    def __init__(self, rows, columns, editable_column: list, parent=None):
-        super().__init__(rows, columns, parent)
-        self.editable_column = editable_column
+class ButtonsDelegate(QStyledItemDelegate):
+    """
+    在单元格内绘制一组并排按钮，点击时回调 callback(row)。
+    """
+
+    def __init__(self, labels, callbacks, parent=None):
+        super().__init__(parent)
+        self.labels = list(labels)
+        self.callbacks = list(callbacks)
+
+    def _button_rects(self, rect: QRect):
+        count = max(1, len(self.labels))
+        width = rect.width() // count
+        return [
+            QRect(rect.left() + i * width, rect.top(), width, rect.height()).adjusted(3, 6, -3, -6)
+            for i in range(count)
+        ]
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.fillRect(option.rect, QColor(55, 55, 55))
+        painter.setRenderHint(QPainter.Antialiasing)
+        for label, rect in zip(self.labels, self._button_rects(option.rect)):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(70, 70, 70))
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(rect, Qt.AlignCenter, label)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for callback, rect in zip(self.callbacks, self._button_rects(option.rect)):
+                if rect.contains(event.pos()):
+                    callback(index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+
+class DealStatusDelegate(QStyledItemDelegate):
+    """
+    “处理状态”列：平时仅绘制当前文本，点击时才创建下拉框编辑器，选择后立即提交。
+    """
+
+    combobox_style = """
+        QComboBox {
+            background-color: rgb(70, 70, 70);
+            color: rgb(255, 255, 255);
+            border: 1px solid rgb(90, 90, 90);
+            border-radius: 3px;
+            padding: 3px 8px;
+            font-size: 15px;
+        }
+        QComboBox::drop-down {
+            subcontrol-origin: padding;
+            subcontrol-position: top right;
+            width: 20px;
+            border: none;
+            background: transparent;
+        }
+        QComboBox::down-arrow {
+            image: url(./ui/ui_pic/shanglajiantou.png);
+            width: 12px;
+            height: 12px;
+        }
+        QComboBox QAbstractItemView {
+            background-color: rgb(55, 55, 55);
+            color: rgb(255, 255, 255);
+            selection-background-color: rgb(24, 144, 255);
+            border: 1px solid rgb(70, 70, 70);
+        }
+    """
+
+    def __init__(self, options, parent=None):
+        super().__init__(parent)
+        self.options = list(options)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.fillRect(option.rect, QColor(55, 55, 55))
+        rect = option.rect.adjusted(5, 6, -5, -6)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QColor(90, 90, 90))
+        painter.setBrush(QColor(70, 70, 70))
+        painter.drawRoundedRect(rect, 3, 3)
+        painter.setPen(QColor(255, 255, 255))
+        painter.drawText(rect.adjusted(8, 0, -20, 0), Qt.AlignVCenter | Qt.AlignLeft, index.data() or "")
+        painter.drawText(rect.adjusted(0, 0, -6, 0), Qt.AlignVCenter | Qt.AlignRight, "▾")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            self.parent().edit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
 
-    def flags(self, index):
-        if index.isValid():
-            if index.column() in self.editable_column:
-                return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
-            else:
-                return Qt.ItemIsEnabled | Qt.ItemIsSelectable
-        return super().flags(index)
+    def createEditor(self, parent, option, index):
+        combobox = QComboBox(parent)
+        combobox.addItems(self.options)
+        combobox.setStyleSheet(self.combobox_style)
+        combobox.activated.connect(lambda _: self._commit_and_close(combobox))
+        return combobox
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data() or "")
+        QTimer.singleShot(0, editor.showPopup)
+
+    def setModelData(self, editor, model, index):
+        if editor.currentText() != index.data():
+            model.setData(index, editor.currentText())
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect.adjusted(5, 4, -5, -4))
+
+    def eventFilter(self, obj, event):
+        # 屏蔽下拉框的滚轮事件，防止意外修改选项
+        if isinstance(obj, QComboBox) and event.type() == QEvent.Wheel:
+            return True
+        return super().eventFilter(obj, event)
+
+    def _commit_and_close(self, editor):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+
+class LinkDelegate(QStyledItemDelegate):
+    """
+    超链接样式单元格：绘制带下划线的蓝色文字，点击时回调 callback(row)。
+    """
+
+    def __init__(self, text, callback, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.callback = callback
+
+    def paint(self, painter, option, index):
+        painter.save()
+        font = QFont(option.font)
+        font.setUnderline(True)
+        painter.setFont(font)
+        painter.setPen(QColor(24, 144, 255))
+        painter.drawText(option.rect, Qt.AlignCenter, self.text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            self.callback(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@
 
 对外接口（推荐调用）：
 - HistoryDataWindow.load_history_data():
-    从数据库查询历史录音数据并写入表格（清空旧数据后再填充）。
+    重置表格并从数据库加载第一页历史录音数据（最新在前），滚动到底部时自动加载下一页。
 - HistoryDataWindow.show():
     已重载，展示窗口前自动调用 load_history_data()，保证数据为最新。
 - HistoryDataWindow.add_history_data(audio_datas):
@@ -30,21 +30,28 @@
     dlg.show()
 
 注意：
-- 数据库查询依赖 base.audio_data_manager.get_record_audio_data_from_db 与 get_record_audio_data_path。
+- 数据库查询依赖 base.audio_data_manager.get_record_audio_data_page 与 get_record_audio_data_path。
+- 表格模型为 my_controls.paged_table_model.PagedTableModel，按 rowid 键集分页，不再一次性读取整表。
+- 顶部过滤栏（my_controls.history_filter_bar.HistoryFilterBar）的时间范围与关键字条件在数据库端执行。
 - 播放依赖 base.player_audio.AudioPlayer；读取音频依赖 librosa。
+- 文件名列通过 my_controls.waveform_thumbnail.WaveformThumbnailDelegate 显示录音波形预览，
+  仅读取已有的缩略图缓存（base.audio_thumbnail），不在滚动时解码音频。
 """
 
 import sys
 import librosa
 import numpy as np
 
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon, QPalette, QColor
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QIcon, QPalette, QColor
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTableView, QHeaderView
 
-from base.audio_data_manager import get_record_audio_data_from_db, get_record_audio_data_path
+from base.audio_data_manager import get_record_audio_data_page, get_record_audio_data_path
 from base.player_audio import AudioPlayer
 from consts.running_consts import DEFAULT_DIR
+from my_controls.history_filter_bar import HistoryFilterBar
+from my_controls.paged_table_model import PagedTableModel
+from my_controls.waveform_thumbnail import WaveformThumbnailDelegate
 from ui.audio_detail_dialog import show_audio_detail
 
 
@@ -54,10 +61,22 @@ class HistoryDataWindow(QWidget):
 
         self.history_data_table = QTableView()
         self.history_data_table.setIconSize(QSize(25, 25))
-        self.history_data_model = CustomStandardItemModel(0, 6, [4])
+        self.view_icon = QIcon(DEFAULT_DIR + "ui/ui_pic/sequence_pic/data.png")
+        self.filters = dict()
+        self.filter_bar = HistoryFilterBar()
+        self.filter_bar.filters_changed.connect(self.on_filters_changed)
+        self.history_data_model = PagedTableModel(
+            ["文件名称", "录制时间", "结束时间", "操作员", "备注", "查看"],
+            self.fetch_history_page,
+            row_to_cells=self.history_row_to_cells,
+            editable_columns=[4],
+            decorations={5: self.view_icon},
+        )
         self.history_data_table.setModel(self.history_data_model)
+        # 文件名列背景显示录音波形预览（读取保存时生成的缩略图缓存）
+        self.thumbnail_delegate = WaveformThumbnailDelegate(self.get_row_audio_path, parent=self.history_data_table)
+        self.history_data_table.setItemDelegateForColumn(0, self.thumbnail_delegate)
 
-        self.view_icon = QIcon(DEFAULT_DIR + "ui/ui_pic/sequence_pic/data.png")
         self.history_data_table.clicked.connect(self.on_cell_clicked)
 
         self.init_ui()
@@ -135,9 +154,6 @@ class HistoryDataWindow(QWidget):
                 background: none;
             }
         """)
-        self.history_data_table.model().setHorizontalHeaderLabels(
-            ["文件名称", "录制时间", "结束时间", "操作员", "备注", "查看"]
-        )
         header = self.history_data_table.horizontalHeader()
         # 设置所有列自动拉伸填充整个表格区域
         header.setSectionResizeMode(QHeaderView.Stretch)
@@ -150,50 +166,43 @@ class HistoryDataWindow(QWidget):
         # 数据加载改为显式接口调用：请调用 load_history_data()
 
         history_data_table_layout = QVBoxLayout()
+        history_data_table_layout.addWidget(self.filter_bar)
         history_data_table_layout.addWidget(self.history_data_table)
 
         return history_data_table_layout
 
     def load_history_data(self):
         """
-        显式从数据库查询历史录音数据并填充表格。
+        显式从数据库加载第一页历史录音数据（最新在前），后续页随滚动按需加载。
         可在外部初始化完控件后调用，以避免在构造阶段自动加载。
         """
-        result = get_record_audio_data_from_db()
-        try:
-            self.history_data_model.removeRows(0, self.history_data_model.rowCount())
-        except Exception:
-            pass
-
-        if result:
-            reversed_result = list(reversed(result))
-            self.add_history_data(reversed_result)
+        self.thumbnail_delegate.clear_cache()
+        self.history_data_model.reload()
         self.history_data_table.viewport().update()
 
+    def fetch_history_page(self, limit, before_rowid=None):
+        return get_record_audio_data_page(limit, before_rowid, self.filters)
+
+    def on_filters_changed(self, filters: dict):
+        self.filters = dict(filters or {})
+        self.load_history_data()
+
     def add_history_data(self, audio_datas):
-        for audio_data in audio_datas:
-            record_audio_data_path, record_time, stop_time, operator, description = audio_data
-            # print(record_audio_data_path, record_time, stop_time, operator, description)
-            self.add_history_data_to_table(record_audio_data_path, record_time, stop_time, operator, description)
+        self.history_data_model.append_rows(audio_datas)
 
     def add_history_data_to_table(
         self, record_audio_data_path: str, record_time: str, stop_time: str, operator: str, description: str
     ):
-        audio_data_items = []
+        self.history_data_model.append_rows([(record_audio_data_path, record_time, stop_time, operator, description)])
+
+    def history_row_to_cells(self, audio_data):
+        record_audio_data_path, record_time, stop_time, operator, description = audio_data
         record_audio_name = self.get_record_audio_data_name(record_audio_data_path)
-        view_item = CustomStandardItem(DEFAULT_DIR + "ui/ui_pic/sequence_pic/data.png", "查看")
-        record_audio_name_item = QStandardItem(record_audio_name)
-        record_time_item = QStandardItem(str(record_time))
-        stop_time_item = QStandardItem(str(stop_time))
-        operator_item = QStandardItem(operator)
-        description_item = QStandardItem(description)
-        audio_data_items.append(record_audio_name_item)
-        audio_data_items.append(record_time_item)
-        audio_data_items.append(stop_time_item)
-        audio_data_items.append(operator_item)
-        audio_data_items.append(description_item)
-        audio_data_items.append(view_item)
-        self.history_data_model.appendRow(audio_data_items)
+        return [record_audio_name, str(record_time), str(stop_time), operator, description, "查看"]
+
+    def get_row_audio_path(self, index):
+        row_values = self.history_data_model.row_values(index.row())
+        return row_values[0] if row_values else None
 
     def get_record_audio_data_name(self, record_audio_data_path: str):
         if record_audio_data_path:
@@ -216,9 +225,9 @@ class HistoryDataWindow(QWidget):
                 print(f"未找到音频文件：record_time={record_time}")
 
     def get_cell_content(self, row, column):
-        item = self.history_data_model.item(row, column)
-        if item:
-            return item.text()
+        index = self.history_data_model.index(row, column)
+        if index.isValid():
+            return index.data()
         return None
 
     def show(self):
@@ -227,30 +236,6 @@ class HistoryDataWindow(QWidget):
         super().show()
 
 
-class CustomStandardItemModel(QStandardItemModel):
-    def __init__(self, rows, columns, editable_column: list, parent=None):
-        super().__init__(rows, columns, parent)
-        self.editable_column = editable_column
-
-    def flags(self, index):
-        if index.isValid():
-            if index.column() in self.editable_column:
-                return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
-            else:
-                return Qt.ItemIsEnabled | Qt.ItemIsSelectable
-        return super().flags(index)
-
-
-class CustomStandardItem(QStandardItem):
-    def __init__(self, icon_url: str, text: str = None):
-        super().__init__(text)
-
-        self.flag = True
-
-        if icon_url:
-            self.setIcon(QIcon(icon_url))
-
-
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = HistoryDataWindow()
@@ -1,32 +1,33 @@
 import json
 import os
-import tempfile
 import threading
 import time
-import multiprocessing as mp
 
-import librosa
-import sounddevice as sd
 import numpy as np
 from scipy.signal import spectrogram
 from PyQt5.QtCore import QTimer, Qt, QObject, pyqtSignal
 from PyQt5.QtWidgets import QMessageBox, QFileDialog
 
+from base.alert_sound import AlertSoundService
 from base.audio_data_manager import auto_save_data
-from base.database.fixed_time_ng_total import query_warning_between
-from base.analysis_worker_process import analysis_worker
+from base.audio_pipeline import AudioPipeline
+from base.database.fixed_time_ng_total import query_warning_epochs_between
 from base.load_device_info import load_devices_data
 from base.sound_device_manager import get_default_device
 from base.log_manager import LogManager
-from base.player_audio import AudioPlayer
-from base.record_audio import AudioDataManager
-from base.data_struct.data_deal_struct import DataDealStruct
-from base.data_struct.audio_segment_extractor import AudioSegmentExtractor
-from base.sound_device_manager import sd, change_default_mic
-from base.tcp.tcp_client import send_dict
+from base.ng_rate_counter import NgRateCounter
+from base.sound_device_manager import change_default_mic
+from base.tcp.tcp_client import get_persistent_client
+from base.tcp.control_server import ControlServer
+from base.tcp.result_publisher import ResultPublisher
 
 from consts import error_code
-from consts.running_consts import DEFAULT_DIR, PEAK_DETECTION_CONFIG_JSON, PEAK_DETECTION_SETTINGS_JSON
+from consts.running_consts import (
+    DEFAULT_DIR,
+    PEAK_DETECTION_CONFIG_JSON,
+    PEAK_DETECTION_SETTINGS_JSON,
+    RESULT_PUBLISHER_CONFIG_JSON,
+)
 
 from my_controls.countdown import Countdown
 from ui.device_list import DeviceListWindow
@@ -36,12 +37,8 @@ from ui.machine_record_view.center_widget import CenterWidget
 class MainWindowMode:
     def __init__(self):
         self.logger = LogManager.set_log_handler("core")
-        self.data_struct = DataDealStruct()
         self.page_index = 0
 
-        self.sampling_rate = 44100
-        self.channels = None
-        self.selected_channels = list()
         self.infor_limit_config = dict()
         self.tcp_config = dict()
         self.ai_analysis_config = dict()
@@ -49,86 +46,78 @@ class MainWindowMode:
 
         self.total_display_time = 600
         self.nfft = 256
-        self.ctx = sd._CallbackContext()
 
         self.plot_time = 10
         self.start_record_time = None
         self.model_name = ""
 
-        self.max_points = self.total_display_time * self.sampling_rate
+        # 采集 → 历史缓冲 → 片段提取 → 分析进程，由不依赖 Qt 的流水线负责
+        self.pipeline = AudioPipeline(sampling_rate=44100, history_sec=self.total_display_time, ring_buffer_sec=30)
         self.plot_points_section = self.plot_time * self.sampling_rate
-        self.buffer_len = 30 * self.sampling_rate
 
-        self.select_device_name = None
-
-        self.audio_manager = AudioDataManager()
         self.auto_save_count = Countdown(self.total_display_time - 10)
         self.infor_limit_count = Countdown(self.infor_limit_config.get("duration_min", 100) * 60)
+        # 界面刷新定时器：仅负责绘图，历史数组由流水线调度线程刷新
         self.auto_write_timer = QTimer()
         self.auto_write_timer.setInterval(100)
 
-        self.segment_extractor = None
-
         self.audio_store_path = ""
 
-        self.channel_index = []
-        self.storage_filled_len = []
+    # 采集状态与缓冲由流水线持有，这里提供只读访问
+    @property
+    def data_struct(self):
+        return self.pipeline.data_struct
+
+    @property
+    def sampling_rate(self):
+        return self.pipeline.sampling_rate
+
+    @property
+    def channels(self):
+        return self.pipeline.channels
+
+    @property
+    def selected_channels(self):
+        return self.pipeline.selected_channels
+
+    @property
+    def select_device_name(self):
+        return self.pipeline.select_device_name
+
+    @property
+    def storage_filled_len(self):
+        return self.pipeline.storage_filled_len
+
+    @property
+    def segment_extractor(self):
+        return self.pipeline.segment_extractor
 
     def load_device_info(self):
         device_name, channels, selected_channels, _, mic_index = load_devices_data()
         change_default_mic(mic_index)
-        if device_name and channels and selected_channels:
-            self.select_device_name, self.channels, self.selected_channels= (
-                device_name,
-                channels,
-                selected_channels,
-            )
-        else:
+        if not (device_name and channels and selected_channels):
+            device_name, channels, selected_channels = self.select_device_name, self.channels, self.selected_channels
             try:
                 default_device = get_default_device()
                 if default_device:
-                    self.select_device_name = default_device.get("name")
-                    self.channels = int(default_device.get("max_input_channels", 1)) or 1
-                    self.selected_channels = [0]
+                    device_name = default_device.get("name")
+                    channels = int(default_device.get("max_input_channels", 1)) or 1
+                    selected_channels = [0]
                     DeviceListWindow.save_device_data_to_json(
-                        self.select_device_name,
-                        self.channels,
-                        self.selected_channels,
+                        device_name,
+                        channels,
+                        selected_channels,
                     )
             except Exception:
                 QMessageBox.information("通知", "设置采集设备失败，已使用默认设备")
                 change_default_mic(0)
-                self.select_device_name = "Default Microphone"
-                self.channels = 1
-                self.selected_channels = [0]
-
+                device_name = "Default Microphone"
+                channels = 1
+                selected_channels = [0]
+        self.pipeline.set_device(device_name, channels, selected_channels)
 
     def set_up_audio_store_zero(self):
-        self.data_struct.audio_data = np.zeros((len(self.selected_channels), self.max_points), dtype=np.float16)
-        self.data_struct.audio_data_arr = [
-            np.zeros(self.buffer_len, dtype=np.float16) for _ in range(len(self.selected_channels))
-        ]
-        self.data_struct.write_index = [0] * len(self.selected_channels)
-        self.channel_index = [0] * len(self.selected_channels)
-        self.storage_filled_len = [0] * len(self.selected_channels)
-
-    def build_audio_segment_extractor(self, extract_flag, extract_interval=None, segment_duration=None, on_extracted=None):
-        if extract_flag:
-            self.segment_extractor = AudioSegmentExtractor(
-                extract_interval=extract_interval,
-                segment_duration=segment_duration,
-                sampling_rate=self.sampling_rate,
-            )
-            self.segment_extractor.set_audio_source(
-                self.data_struct.audio_data,
-                write_index_ref=self.storage_filled_len
-            )
-            if on_extracted is not None:
-                self.segment_extractor.set_on_extracted_callback(on_extracted)
-            self.data_struct.segment_extractor = self.segment_extractor
-        else:
-            self.segment_extractor = None
-            self.data_struct.segment_extractor = None
+        self.pipeline.reset_buffers()
 
     def set_audio_store_path(self, path: str):
         self.audio_store_path = path or ""
@@ -146,85 +135,6 @@ class MainWindowMode:
         with open(DEFAULT_DIR + "ui/ui_config/audio_store_path.txt", "w") as f:
             f.write(path)
 
-    def flush_audio_queue_to_array(self):
-        num_channels = len(self.selected_channels)
-        if num_channels == 0:
-            return
-        while True:
-            e1 = getattr(self.data_struct, "epoch", 0)
-            if e1 % 2 == 1:
-                continue
-            new_write_indices = [None] * num_channels
-            restart_needed = False
-            for i in range(num_channels):
-                if e1 != getattr(self.data_struct, "epoch", 0):
-                    restart_needed = True
-                    break
-                write_idx_snapshot = int(self.data_struct.write_index[i])
-                new_write_indices[i] = write_idx_snapshot
-            if restart_needed:
-                continue
-            staged_segments = [None] * num_channels
-            staged_write_indices = [None] * num_channels
-            for i in range(num_channels):
-                ring_buffer = self.data_struct.audio_data_arr[i]
-                rb_len = int(len(ring_buffer))
-                if rb_len <= 0:
-                    staged_segments[i] = None
-                    staged_write_indices[i] = new_write_indices[i]
-                    continue
-                write_idx_norm = int(new_write_indices[i]) % rb_len
-                prev_idx = int(self.channel_index[i])
-                prev_idx_norm = prev_idx % rb_len
-                if write_idx_norm == prev_idx_norm:
-                    seg = np.array([], dtype=ring_buffer.dtype)
-                elif write_idx_norm > prev_idx_norm:
-                    seg = ring_buffer[prev_idx_norm:write_idx_norm]
-                else:
-                    seg = np.concatenate([
-                        ring_buffer[prev_idx_norm:],
-                        ring_buffer[:write_idx_norm]
-                    ])
-                staged_segments[i] = seg
-                staged_write_indices[i] = new_write_indices[i]
-            e2 = getattr(self.data_struct, "epoch", 0)
-            if e1 != e2 or (e2 % 2 == 1):
-                continue
-            for i in range(num_channels):
-                seg = staged_segments[i]
-                if seg is None or seg.size == 0:
-                    if staged_write_indices[i] is not None:
-                        self.channel_index[i] = int(staged_write_indices[i])
-                    continue
-                storage_array = self.data_struct.audio_data[i]
-                store_len = int(len(storage_array))
-                if store_len <= 0:
-                    if staged_write_indices[i] is not None:
-                        self.channel_index[i] = int(staged_write_indices[i])
-                    continue
-                filled = int(self.storage_filled_len[i])
-                free = max(0, store_len - filled)
-                if free > 0:
-                    take = min(free, seg.size)
-                    storage_array[filled:filled + take] = seg[:take]
-                    filled += take
-                    remaining = seg[take:]
-                else:
-                    remaining = seg
-                if remaining.size > 0:
-                    m = int(remaining.size)
-                    if m >= store_len:
-                        storage_array[:] = remaining[-store_len:]
-                        filled = store_len
-                    else:
-                        storage_array[:-m] = storage_array[m:]
-                        storage_array[-m:] = remaining
-                        filled = store_len
-                self.storage_filled_len[i] = min(store_len, filled)
-                if staged_write_indices[i] is not None:
-                    self.channel_index[i] = int(staged_write_indices[i])
-            break
-
     def save_audio_data(self, countdown_time, save_path):
         if countdown_time == self.total_display_time - 10:
             audio_data = self.data_struct.audio_data
@@ -250,13 +160,21 @@ class MainWindowMode:
     @staticmethod
     def get_model_info(model_name: str):
         """
-        查询模型及配置路径。
-        暂时仅支持 knock_peak_detector（直接使用配置文件路径）。
+        查询模型及配置路径，返回 (code, (model_path, config_path, "", ""))。
+        knock_peak_detector 直接使用峰值检测配置文件；其他已注册的模型（见 base.model_registry）
+        从 peak_detection_models.json 的 "models" 段读取，如 {"<model_name>": {"model_path": ..., "config_path": ...}}。
         """
         model_name = (model_name or "").strip()
         if model_name == "knock_peak_detector":
             peak_cfg = os.path.normpath(PEAK_DETECTION_CONFIG_JSON)
             return error_code.OK, ("", peak_cfg, "", "")
+        try:
+            with open(os.path.normpath(PEAK_DETECTION_SETTINGS_JSON), "r", encoding="utf-8") as f:
+                entry = (json.load(f).get("models") or {}).get(model_name)
+        except Exception:
+            entry = None
+        if entry and entry.get("config_path"):
+            return error_code.OK, (entry.get("model_path", ""), entry["config_path"], "", "")
         return error_code.INVALID_QUERY, None
 
 
@@ -266,35 +184,12 @@ class MainWindowController:
         self.model = model
         self.view = view
 
-        self._analysis_ctx = None
-        self._analysis_job_q = None
-        self._analysis_res_q = None
-        self._analysis_proc = None
-        self._analysis_running = False
-        self._analysis_listener_thread = None
-        self._analysis_starting = False
         self.is_hide_graph = False
         self._analysis_signal = AnalysisSignalEmitter()
         self._analysis_signal.analysis_completed.connect(self._handle_analysis_results)
         self._analysis_signal.analysis_completed.connect(self.view.information_bar.write_score)
-        self._temp_dir = os.path.join(tempfile.gettempdir(), "audio_segments_tmp")
-        os.makedirs(self._temp_dir, exist_ok=True)
-        self._peak_threshold = 3.5
-
-        # 报警音频播放器
-        self._alert_player: AudioPlayer = None
-        self._alert_audio_data = None
-        self._alert_sample_rate = 44100
-        self._load_alert_audio()
-
-        self.init_infor_limit_config()
-        self.init_tcp_config()
-        self.model.init_store_path()
+        self._init_pipeline_state()
         self.view.audio_store_path_lineedit.setText(self.model.audio_store_path)
-        self.model.infor_limit_count.set_count(self.model.infor_limit_config.get("duration_min", 100) * 60)
-
-        self.model.load_device_info()
-        self.model.set_up_audio_store_zero()
         self._init_peak_scatter_channels()
         self._load_analysis_settings()
         self.view.hide_right_part_widget(len(self.model.selected_channels) < 2 )
@@ -315,7 +210,38 @@ class MainWindowController:
         self.model.auto_write_timer.timeout.connect(self.work_function)
         self.view.device_list_window.device_list_changed.connect(self.change_device)
 
+    def _init_pipeline_state(self):
+        """初始化与界面无关的告警/发布状态并订阅流水线事件（界面与无界面运行共用）。"""
+        self._peak_threshold = 3.5
+
+        # 各通道最新健康分数，由流水线分析监听线程写入
+        self._results_lock = threading.Lock()
+        self._latest_health_scores = dict()
+        self.model.pipeline.add_listener("results", self._on_pipeline_results)
+
+        # 报警提示音（预混音 + 常开输出流）
+        self._alert_sound: AlertSoundService = None
+        self._load_alert_audio()
+
+        self._result_publisher: ResultPublisher = None
+
+        self.init_infor_limit_config()
+        self.init_tcp_config()
+        self.init_result_publisher()
+        self.model.init_store_path()
+        self.model.infor_limit_count.set_count(self.model.infor_limit_config.get("duration_min", 100) * 60)
+        # 信息限制告警：内存滑动窗口计数，启动时从数据库预热一次
+        self._ng_counter = NgRateCounter(self.model.infor_limit_config.get("duration_min", 100) * 60)
+        self._infor_limit_alarmed = False
+        self._seed_ng_counter()
+
+        self.model.load_device_info()
+        self.model.set_up_audio_store_zero()
+
     def change_device(self):
+        if self.model.pipeline.is_running:
+            # 录音中不能切换采集设备，先按“停止”结束当前录音
+            self.view.stop_btn.click()
         self.model.page_index = 0
         self.model.load_device_info()
         self.model.set_up_audio_store_zero()
@@ -375,36 +301,26 @@ class MainWindowController:
                 self.view.start_record_widget.reset_peak_scatter()
             except Exception:
                 pass
+        code, msg = self.model.pipeline.start()
+        if code != error_code.OK:
+            self.view.record_btn.setChecked(False)
+            self.view.record_btn.setEnabled(True)
+            self.view.stop_btn.setEnabled(False)
+            self.logger.error(f"开始录音失败: {msg}")
+            QMessageBox.warning(self.view, "提示", msg)
+            return
         self.view.audio_store_path_lineedit.setEnabled(False)
-        self.model.data_struct.record_flag = True
         self.model.auto_write_timer.start()
         self.model.auto_save_count.count_start()
         self.model.start_record_time = time.strftime("%Y%m%d%H%M%S", time.localtime())
 
-        if self.model.segment_extractor:
-            # 重新设置音频源引用，因为 stop_record() 中的 set_up_audio_store_zero()
-            # 会创建新的数组，导致 segment_extractor 持有的旧引用失效
-            self.model.segment_extractor.set_audio_source(
-                self.model.data_struct.audio_data,
-                write_index_ref=self.model.storage_filled_len
-            )
-            if not self.model.segment_extractor.is_running:
-                self.model.segment_extractor.start()
-        # self.start_analysis_process()
-
-        self.model.audio_manager.start_recording(self.model.ctx, self.model.selected_channels, self.model.sampling_rate, self.model.channels)
-
     def stop_record(self):
-        self.model.data_struct.record_flag = False
-
         self.view.audio_store_path_lineedit.setEnabled(True)
         self.model.auto_save_count.count_stop()
         self.model.auto_write_timer.stop()
-        self.model.set_up_audio_store_zero()
+        # 停止采集与提取，并清空缓冲
+        self.model.pipeline.stop()
         self.model.start_record_time = None
-        if self.model.segment_extractor and self.model.segment_extractor.is_running:
-            self.model.segment_extractor.stop()
-        self.model.audio_manager.stop_recording()
 
 
     def change_waveform_title(self):
@@ -443,19 +359,23 @@ class MainWindowController:
         interval = float(settings.get("analysis_interval", 3.5))
         duration = float(settings.get("time", 4.0))
         model_name = settings.get("model_name", "knock_peak_detector")
+        config_path = None
+        model_path = ""
         if use_ai:
-            self.model.build_audio_segment_extractor(
-                True,
-                extract_interval=interval,
-                segment_duration=duration,
-                on_extracted=self._handle_segments_extracted,
-            )
-            self.model.model_name = model_name
-            self.start_analysis_process()
-        else:
-            self.model.build_audio_segment_extractor(False)
-            self.model.model_name = ""
-            self.stop_analysis_process()
+            code, query_result = self.model.get_model_info(model_name)
+            if code == error_code.OK and query_result:
+                model_path, config_path, _, _ = query_result
+            else:
+                self.logger.error(f"未找到分析模型: {model_name}")
+        self.model.model_name = model_name if use_ai else ""
+        self.model.pipeline.configure_analysis(
+            use_ai,
+            config_path,
+            extract_interval=interval,
+            segment_duration=duration,
+            model_name=model_name,
+            model_path=model_path,
+        )
 
     @staticmethod
     def _read_peak_detection_settings():
@@ -496,110 +416,39 @@ class MainWindowController:
             self.model.save_store_path_to_txt(path)
 
     def _load_alert_audio(self):
-        """预加载报警音频文件，避免每次播放时重复加载"""
+        """预加载报警音频并按输出设备预混音，保持常开输出流，每次报警只需归零播放位置"""
         alert_audio_path = os.path.join(DEFAULT_DIR, "alert.wav")
         if os.path.exists(alert_audio_path):
             try:
-                self._alert_audio_data, self._alert_sample_rate = librosa.load(
-                    alert_audio_path, sr=None, mono=False
-                )
+                self._alert_sound = AlertSoundService(alert_audio_path)
                 self.logger.info(f"已加载报警音频: {alert_audio_path}")
             except Exception as exc:
                 self.logger.error(f"加载报警音频失败: {exc}")
-                self._alert_audio_data = None
+                self._alert_sound = None
         else:
             self.logger.warning(f"报警音频文件不存在: {alert_audio_path}")
 
     def _play_alert_audio(self):
-        """在后台线程中播放报警音频，不阻塞主线程"""
-        if self._alert_audio_data is None:
-            return
-        # 如果正在播放，不重复触发
-        if self._alert_player is not None and self._alert_player.is_playing:
-            return
-
-        def _play_in_thread():
-            try:
-                self._alert_player = AudioPlayer(
-                    self._alert_audio_data.T if self._alert_audio_data.ndim == 2 else self._alert_audio_data,
-                    sample_rate=self._alert_sample_rate
-                )
-                self._alert_player.start()
-            except Exception as exc:
-                self.logger.error(f"播放报警音频失败: {exc}")
-
-        play_thread = threading.Thread(target=_play_in_thread, daemon=True)
-        play_thread.start()
-
-    def _handle_segments_extracted(self, segments: np.ndarray, sampling_rate: int):
-        if segments is None:
-            return
-        code, query_result = self.model.get_model_info(self.model.model_name)
-        if code != error_code.OK or not query_result:
+        """触发报警音（不阻塞；正在播放时不重复触发）"""
+        if self._alert_sound is None:
             return
-        _, config_path, _, _ = query_result
-        self.start_analysis_process()
-        job_id = time.strftime("%Y-%m-%d-%H-%M-%S", time.localtime())
-        npy_path = os.path.join(self._temp_dir, f"{job_id}.npy")
         try:
-            np.save(npy_path, segments)
-            if self._analysis_job_q is not None:
-                self._analysis_job_q.put(
-                    {
-                        "job_id": job_id,
-                        "npy_path": npy_path,
-                        "sampling_rate": sampling_rate,
-                        "config_path": config_path,
-                    }
-                )
+            self._alert_sound.play()
         except Exception as exc:
-            self.logger.error(f"enqueue analysis job failed: {exc}")
+            self.logger.error(f"播放报警音频失败: {exc}")
 
-    def start_analysis_process(self):
-        if self._analysis_starting:
-            return
-        if self._analysis_proc is not None and self._analysis_proc.is_alive():
-            if not self._analysis_running:
-                self._analysis_running = True
-            if self._analysis_listener_thread is None:
-                self._start_analysis_listener()
-            return
-        self._analysis_starting = True
-        try:
-            self._analysis_ctx = mp.get_context("spawn")
-            self._analysis_job_q = self._analysis_ctx.Queue()
-            self._analysis_res_q = self._analysis_ctx.Queue()
-            self._analysis_proc = self._analysis_ctx.Process(
-                target=analysis_worker,
-                args=(self._analysis_job_q, self._analysis_res_q),
-                daemon=True,
-            )
-            self._analysis_proc.start()
-            self._analysis_running = True
-            self._start_analysis_listener()
-        except Exception as exc:
-            self.logger.error(f"启动分析进程失败: {exc}")
-        finally:
-            self._analysis_starting = False
+    def _on_pipeline_results(self, job_id, results):
+        """流水线分析监听线程回调：记录健康分数、发布结果并交给界面/告警处理。"""
+        health_scores = self._collect_health_scores(results)
+        with self._results_lock:
+            self._latest_health_scores.update(health_scores)
+        if self._result_publisher is not None:
+            self._result_publisher.publish_results(job_id, results)
+        self._dispatch_analysis_results(results)
 
-    def _start_analysis_listener(self):
-        if self._analysis_listener_thread is not None:
-            return
-
-        def _listen():
-            while self._analysis_running:
-                try:
-                    msg = self._analysis_res_q.get(timeout=0.5)
-                except Exception:
-                    continue
-                if not msg:
-                    continue
-                results = msg.get("results", [])
-                if results:
-                    self._analysis_signal.analysis_completed.emit(results)
-
-        self._analysis_listener_thread = threading.Thread(target=_listen, daemon=True)
-        self._analysis_listener_thread.start()
+    def _dispatch_analysis_results(self, results):
+        """由分析监听线程调用：界面模式下通过信号切换到主线程处理。"""
+        self._analysis_signal.analysis_completed.emit(results)
 
     def _handle_analysis_results(self, results):
         try:
@@ -615,16 +464,20 @@ class MainWindowController:
                 return
             alert_flags = sum([1 for ch in points if ch.get("health_score") is not None and ch["health_score"] < 30])
             if alert_flags > 0:
-                # 在后台线程播放报警音频
                 self._play_alert_audio()
+                self._ng_counter.add(count=alert_flags)
+                self.check_infor_limit()
 
-            try:
-                self.view.start_record_widget.update_peak_scatter(points)
-            except Exception as exc:
-                self.logger.error(f"更新散点图失败: {exc}")
+            self._show_peak_points(points)
         except Exception as exc:
             self.logger.error(f"处理峰值结果失败: {exc}")
 
+    def _show_peak_points(self, points):
+        try:
+            self.view.start_record_widget.update_peak_scatter(points)
+        except Exception as exc:
+            self.logger.error(f"更新散点图失败: {exc}")
+
     def _parse_peak_results(self, result_packets):
         parsed = []
         if not result_packets:
@@ -695,52 +548,24 @@ class MainWindowController:
         parts = str(label).split("::")
         return parts[-1] if parts else label
 
-    def stop_analysis_process(self):
-        self._analysis_running = False
-        try:
-            if self._analysis_job_q is not None:
-                try:
-                    self._analysis_job_q.put(None)
-                except Exception:
-                    pass
-            if self._analysis_proc is not None:
-                self._analysis_proc.join(timeout=5)
-                if self._analysis_proc.is_alive():
-                    self._analysis_proc.terminate()
-        except Exception:
-            pass
-        finally:
-            try:
-                if self._analysis_job_q is not None:
-                    self._analysis_job_q.close()
-                    self._analysis_job_q.join_thread()
-            except Exception:
-                pass
-            try:
-                if self._analysis_res_q is not None:
-                    self._analysis_res_q.close()
-                    self._analysis_res_q.join_thread()
-            except Exception:
-                pass
-            self._analysis_proc = None
-            self._analysis_job_q = None
-            self._analysis_res_q = None
-            self._analysis_listener_thread = None
-            self._analysis_starting = False
-
-    def check_infor_limit(self, countdown_time):
+    def _seed_ng_counter(self):
         now_ts = int(time.time())
-        now_cn = time.strftime("%Y年%m月%d日 %H时%M分%S秒", time.localtime(now_ts))
-        duration_min = int(self.model.infor_limit_config.get("duration_min", 100))
-        past_ts = now_ts - max(0, duration_min) * 60
-        past_cn = time.strftime("%Y年%m月%d日 %H时%M分%S秒", time.localtime(past_ts))
-        code, query_result = query_warning_between(past_cn, now_cn)
-        if code != error_code.OK or not query_result:
+        past_ts = now_ts - int(self._ng_counter.window_sec)
+        code, epochs = query_warning_epochs_between(past_ts, now_ts)
+        if code != error_code.OK:
+            self.logger.warning(f"预热 NG 计数器失败: {epochs}")
             return
-        warning_count = len(query_result)
+        self._ng_counter.seed(epochs)
+
+    def check_infor_limit(self, countdown_time=None):
+        warning_count = self._ng_counter.count()
         if warning_count >= int(self.model.infor_limit_config.get("max_count", 100)):
-            self.by_tcp_send_warning("NG")
+            # 仅在越过阈值时发送一次，回落到阈值以下后重新布防
+            if not self._infor_limit_alarmed:
+                self._infor_limit_alarmed = True
+                self.by_tcp_send_warning("NG")
             return
+        self._infor_limit_alarmed = False
 
     def by_tcp_send_warning(self, warning_type: str):
         data = {
@@ -752,14 +577,10 @@ class MainWindowController:
             server_host = str(self.model.tcp_config.get("ip", "127.0.0.1"))
             server_port = int(self.model.tcp_config.get("port", 50000))
             print(f"发送警告到 {server_host}:{server_port}")
-            try:
-                send_dict(
-                    server_host=server_host,
-                    server_port=server_port,
-                    data_obj=data,
-                )
-            except Exception as e:
-                QMessageBox.critical(self.widget, "错误", f"发送警告失败: {e}")
+            # 长连接客户端在后台线程发送与重连，此处仅入队，服务端不可达时不阻塞界面
+            client = get_persistent_client(server_host, server_port)
+            if not client.send_dict_async(data):
+                self.logger.error(f"发送警告失败: TCP 发送线程未运行 {server_host}:{server_port}")
 
     def init_infor_limit_config(self):
         infor_limit_path = DEFAULT_DIR + "ui/ui_config/infor_limition.json"
@@ -775,8 +596,142 @@ class MainWindowController:
                 tcp_config = json.load(f)
                 self.model.tcp_config = tcp_config
 
+    def init_result_publisher(self):
+        """按 result_publisher.json 启动分析结果流式发布服务（默认关闭）。"""
+        default_cfg = {
+            "enable_publisher": False,
+            "host": "127.0.0.1",
+            "port": 50100,
+            "encoding": "ndjson",
+            "batch_interval_sec": 0.1,
+            "max_batch_size": 100,
+            "max_records_per_sec": 200,
+            "client_queue_size": 100,
+            "udp_targets": [],
+        }
+        path = os.path.normpath(RESULT_PUBLISHER_CONFIG_JSON)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        default_cfg.update(data)
+            except Exception as exc:
+                self.logger.error(f"读取结果发布配置失败: {exc}")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(default_cfg, f, ensure_ascii=False, indent=4)
+        if not default_cfg.get("enable_publisher", False):
+            return
+        try:
+            self._result_publisher = ResultPublisher(
+                host=str(default_cfg["host"]),
+                port=int(default_cfg["port"]),
+                encoding=str(default_cfg["encoding"]),
+                batch_interval_sec=float(default_cfg["batch_interval_sec"]),
+                max_batch_size=int(default_cfg["max_batch_size"]),
+                max_records_per_sec=float(default_cfg["max_records_per_sec"]),
+                client_queue_size=int(default_cfg["client_queue_size"]),
+                udp_targets=[tuple(target) for target in default_cfg.get("udp_targets") or []],
+            )
+            self._result_publisher.start()
+        except Exception as exc:
+            self.logger.error(f"启动结果发布服务失败: {exc}")
+            self._result_publisher = None
+
+    # ---------------- 状态查询与远程设置（供 ControlServer 调用） ---------------- #
+
+    ANALYSIS_SETTING_TYPES = {
+        "use_ai": bool,
+        "time": float,
+        "sample_rate": int,
+        "model_name": str,
+        "analysis_interval": float,
+    }
+
+    def get_health_scores(self):
+        with self._results_lock:
+            return dict(self._latest_health_scores)
+
+    def get_recent_results(self, n: int = 20):
+        return self.model.pipeline.get_recent_results(n)
+
+    def get_analysis_settings(self):
+        return dict(self.model.ai_analysis_config)
+
+    def get_status(self):
+        pipeline = self.model.pipeline
+        queues = pipeline.queue_depths()
+        queues["result_subscribers"] = (
+            self._result_publisher.subscriber_count if self._result_publisher is not None else 0
+        )
+        return {
+            "recording": pipeline.is_running,
+            "start_record_time": self.model.start_record_time,
+            "device_name": self.model.select_device_name,
+            "selected_channels": list(self.model.selected_channels),
+            "sampling_rate": self.model.sampling_rate,
+            "audio_store_path": self.model.audio_store_path,
+            "analysis": {
+                "use_ai": bool(self.model.ai_analysis_config.get("use_ai", False)),
+                "model_name": self.model.model_name,
+                "process_alive": pipeline.is_analysis_alive,
+                "jobs_submitted": pipeline.jobs_submitted,
+                "jobs_completed": pipeline.jobs_completed,
+                "timing": pipeline.analysis_timing(),
+            },
+            "queues": queues,
+            "ng_count": self._ng_counter.count(),
+            "health_scores": self.get_health_scores(),
+        }
+
+    def update_analysis_settings(self, settings: dict):
+        """
+        修改分析设置（写回 peak_detection_models.json）并重新加载片段提取器与分析进程。
+        返回 (code, 新设置 或 错误信息)。
+        """
+        updates = {}
+        for key, value in settings.items():
+            caster = self.ANALYSIS_SETTING_TYPES.get(key)
+            if caster is None:
+                return error_code.INVALID_CONFIG, f"不支持的分析设置: {key}"
+            if caster is bool and not isinstance(value, bool):
+                return error_code.INVALID_TYPE_DATA, f"{key} 必须为布尔值"
+            try:
+                updates[key] = caster(value)
+            except (TypeError, ValueError):
+                return error_code.INVALID_TYPE_DATA, f"{key} 取值无效: {value}"
+        for key in ("time", "analysis_interval", "sample_rate"):
+            if key in updates and updates[key] <= 0:
+                return error_code.INVALID_TYPE_DATA, f"{key} 必须大于 0"
+
+        path = os.path.normpath(PEAK_DETECTION_SETTINGS_JSON)
+        data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f) or {}
+            except Exception as exc:
+                self.logger.error(f"读取分析设置失败: {exc}")
+                data = {}
+        target = data["analysis"] if isinstance(data.get("analysis"), dict) else data
+        target.update(updates)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except Exception as exc:
+            self.logger.error(f"保存分析设置失败: {exc}")
+            return error_code.INVALID_SAVE, f"保存分析设置失败: {exc}"
+
+        # 流水线会停止旧提取器，录音中由新提取器立即接管
+        self._load_analysis_settings()
+        self.logger.info(f"分析设置已更新: {updates}")
+        return error_code.OK, self.get_analysis_settings()
+
     def work_function(self):
-        self.model.flush_audio_queue_to_array()
+        # 历史数组由流水线调度线程刷新，这里只负责绘图
         if len(self.model.selected_channels) > 1:
             wavefrom_data: list = list()
             spect_data: list = list()
@@ -822,6 +777,71 @@ class MainWindowController:
                 self.view.wav_or_spect_graph.plot_spectrogram(spect_data[1], "right")
 
 
+class HeadlessController(MainWindowController):
+    """
+    无界面运行的工位控制器：
+    - 复用 MainWindowController 的流水线配置、NG 计数、TCP 告警与结果发布逻辑，不创建任何界面
+    - 采集/提取/分析由 AudioPipeline 的调度线程与分析进程完成，分析结果在监听线程中直接处理
+    - 通过 ControlServer 远程调用 record_audio / stop_record / get_status 等接口
+    DataDealStruct 为进程内单例，每个进程只能运行一个工位，多工位请分别启动进程并使用不同的 AUDIO_STATION_DIR 与端口。
+    """
+
+    def __init__(self, model: MainWindowMode):
+        self.logger = LogManager.set_log_handler("core")
+        self.model = model
+        self.view = None
+        self.is_hide_graph = False
+
+        self._record_lock = threading.Lock()
+
+        self._init_pipeline_state()
+        self._load_analysis_settings()
+
+    def _init_peak_scatter_channels(self):
+        pass
+
+    def _dispatch_analysis_results(self, results):
+        self._handle_analysis_results(results)
+
+    def _show_peak_points(self, points):
+        pass
+
+    def record_audio(self):
+        with self._record_lock:
+            if not self.model.audio_store_path:
+                self.logger.warning("请选择保存音频的路径")
+                return error_code.INVALID_PATH, "请先配置保存音频的路径"
+            code, msg = self.model.pipeline.start()
+            if code != error_code.OK:
+                return code, msg
+            if self.model.ai_analysis_config.get("use_ai", False):
+                with self._results_lock:
+                    self._latest_health_scores.clear()
+            self.model.start_record_time = time.strftime("%Y%m%d%H%M%S", time.localtime())
+            self.logger.info(f"无界面录音已开始: {self.model.select_device_name} {self.model.selected_channels}")
+            return code, msg
+
+    def stop_record(self):
+        with self._record_lock:
+            code, msg = self.model.pipeline.stop()
+            if code == error_code.OK:
+                self.model.start_record_time = None
+                self.logger.info("无界面录音已停止")
+            return code, msg
+
+    def update_analysis_settings(self, settings: dict):
+        with self._record_lock:
+            return super().update_analysis_settings(settings)
+
+    def shutdown(self):
+        self.model.pipeline.shutdown()
+        if self._alert_sound is not None:
+            self._alert_sound.close()
+        if self._result_publisher is not None:
+            self._result_publisher.stop()
+            self._result_publisher = None
+
+
 class AnalysisSignalEmitter(QObject):
     analysis_completed = pyqtSignal(list)
 
@@ -839,3 +859,20 @@ def open_main_window():
     view.setWindowState(view.windowState() | Qt.WindowMaximized)
 
     return view
+
+
+def run_headless_station(host: str = "127.0.0.1", port: int = 50200, auto_record: bool = False):
+    """无界面运行一个工位：采集 + 分析 + 本地控制服务，阻塞直到 Ctrl+C。"""
+    model = MainWindowMode()
+    controller = HeadlessController(model)
+    server = ControlServer(controller, host=host, port=port)
+    if auto_record:
+        code, msg = controller.record_audio()
+        if code != error_code.OK:
+            controller.logger.error(f"自动开始录音失败: {msg}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.shutdown()